@@ -0,0 +1,103 @@
+"""Which templates a user may use for new plans
+
+A template can be used if it is published and not retired, or if the user
+has the "dmpt.use_template" permission for it, directly or via a group.
+Finding the latter via django-guardian is expensive, so the resulting set of
+template ids is cached per user. The same goes for the templates a user may
+change, see `get_permitted_template_ids`.
+
+All the cached sets are invalidated at once by bumping the version in
+`TemplateAccessVersion` whenever a template is saved or deleted or a
+permission changes, see `dmpt.signals`. The version is in the database, so
+that all processes see it even if the cache is per process, and it only
+ever goes up, so that an old set is never used again. Looking it up is a
+single, cheap query. In case something is changed without signals, the
+sets also expire after EASYDMP_TEMPLATE_ACCESS_CACHE_TIMEOUT seconds.
+"""
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from guardian.shortcuts import get_objects_for_user
+
+
+__all__ = [
+    'find_accessible_template_ids',
+    'get_accessible_template_ids',
+    'get_permitted_template_ids',
+    'invalidate_template_access',
+]
+
+VERSION_PK = 1
+
+
+def _get_timeout():
+    return getattr(settings, 'EASYDMP_TEMPLATE_ACCESS_CACHE_TIMEOUT', 60 * 60)
+
+
+def _get_version():
+    TemplateAccessVersion = apps.get_model('dmpt', 'TemplateAccessVersion')
+    version = (
+        TemplateAccessVersion.objects
+        .filter(pk=VERSION_PK)
+        .values_list('version', flat=True)
+        .first()
+    )
+    return version or 0
+
+
+def invalidate_template_access():
+    "Forget the accessible templates of all users, in all processes"
+    TemplateAccessVersion = apps.get_model('dmpt', 'TemplateAccessVersion')
+    updated = (
+        TemplateAccessVersion.objects
+        .filter(pk=VERSION_PK)
+        .update(version=F('version') + 1)
+    )
+    if not updated:
+        TemplateAccessVersion.objects.get_or_create(pk=VERSION_PK, defaults={'version': 1})
+
+
+def find_accessible_template_ids(user):
+    "Look up the ids of the templates `user` may use, uncached"
+    Template = apps.get_model('dmpt', 'Template')
+    public = Template.objects.publicly_available().values_list('pk', flat=True)
+    permitted = (
+        get_objects_for_user(user, 'dmpt.use_template', klass=Template)
+        .values_list('pk', flat=True)
+    )
+    return frozenset(public) | frozenset(permitted)
+
+
+def get_accessible_template_ids(user):
+    "Get the ids of the templates `user` may use, possibly cached"
+    key = f'easydmp:dmpt:template-access:{_get_version()}:{user.pk}'
+    template_ids = cache.get(key)
+    if template_ids is None:
+        template_ids = find_accessible_template_ids(user)
+        cache.set(key, template_ids, _get_timeout())
+    return template_ids
+
+
+def get_permitted_template_ids(user, perms):
+    """Get the ids of the templates `user` has any of `perms` for, possibly cached
+
+    Only object permissions count, not global ones.
+    """
+    perms = sorted(perms)
+    key = f'easydmp:dmpt:template-perms:{_get_version()}:{user.pk}:{",".join(perms)}'
+    template_ids = cache.get(key)
+    if template_ids is None:
+        Template = apps.get_model('dmpt', 'Template')
+        template_ids = frozenset(
+            get_objects_for_user(
+                user,
+                perms,
+                klass=Template,
+                any_perm=True,
+                accept_global_perms=False,
+            ).values_list('pk', flat=True)
+        )
+        cache.set(key, template_ids, _get_timeout())
+    return template_ids
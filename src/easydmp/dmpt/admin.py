@@ -14,7 +14,7 @@ from django.http import Http404
 from django.urls import reverse, path
 from django.utils.html import format_html, mark_safe
 
-from guardian.shortcuts import get_objects_for_user, assign_perm
+from guardian.shortcuts import assign_perm
 
 from easydmp.auth.utils import set_user_object_permissions
 from easydmp.eestore.models import EEStoreMount
@@ -29,6 +29,7 @@ from easydmp.lib.admin import ObjectPermissionModelAdmin
 from easydmp.lib.admin import SetObjectPermissionModelAdmin
 from easydmp.lib import get_model_name
 
+from .access import get_permitted_template_ids
 from .import_template import deserialize_template_export
 from .import_template import import_or_get_template
 from .import_template import TemplateImportError
@@ -58,13 +59,8 @@ def get_templates_for_user(user, verbs=None):
         if verb not in good_verbs:
             verb = 'change'
         permission_set.add(f'dmpt.{verb}_template')
-    templates = get_objects_for_user(
-        user,
-        permission_set,
-        any_perm=True,
-        accept_global_perms=False,
-    )
-    return templates
+    template_ids = get_permitted_template_ids(user, permission_set)
+    return Template.objects.filter(pk__in=template_ids)
 
 
 def get_sections_for_user(user, verbs=None):
@@ -6,6 +6,7 @@ from easydmp.dmpt.models import Section
 from easydmp.dmpt.models import Question
 from easydmp.dmpt.models import CannedAnswer
 from easydmp.dmpt.models import ExplicitBranch
+from easydmp.dmpt.schema import get_answer_schema
 
 
 __all__ = [
@@ -120,12 +121,7 @@ class HeavyQuestionSerializer(LightQuestionSerializer):
 
     @extend_schema_field(dict)
     def get_answer_schema(self, obj):
-        form_class = obj.get_form_class()
-        if not form_class:
-            return {}
-        boundform = form_class(question=obj)
-        serialized_form = boundform.serialize_form()
-        return serialized_form
+        return get_answer_schema(obj)
 
 
 class CannedAnswerSerializer(serializers.HyperlinkedModelSerializer):
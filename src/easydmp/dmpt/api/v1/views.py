@@ -36,11 +36,11 @@ class SectionViewSet(AnonReadOnlyModelViewSet):
 
     @action(detail=True, methods=['get'], renderer_classes=_formats.values())
     def graph(self, request, pk=None, format=None):
-        if format not in self._formats:
-            format = 'pdf'
+        # The renderer picked by content negotiation decides the format
+        format = request.accepted_renderer.format
         section = self.get_object()
-        dotsource = section.generate_dotsource(debug=True)
-        return Response(dotsource)
+        graph = section.render_graph(format, debug=True)
+        return Response(graph)
 
 
 class QuestionViewSet(AnonReadOnlyModelViewSet):
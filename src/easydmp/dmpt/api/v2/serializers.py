@@ -10,6 +10,7 @@ from ...models import Section
 from ...models import Question
 from ...models import CannedAnswer
 from ...models import ExplicitBranch
+from ...schema import get_answer_schema
 
 
 __all__ = [
@@ -139,12 +140,7 @@ class HeavyQuestionSerializer(LightQuestionSerializer):
 
     @extend_schema_field(dict)
     def get_answer_schema(self, obj):
-        form_class = obj.get_form_class()
-        if not form_class:
-            return {}
-        boundform = form_class(question=obj)
-        serialized_form = boundform.serialize_form()
-        return serialized_form
+        return get_answer_schema(obj)
 
 
 class CannedAnswerSerializer(SelfHyperlinkedModelSerializer):
@@ -173,3 +169,27 @@ class ExplicitBranchSerializer(SelfHyperlinkedModelSerializer):
             'condition',
             'next_question',
         ]
+
+
+# The request body is not limited in size
+MAX_VALIDATED_ANSWERSETS = 10_000
+
+
+class AnswerSetDataSerializer(serializers.Serializer):
+    section = serializers.IntegerField()
+    # Not a DictField, which is slow on thousands of answersets
+    data = serializers.JSONField()
+    skipped = serializers.BooleanField(default=False)
+
+    def validate_data(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('Expected a dictionary of answers')
+        return value
+
+
+class BulkValidationSerializer(serializers.Serializer):
+    answersets = AnswerSetDataSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=MAX_VALIDATED_ANSWERSETS,
+    )
@@ -1,9 +1,13 @@
 from django.db import IntegrityError
 
+from django_filters.rest_framework import BooleanFilter
+from django_filters.rest_framework.filterset import FilterSet
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework import parsers, status
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
@@ -15,9 +19,10 @@ from easydmp.lib.api.renderers import DotPNGRenderer
 from easydmp.lib.api.renderers import DotSVGRenderer
 from easydmp.lib.api.response_exceptions import DRFIntegrityError
 from easydmp.lib.api.serializers import URLSerializer
-from easydmp.lib.api.viewsets import AnonReadOnlyModelViewSet
+from easydmp.lib.api.viewsets import AnonReadOnlyModelViewSet, StreamingListMixin
 from easydmp.lib.import_export import get_export_from_url
 
+from easydmp.dmpt.errors import UnknownSectionError
 from easydmp.dmpt.export_template import ExportSerializer, serialize_template_export
 from easydmp.dmpt.import_template import (
     deserialize_template_export,
@@ -31,6 +36,8 @@ from easydmp.dmpt.models import Section
 from easydmp.dmpt.models import Question
 from easydmp.dmpt.models import CannedAnswer
 from easydmp.dmpt.models import ExplicitBranch
+from easydmp.dmpt.schema import get_template_schema
+from easydmp.dmpt.validation import validate_answersets
 from . import serializers
 
 
@@ -76,8 +83,27 @@ def _import_template(request, export_dict):
         raise ValidationError(**errormsg)
 
 
+class TemplateFilter(FilterSet):
+    usable = BooleanFilter(method='filter_usable', label='Only templates the user may use for new plans')
+
+    class Meta:
+        model = Template
+        fields = []
+
+    def filter_usable(self, queryset, name, value):
+        user = self.request.user
+        if not user.is_authenticated:
+            usable = queryset.publicly_available()
+        else:
+            usable = queryset.has_access(user)
+        if value:
+            return usable
+        return queryset.exclude(pk__in=usable.values('pk'))
+
+
 class TemplateViewSet(AnonReadOnlyModelViewSet):
     queryset = Template.objects.all()
+    filterset_class = TemplateFilter
     serializer_class = serializers.TemplateSerializer
     search_fields = ['title']
 
@@ -87,6 +113,35 @@ class TemplateViewSet(AnonReadOnlyModelViewSet):
         serializer = serialize_template_export(pk)
         return Response(data=serializer.data)
 
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    # "schema" is taken by APIView
+    @action(detail=True, methods=['get'], renderer_classes=[JSONRenderer], url_path='schema', url_name='schema')
+    def answer_schema(self, request, pk=None):
+        "JSON Schema for the answers of a plan using this template"
+        template = self.get_object()
+        schema = dict(get_template_schema(template))
+        schema['$id'] = request.build_absolute_uri()
+        return Response(data=schema)
+
+    @extend_schema(request=serializers.BulkValidationSerializer, responses=OpenApiTypes.OBJECT)
+    @action(detail=True, methods=['post'], serializer_class=serializers.BulkValidationSerializer, parser_classes=[parsers.JSONParser], permission_classes=[IsAuthenticated], renderer_classes=[JSONRenderer])
+    def validate(self, request, pk=None):
+        "Validate answersets for this template, nothing is stored"
+        template = self.get_object()
+        serializer = serializers.BulkValidationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        answersets = serializer.validated_data['answersets']
+        try:
+            result = validate_answersets(template, answersets)
+        except UnknownSectionError as e:
+            sections = ', '.join(str(pk) for pk in e.args[0])
+            errormsg = {
+                'detail': f'Section(s) {sections} not in template {template.pk}',
+                'code': 'invalid_section',
+            }
+            raise ValidationError(**errormsg)
+        return Response(data=result)
+
     @extend_schema(request=ExportSerializer, responses=serializers.TemplateSerializer)
     @action(detail=False, methods=['post'], serializer_class=ExportSerializer, parser_classes=[parsers.JSONParser], url_path='import', url_name='template-import-json')
     def import_via_json_post(self, request):
@@ -136,14 +191,14 @@ class SectionViewSet(AnonReadOnlyModelViewSet):
 
     @action(detail=True, methods=['get'], renderer_classes=_formats.values())
     def graph(self, request, pk=None, format=None):
-        if format not in self._formats:
-            format = 'pdf'
+        # The renderer picked by content negotiation decides the format
+        format = request.accepted_renderer.format
         section = self.get_object()
-        dotsource = section.generate_dotsource(debug=True)
-        return Response(dotsource)
+        graph = section.render_graph(format, debug=True)
+        return Response(graph)
 
 
-class QuestionViewSet(AnonReadOnlyModelViewSet):
+class QuestionViewSet(StreamingListMixin, AnonReadOnlyModelViewSet):
     queryset = Question.objects.select_related('section', 'section__template')
     filterset_fields = ['input_type', 'on_trunk', 'optional', 'section',
                         'section__template']
@@ -157,7 +212,7 @@ class QuestionViewSet(AnonReadOnlyModelViewSet):
         return serializers.LightQuestionSerializer
 
 
-class CannedAnswerViewSet(AnonReadOnlyModelViewSet):
+class CannedAnswerViewSet(StreamingListMixin, AnonReadOnlyModelViewSet):
     queryset = CannedAnswer.objects.all()
     serializer_class = serializers.CannedAnswerSerializer
     filter_fields = ['question', 'question__input_type', 'question__section',
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class EasyDMPDMPTConfig(AppConfig):
     name = 'easydmp.dmpt'
     verbose_name = 'EasyDMP Template'
+
+    def ready(self):
+        import easydmp.dmpt.signals
@@ -0,0 +1,205 @@
+"""Precomputed facts about read-only templates
+
+A published template can no longer be changed, so everything that can be
+derived from its sections and questions alone only needs to be computed
+once. `compile_template` validates the branching of every section and finds
+its paths, which questions are on the trunk or in a branch, which are
+reachable and some metadata for each question. The result is stored in
+`CompiledTemplate`, versioned by `Template.modified` at the time of
+compilation.
+
+Artifacts are only written by `store_template_artifact`, which is run by
+`Template.save` and the `compile_templates` management command. Use
+`get_template_artifact` to read them. It never compiles, and returns None for
+templates that may still change and for templates whose artifact is missing
+or out of date, in which case everything must be computed from the models.
+"""
+
+from collections import OrderedDict
+import logging
+import threading
+
+from django.apps import apps
+
+from .flow import flatten
+from .flow import find_complete_paths, find_cycle_nodes, find_reachable_nodes
+from .flow import find_isolated_nodes, find_start_nodes, is_valid_graph_format
+
+
+__all__ = [
+    'ARTIFACT_FORMAT',
+    'compile_section',
+    'compile_template',
+    'store_template_artifact',
+    'get_template_artifact',
+    'get_section_artifact',
+    'clear_template_artifact_cache',
+]
+
+LOG = logging.getLogger(__name__)
+
+# Increase whenever the layout of the artifact changes
+ARTIFACT_FORMAT = 1
+CACHE_SIZE = 128
+
+_CACHE = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+def _get_section_graph(section, question_ids):
+    graph = {pk: set() for pk in question_ids}
+    transition_map = section.generate_transition_map()
+    for transition in transition_map.transitions:
+        graph.setdefault(transition.current, set()).add(transition.next)
+    return graph
+
+
+def compile_section(section, questions):
+    """Compile the branching of <section>
+
+    <questions> are all the questions of the section in order.
+    """
+    question_ids = [question.pk for question in questions]
+    trunk = [question.pk for question in questions if question.on_trunk]
+    compiled = {
+        'has_questions': bool(question_ids),
+        'start': question_ids[0] if question_ids else None,
+        'trunk': trunk,
+        'branch': [pk for pk in question_ids if pk not in trunk],
+        'paths': [],
+        'reachable': [],
+        'errors': [],
+        'valid': True,
+    }
+    if not question_ids:
+        return compiled
+
+    start = compiled['start']
+    graph = _get_section_graph(section, question_ids)
+    errors = compiled['errors']
+    # None marks the end of the section
+    if not is_valid_graph_format({**graph, None: set()}):
+        outside = set(flatten(graph.values())) - set(graph) - {None}
+        errors.append('Leads to questions outside the section: {}'.format(sorted(outside)))
+    extra_starts = find_start_nodes(graph) - {start}
+    if extra_starts:
+        errors.append('Not the target of any question: {}'.format(sorted(extra_starts)))
+    dead_ends = find_isolated_nodes(graph)
+    if dead_ends:
+        errors.append('Does not lead anywhere: {}'.format(sorted(dead_ends)))
+    cycles = find_cycle_nodes(graph)
+    if cycles:
+        errors.append('Part of a loop: {}'.format(sorted(cycles)))
+    reachable = find_reachable_nodes(graph, start) - {None}
+    compiled['reachable'] = [pk for pk in question_ids if pk in reachable]
+    unreachable = set(question_ids) - reachable
+    if unreachable:
+        errors.append('Cannot be reached: {}'.format(sorted(unreachable)))
+    compiled['paths'] = [list(path) for path in find_complete_paths(graph, start)]
+    compiled['valid'] = not errors
+    return compiled
+
+
+def compile_template(template):
+    "Compile all sections and questions of <template> into a JSON-able dict"
+    Question = apps.get_model('dmpt', 'Question')
+    questions = list(
+        Question.objects
+        .filter(section__template=template)
+        .select_related('input_type')
+        .order_by('position', 'pk')
+    )
+    questions_by_section = {}
+    for question in questions:
+        questions_by_section.setdefault(question.section_id, []).append(question)
+    sections = {}
+    for section in template.sections.order_by('position', 'pk'):
+        compiled = compile_section(section, questions_by_section.get(section.pk, []))
+        if not compiled['valid']:
+            LOG.warning('Template %s, section %s has an invalid branching graph: %s',
+                        template.pk, section.pk, '; '.join(compiled['errors']))
+        sections[str(section.pk)] = compiled
+    return {
+        'valid': all(section['valid'] for section in sections.values()),
+        'sections': sections,
+        'questions': {
+            str(question.pk): {
+                'section': question.section_id,
+                'input_type': question.input_type_id,
+                'position': question.position,
+                'on_trunk': question.on_trunk,
+                'optional': question.optional,
+                'branching_possible': question.branching_possible,
+                'has_notes': question.has_notes,
+            }
+            for question in questions
+        },
+    }
+
+
+def _cache_artifact(template_id, version, data):
+    with _CACHE_LOCK:
+        _CACHE[template_id] = (version, data)
+        _CACHE.move_to_end(template_id)
+        while len(_CACHE) > CACHE_SIZE:
+            _CACHE.popitem(last=False)
+
+
+def store_template_artifact(template):
+    "Compile <template> and store the result"
+    CompiledTemplate = apps.get_model('dmpt', 'CompiledTemplate')
+    data = compile_template(template)
+    CompiledTemplate.objects.update_or_create(
+        template=template,
+        defaults={
+            'version': template.modified,
+            'format': ARTIFACT_FORMAT,
+            'data': data,
+        },
+    )
+    _cache_artifact(template.pk, template.modified, data)
+    return data
+
+
+def get_template_artifact(template):
+    """Get the compiled artifact of <template>, if it is read-only
+
+    Returns None if the template can still change or has not been compiled
+    since it was last changed.
+    """
+    version = template.modified
+    if template.pk is None or version is None:
+        return None
+    with _CACHE_LOCK:
+        cached = _CACHE.get(template.pk)
+        if cached is not None and cached[0] == version:
+            _CACHE.move_to_end(template.pk)
+            return cached[1]
+    data = None
+    if template.is_readonly:
+        CompiledTemplate = apps.get_model('dmpt', 'CompiledTemplate')
+        data = (
+            CompiledTemplate.objects
+            .filter(template=template, version=version, format=ARTIFACT_FORMAT)
+            .values_list('data', flat=True)
+            .first()
+        )
+        if data is None:
+            # Not compiled yet, look again next time
+            return None
+    # Editable templates are cached as None, they get a new version on change
+    _cache_artifact(template.pk, version, data)
+    return data
+
+
+def get_section_artifact(section):
+    "Get the compiled part of the artifact for <section>, or None"
+    artifact = get_template_artifact(section.template)
+    if artifact is None:
+        return None
+    return artifact['sections'].get(str(section.pk))
+
+
+def clear_template_artifact_cache():
+    with _CACHE_LOCK:
+        _CACHE.clear()
@@ -4,3 +4,7 @@ class TemplateError(Exception):
 
 class TemplateDesignError(TemplateError):
     pass
+
+
+class UnknownSectionError(TemplateError):
+    "A section is not in the template"
@@ -96,6 +96,44 @@ def dfs_paths(graph, start, end=None):
                 stack.append((next, path + [next]))
 
 
+def find_complete_paths(graph, start):
+    """Find all paths from <start> to the end, as tuples
+
+    The end is marked by a next node of None, which is not included.
+    """
+    paths = []
+    for path in dfs_paths(graph, start):
+        if not path[-1]:
+            path = path[:-1]
+        paths.append(tuple(path))
+    return paths
+
+
+def find_reachable_nodes(graph, start):
+    "Find all nodes that can be visited from <start>, including <start>"
+    reachable = set()
+    stack = [start]
+    while stack:
+        node = stack.pop()
+        if node in reachable:
+            continue
+        reachable.add(node)
+        stack.extend(graph.get(node, ()))
+    return reachable
+
+
+def find_cycle_nodes(graph):
+    "Find all nodes that lead back to themselves"
+    in_cycle = set()
+    for node in graph:
+        reachable = set()
+        for next in graph[node]:
+            reachable |= find_reachable_nodes(graph, next)
+        if node in reachable:
+            in_cycle.add(node)
+    return in_cycle
+
+
 def dfs_paths_from_to(graph, start, end=None):
     all_paths = dfs_paths(graph, start, end)
     if end is None:
@@ -208,7 +246,8 @@ class TransitionMap:
         transitions = self.get_transitions(start)
         if not transitions:
             return None
-        if not condition in transitions:
+        # Malformed answers may be unhashable
+        if not isinstance(condition, Hashable) or condition not in transitions:
             condition = None
         body = transitions.get(condition, None)
         if body is None:
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from easydmp.dmpt.compilation import store_template_artifact
+from easydmp.dmpt.models import Template
+
+
+class Command(BaseCommand):
+    help = "Precompute the branching and paths of read-only templates"
+
+    def add_arguments(self, parser):
+        parser.add_argument('-t', '--templates', nargs='+', type=int, default=[],
+                            help='Only compile the specific templates (id)')
+
+    def handle(self, *args, **options):
+        templates = Template.objects.exclude(locked=None)
+        if options['templates']:
+            templates = templates.filter(id__in=options['templates'])
+        num_invalid = 0
+        for template in templates:
+            artifact = store_template_artifact(template)
+            if not artifact['valid']:
+                num_invalid += 1
+                self.stderr.write(f'Template {template.pk} "{template}" has invalid branching')
+        self.stdout.write(f'{len(templates)} templates compiled, {num_invalid} invalid')
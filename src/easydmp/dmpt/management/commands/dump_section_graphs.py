@@ -1,6 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
+from pathlib import Path
+
 from django.core.management.base import BaseCommand, CommandError
 
 from easydmp.dmpt.models import Section
+from easydmp.lib.graphviz import get_graph_cache, render_dotsource_to_bytes
 
 
 class Command(BaseCommand):
@@ -28,6 +33,10 @@ class Command(BaseCommand):
                                     help='Generate for all sections',
                                     dest='all_sections',
                                     )
+        parser.add_argument('-j', '--jobs', type=int, default=min(4, os.cpu_count() or 1),
+                            help='Number of graphs to render at the same time')
+        parser.add_argument('-o', '--output-directory', default='.',
+                            help='Write the graphs here')
 
     def handle(self, *args, **options):
         formats = options['formats']
@@ -45,8 +54,50 @@ class Command(BaseCommand):
             # raise error
             return
 
-        root_directory = '.'
-        for format in formats:
-            for s in sections:
-                filename = s.get_dotsource_filename()
-                s.render_dotsource_to_file(format, filename, root_directory=root_directory, debug=debug)
+        root_directory = Path(options['output_directory'])
+        root_directory.mkdir(mode=0o755, parents=True, exist_ok=True)
+        cache = get_graph_cache()
+        jobs = []
+        num_cached = 0
+        for section in sections.select_related('template'):
+            name = section.get_graph_name(debug)
+            version = section.get_graph_version()
+            dotsource = None
+            for format in formats:
+                path = root_directory / section.get_dotsource_filename(format)
+                graph = cache.get(name, version, format) if version else None
+                if graph is not None:
+                    path.write_bytes(graph)
+                    num_cached += 1
+                    continue
+                # The dotsource needs the database so is made here, only
+                # graphviz is run in parallel
+                if dotsource is None:
+                    dotsource = section.generate_dotsource(debug=debug)
+                jobs.append((name, version, format, dotsource, path))
+
+        errors = 0
+        with ThreadPoolExecutor(max_workers=max(1, options['jobs'])) as pool:
+            futures = {
+                pool.submit(self.render, cache, *job): job[-1]
+                for job in jobs
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    errors += 1
+                    self.stderr.write(f'Could not render {futures[future]}: {e}')
+        self.stdout.write(
+            f'{len(jobs) - errors} graphs rendered, {num_cached} from cache'
+        )
+        if errors:
+            raise CommandError(f'{errors} graphs could not be rendered')
+
+    @staticmethod
+    def render(cache, name, version, format, dotsource, path):
+        "Run graphviz, store the result in the cache and in <path>"
+        graph = render_dotsource_to_bytes(format, dotsource)
+        if version is not None:
+            cache.set(name, version, format, graph)
+        path.write_bytes(graph)
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-18 22:11
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dmpt', '0015_remove_toggle_questions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompiledTemplate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.DateTimeField(help_text='The "modified" of the template when compiled')),
+                ('format', models.PositiveSmallIntegerField()),
+                ('compiled', models.DateTimeField(auto_now=True)),
+                ('data', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('template', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='compiled', to='dmpt.template')),
+            ],
+        ),
+    ]
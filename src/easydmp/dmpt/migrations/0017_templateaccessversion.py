@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-18 22:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dmpt', '0016_compiledtemplate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TemplateAccessVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
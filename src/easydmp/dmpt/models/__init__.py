@@ -5,11 +5,13 @@ from django.utils.module_loading import import_string as _import_string
 
 from .base import (
     CannedAnswer,
+    CompiledTemplate,
     ExplicitBranch,
     Question,
     QuestionType,
     Section,
     Template,
+    TemplateAccessVersion,
     TemplateGroupObjectPermission,
     TemplateImportMetadata,
     TemplateQuerySet,
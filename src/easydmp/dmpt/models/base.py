@@ -7,7 +7,6 @@ from uuid import uuid4
 import logging
 import socket
 
-import graphviz as gv  # noqa
 from guardian.models import UserObjectPermissionBase
 from guardian.models import GroupObjectPermissionBase
 from guardian.shortcuts import get_objects_for_user, assign_perm
@@ -18,23 +17,30 @@ from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.db import transaction
 from django.db.models import Exists, OuterRef
+from django.db.models.query import ModelIterable
 from django.forms import model_to_dict
 from django.utils.encoding import force_str
 from django.utils.functional import cached_property
 from django.utils.safestring import mark_safe
 from django.utils.timezone import now as tznow
 
-from ..flow import Transition, TransitionMap, dfs_paths
+from ..access import get_accessible_template_ids
+from ..compilation import get_section_artifact, get_template_artifact
+from ..compilation import store_template_artifact
+from ..flow import Transition, TransitionMap, find_complete_paths
 from ..typing import AnswerChoice, Data, PathTuple, AnswerStruct
 from ..utils import DeletionMixin
+from ..validation import SectionValidator
 from ..utils import PositionUtils
 from ..utils import _reorder_dependent_models
 from ..utils import SectionPositionUtils
 from ..positioning import get_new_index, flat_reorder
+from ..structure import get_template_structure, touch_template
 
 from easydmp.eestore.models import EEStoreMount
 from easydmp.dmpt.utils import make_qid
 from easydmp.lib.graphviz import _prep_dotsource, view_dotsource, render_dotsource_to_file, render_dotsource_to_bytes
+from easydmp.lib.graphviz import get_graph_cache
 from easydmp.lib.import_export import get_origin
 from easydmp.lib.models import ModifiedTimestampModel, ClonableModel
 
@@ -177,9 +183,7 @@ class TemplateQuerySet(models.QuerySet):
     def has_access(self, user):
         if user.has_superpowers:
             return self.all()
-        guardian_access = get_objects_for_user(user, 'dmpt.use_template')
-        qs = self.publicly_available().distinct() | guardian_access.distinct()
-        return qs.distinct()
+        return self.filter(pk__in=get_accessible_template_ids(user))
 
     def has_change_access(self, user):
         return get_objects_for_user(
@@ -237,6 +241,9 @@ class Template(DeletionMixin, ModifiedTimestampModel, ClonableModel):
         if self.published:
             self.locked = self.published
         super().save(*args, **kwargs)
+        # Read-only from now on, so precompute what can be
+        if self.is_readonly:
+            store_template_artifact(self)
 
     @property
     def is_empty(self):
@@ -326,6 +333,11 @@ class Template(DeletionMixin, ModifiedTimestampModel, ClonableModel):
     def questions(self):
         return Question.objects.filter(section__template=self)
 
+    @property
+    def structure(self):
+        "A cached snapshot of the sections and questions"
+        return get_template_structure(self)
+
     @property
     def first_section(self):
         return Section.objects.filter(template=self).order_by('position')[0]
@@ -350,12 +362,12 @@ class Template(DeletionMixin, ModifiedTimestampModel, ClonableModel):
     def ordered_sections(self) -> list:
         "Order sections with subsections in a flat list"
 
-        result = SectionPositionUtils.ordered_template_sections(self)
-        return result
+        pks = self.structure.ordered_section_pks
+        sections = self.sections.in_bulk(pks)
+        return [sections[pk] for pk in pks]
 
     def ordered_section_pks(self) -> list:
-        sections = self.ordered_sections()
-        return [obj.pk for obj in sections]
+        return list(self.structure.ordered_section_pks)
 
     def get_section_order(self):
         "Get a list of the pk's of topmost sections, in order"
@@ -368,6 +380,7 @@ class Template(DeletionMixin, ModifiedTimestampModel, ClonableModel):
     def set_section_order(self, pk_list):
         queryset = self.sections.all()
         SectionPositionUtils.set_order(queryset, pk_list)
+        touch_template(self.pk)
 
     def reorder_sections(self, pk, movement):
         # Find immediate new location
@@ -491,6 +504,33 @@ class TemplateGroupObjectPermission(GroupObjectPermissionBase):
                                        related_name='permissions_group')
 
 
+class TemplateAccessVersion(models.Model):
+    """Bumped whenever who may use which templates changes, see dmpt.access
+
+    There is only one row. Being in the database, every process sees the
+    same version.
+    """
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return str(self.version)
+
+
+class CompiledTemplate(models.Model):
+    "Precomputed facts about a read-only template, see dmpt.compilation"
+    template = models.OneToOneField(Template, on_delete=models.CASCADE,
+                                    related_name='compiled')
+    version = models.DateTimeField(
+        help_text='The "modified" of the template when compiled',
+    )
+    format = models.PositiveSmallIntegerField()
+    compiled = models.DateTimeField(auto_now=True)
+    data = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    def __str__(self):
+        return f'{self.template} @ {self.version}'
+
+
 class TemplateImportMetadata(ClonableModel):
     DEFAULT_VIA = 'CLI'
 
@@ -818,11 +858,18 @@ class Section(DeletionMixin, ModifiedTimestampModel, ClonableModel):
     def set_question_order(self, pk_list):
         qs = self.questions.all()
         PositionUtils.set_order(qs, pk_list)
+        touch_template(self.template_id)
 
     def reorder_questions(self, pk, movement):
         _reorder_dependent_models(pk, movement, self.get_question_order,
                                   self.set_question_order)
 
+    def move_questions(self, moves):
+        "Apply a batch of (pk, Move) movements to the questions at once"
+        new_order = PositionUtils.move(self.questions.all(), moves)
+        touch_template(self.template_id)
+        return new_order
+
     def renumber_question_positions(self):
         """Renumber question positions so that all are adajcent
 
@@ -856,6 +903,11 @@ class Section(DeletionMixin, ModifiedTimestampModel, ClonableModel):
 
         First questions are always on_trunk and always safe to jump to.
         """
+        artifact = self.get_artifact()
+        if artifact is not None:
+            if artifact['start'] is None:
+                return None
+            return self.questions.get(pk=artifact['start'])
         try:
             return self.questions.order_by('position').first()
         except Question.DoesNotExist:
@@ -864,6 +916,9 @@ class Section(DeletionMixin, ModifiedTimestampModel, ClonableModel):
 
     @cached_property
     def has_questions(self):
+        artifact = self.get_artifact()
+        if artifact is not None:
+            return artifact['has_questions']
         return self.questions.exists()
 
     @property
@@ -885,11 +940,21 @@ class Section(DeletionMixin, ModifiedTimestampModel, ClonableModel):
         since that might be a question in a branch (not on_trunk), which an
         end-user might not ever visit due to branching.
         """
+        artifact = self.get_artifact()
+        if artifact is not None:
+            if not artifact['trunk']:
+                return None
+            return self.questions.get(pk=artifact['trunk'][-1])
         qs = self.questions.filter(on_trunk=True)
         if qs.exists():
             return qs.order_by('-position')[0]
         return None
 
+    def _get_section_from_structure(self, pk):
+        if pk is None:
+            return None
+        return Section.objects.get(pk=pk)
+
     def get_all_next_sections(self):
         return Section.objects.filter(template=self.template,
                                       position__gt=self.position)
@@ -900,10 +965,9 @@ class Section(DeletionMixin, ModifiedTimestampModel, ClonableModel):
         This method is here for completeness. It is usually better to use
         `get_next_nonempty_section` since that must be visited in any case.
         """
-        next_sections = self.get_all_next_sections().order_by('position')
-        if next_sections.exists():
-            return next_sections.first()
-        return None
+        return self._get_section_from_structure(
+            self.template.structure.get_next_section_pk(self.pk)
+        )
 
     def get_next_nonempty_section(self):
         """Get the next nonempty section after *this* one
@@ -911,12 +975,9 @@ class Section(DeletionMixin, ModifiedTimestampModel, ClonableModel):
         This is a better section to jump to than `get_next_section` since it
         always contains questions and must eventually be visited anyway.
         """
-        next_sections = (self.get_all_next_sections()
-                         .filter(questions__isnull=False)
-                         .order_by('position'))
-        if next_sections.exists():
-            return next_sections.first()
-        return None
+        return self._get_section_from_structure(
+            self.template.structure.get_next_section_pk(self.pk, nonempty=True)
+        )
 
     def get_all_prev_sections(self):
         return Section.objects.filter(template=self.template,
@@ -928,10 +989,9 @@ class Section(DeletionMixin, ModifiedTimestampModel, ClonableModel):
         This method is here for completeness. It is usually better to use
         `get_prev_nonempty_section` since that must be visited in any case.
         """
-        prev_sections = self.get_all_prev_sections().order_by('-position')
-        if prev_sections.exists():
-            return prev_sections[0]
-        return None
+        return self._get_section_from_structure(
+            self.template.structure.get_prev_section_pk(self.pk)
+        )
 
     def get_prev_nonempty_section(self):
         """Get the prevous nonempty section before *this* one
@@ -939,12 +999,9 @@ class Section(DeletionMixin, ModifiedTimestampModel, ClonableModel):
         This is a better section to jump to than `get_prev_section` since it
         always contains questions and must eventually be visited anyway.
         """
-        prev_sections = (self.get_all_prev_sections()
-                         .filter(questions__isnull=False)
-                         .order_by('-position'))
-        if prev_sections.exists():
-            return prev_sections[0]
-        return None
+        return self._get_section_from_structure(
+            self.template.structure.get_prev_section_pk(self.pk, nonempty=True)
+        )
 
     def get_first_question_in_next_section(self):
         """Get first question in *the next nonempty* section
@@ -1001,10 +1058,11 @@ class Section(DeletionMixin, ModifiedTimestampModel, ClonableModel):
         return None
 
     def get_topmost_section(self):
-        obj = self
-        while obj.super_section is not None:
-            obj = obj.super_section
-        return obj
+        if self.super_section_id is None:
+            return self
+        return self._get_section_from_structure(
+            self.template.structure.get_topmost_section_pk(self.pk)
+        )
 
     def get_answered_questions(self, answers):
         return get_answered_questions(self.questions.all(), answers)
@@ -1031,6 +1089,12 @@ class Section(DeletionMixin, ModifiedTimestampModel, ClonableModel):
         return self.questions.filter(on_trunk=True)
 
     def _get_last_answered_on_trunk_question(self, answers):
+        artifact = self.get_artifact()
+        if artifact is not None:
+            answered = [pk for pk in artifact['trunk'] if str(pk) in answers]
+            if not answered:
+                return None
+            return Question.objects.get(pk=answered[-1])
         qs_on_trunk = self.get_on_trunk_questions()
         if not qs_on_trunk.exists():
             # Empty section, so no on_trunk questions
@@ -1063,12 +1127,19 @@ class Section(DeletionMixin, ModifiedTimestampModel, ClonableModel):
         if not self.answersets.exists():  # Bug, but hard to ensure
             return True
         # No answersets have been answered
-        if self.answersets.filter(data={}).count() == self.answersets.count():
+        if self.answersets.without_data().count() == self.answersets.count():
             return True
         return False
 
-    def generate_canned_text(self, data: Data):
-        if self.is_skipped:
+    def generate_canned_text(self, data: Data, questions=None, is_skipped=None):
+        """Generate the canned text of the answers in data
+
+        Pass in the ordered `questions` and the result of `is_skipped` to
+        avoid looking them up for every answerset.
+        """
+        if is_skipped is None:
+            is_skipped = self.is_skipped
+        if is_skipped:
             if not self.optional_canned_text:
                 return []
             return [{'text': self.optional_canned_text, 'skipped': True}]
@@ -1077,7 +1148,8 @@ class Section(DeletionMixin, ModifiedTimestampModel, ClonableModel):
             return []
 
         texts = []
-        questions = self.questions.order_by('position')
+        if questions is None:
+            questions = self.questions.order_by('position').typed()
         for question in questions:
             answer = question.get_instance().generate_canned_text(data)
             if not isinstance(answer.get('text', ''), bool):
@@ -1119,32 +1191,18 @@ class Section(DeletionMixin, ModifiedTimestampModel, ClonableModel):
             question = question.get_next_question(data, in_section=True)
         return tuple(int(qid) for qid in path)
 
+    @cached_property
+    def validator(self):
+        return SectionValidator(self)
+
     def find_validity_of_questions(self, data: Dict) -> Tuple[Set[int], Set[int]]:
         """
         The sets of pks of Questions for which the given answer data is valid/invalid.
         """
-        questions = self.questions.all()
-        valids = set(questions.filter(optional=True).values_list('pk', flat=True))
-        if not data:
-            invalids = questions.filter(optional=False)
-            return (valids, set(invalids.values_list('pk', flat=True)))
-        invalids = set()
-        for question in questions:
-            question = question.get_instance()
-            try:
-                valid = question.validate_data(data)
-            except AttributeError:
-                valid = False
-                if question.optional:
-                    valid = True
-            if valid:
-                valids.add(question.pk)
-            else:
-                invalids.add(question.pk)
-        return (valids, invalids)
+        return self.validator.validate(data)
 
     def validate_data(self, data, question_validity_status=()):
-        if not self.questions.exists():
+        if not self.has_questions:
             return True
         if not data:
             return False
@@ -1178,23 +1236,25 @@ class Section(DeletionMixin, ModifiedTimestampModel, ClonableModel):
     def find_minimal_path(self, data: Data=None):
         minimal_qs = self.questions.filter(on_trunk=True).order_by('position')
         if not data:
-            return list(minimal_qs)
+            return list(minimal_qs.typed())
         answered_pks = [int(pk) for pk in data.keys()]
         answered_qs = self.questions.filter(pk__in=answered_pks)
         qs = minimal_qs | answered_qs
-        return list(qs.distinct().order_by('position'))
+        return list(qs.distinct().order_by('position').typed())
+
+    def get_artifact(self):
+        "Get the precomputed facts about this section, if read-only"
+        return get_section_artifact(self)
 
     def find_all_paths(self) -> List[PathTuple]:
+        artifact = self.get_artifact()
+        if artifact is not None:
+            return [tuple(path) for path in artifact['paths']]
         tm = self.generate_transition_map()
         graph = {}
         for transition in tm.transitions:
             graph.setdefault(transition.current, set()).add(transition.next)
-        paths = []
-        for path in dfs_paths(graph, self.first_question.pk):
-            if not path[-1]:
-                path = path[:-1]
-            paths.append(tuple(path))
-        return paths
+        return find_complete_paths(graph, self.first_question.pk)
 
     def generate_transition_map(self, pk=True, start=None, end=None):
         assert isinstance(start, (type(None), int, Question))
@@ -1220,7 +1280,7 @@ class Section(DeletionMixin, ModifiedTimestampModel, ClonableModel):
                 )
             for eb in ebs:
                 tm.add(eb.to_transition(pk=pk))
-        questions = self.questions.order_by('position')
+        questions = self.questions.order_by('position').typed()
         if start:
             questions = questions.filter(position__gte=start.position)
         if end:
@@ -1244,7 +1304,8 @@ class Section(DeletionMixin, ModifiedTimestampModel, ClonableModel):
     # Start Graphviz: generate graphs to show section branching
 
     def generate_dotsource(self, debug=False):
-        global gv
+        import graphviz as gv  # slow, and only needed here
+
         dot = gv.Digraph()
 
         tm = self.generate_transition_map()
@@ -1338,6 +1399,43 @@ class Section(DeletionMixin, ModifiedTimestampModel, ClonableModel):
     def get_dotsource_filename(self, format='pdf'):
         return 'section-{}.{}'.format(self.pk, format)
 
+    def get_graph_version(self):
+        """Get a string that changes whenever the graph might change
+
+        Any change to the questions, canned answers or explicit branches of a
+        template updates `Template.modified`.
+        """
+        modified = self.template.modified
+        if modified is None:
+            return None
+        return modified.strftime('%Y%m%dT%H%M%S%f')
+
+    def get_graph_name(self, debug=False):
+        name = 'section-{}'.format(self.pk)
+        if debug:
+            name += '-debug'
+        return name
+
+    def render_graph(self, format, debug=False, cache=None):
+        """Render the graph in <format>, reusing a cached copy if possible
+
+        Only renders (and runs graphviz) if the section has changed since
+        last time.
+        """
+        if cache is None:
+            cache = get_graph_cache()
+        name = self.get_graph_name(debug)
+        version = self.get_graph_version()
+        if version is not None:
+            graph = cache.get(name, version, format)
+            if graph is not None:
+                return graph
+        dotsource = self.generate_dotsource(debug=debug)
+        graph = render_dotsource_to_bytes(format, dotsource)
+        if version is not None:
+            cache.set(name, version, format, graph)
+        return graph
+
     # End Graphviz: generate graphs to show section branching
 
 
@@ -1452,6 +1550,31 @@ class QuestionType(models.Model):
         return self.id
 
 
+class TypedQuestionIterable(ModelIterable):
+    "Yield each question as the proxy model of its input type"
+
+    def __iter__(self):
+        input_types = Question.INPUT_TYPES
+        for question in super().__iter__():
+            input_type = input_types.get(question.input_type_id, None)
+            if input_type is not None and input_type.model is not None:
+                question.__class__ = input_type.model
+            yield question
+
+
+class QuestionQuerySet(models.QuerySet):
+
+    def typed(self):
+        """Yield questions of the right subtype
+
+        Saves calling `get_instance()` on every question afterwards.
+        """
+        qs = self._chain()
+        if qs._iterable_class is ModelIterable:
+            qs._iterable_class = TypedQuestionIterable
+        return qs
+
+
 class QuestionManager(models.Manager):
 
     def get_by_natural_key(self, section, position):
@@ -1464,7 +1587,8 @@ class Question(DeletionMixin, ClonableModel):
     Questions come in many subtypes, stored in `input_type`.
 
     To convert a question to its subtype, run `get_class()` for the class of an
-    instance and `get_instance()` for the instance itself.
+    instance and `get_instance()` for the instance itself. Querysets of
+    questions can be converted up front with `typed()`.
 
     If branching_possible is True:
 
@@ -1497,7 +1621,7 @@ class Question(DeletionMixin, ClonableModel):
     optional = models.BooleanField(default=False)
     optional_canned_text = models.TextField(blank=True)
 
-    objects = QuestionManager()
+    objects = QuestionManager.from_queryset(QuestionQuerySet)()
 
     class Meta:
         unique_together = ('section', 'position')
@@ -1578,7 +1702,9 @@ class Question(DeletionMixin, ClonableModel):
     # Start: re(ordering) canned answers
 
     def set_canned_answer_order(self, pk_list):
-        return PositionUtils.set_order(self.canned_answers, pk_list)
+        result = PositionUtils.set_order(self.canned_answers, pk_list)
+        touch_template(self.section.template_id)
+        return result
 
     def get_canned_answer_order(self):
         manager = self.canned_answers
@@ -1588,6 +1714,12 @@ class Question(DeletionMixin, ClonableModel):
         _reorder_dependent_models(pk, movement, self.get_canned_answer_order,
                                   self.set_canned_answer_order)
 
+    def move_canned_answers(self, moves):
+        "Apply a batch of (pk, Move) movements to the canned answers at once"
+        new_order = PositionUtils.move(self.canned_answers, moves)
+        touch_template(self.section.template_id)
+        return new_order
+
     def renumber_canned_answers_positions(self):
         """Renumber canned answer positions so that eg. (1, 2, 7, 12) becomes (1, 2, 3, 4)"""
         cas = self.canned_answers.order_by('position', 'pk')
@@ -1626,6 +1758,8 @@ class Question(DeletionMixin, ClonableModel):
 
         The subtype is stored in the attribute `input_type`
         """
+        if self._meta.proxy:  # Already converted
+            return self
         cls = self.get_class()
         self.__class__ = cls
         return self
@@ -1634,9 +1768,20 @@ class Question(DeletionMixin, ClonableModel):
         raise NotImplementedError
 
     def get_choices_keys(self):
+        keys = getattr(self, '_choices_keys', None)
+        if keys is not None:
+            return keys
         choices = self.get_choices()
         return [item[0] for item in choices]
 
+    def set_choices_keys(self, keys):
+        "Use precomputed <keys> instead of looking them up, see SectionValidator"
+        self._choices_keys = keys
+
+    def get_ordered_canned_answers(self):
+        "Get the canned answers in order, reusing prefetched ones"
+        return sorted(self.canned_answers.all(), key=lambda ca: (ca.position, ca.pk))
+
     def get_answer_choice(self, data: Data) -> AnswerChoice:
         choicedict = data.get(str(self.pk), {})
         return choicedict.get('choice', None)
@@ -1682,17 +1827,19 @@ class Question(DeletionMixin, ClonableModel):
         if not choice:
             return self.get_optional_canned_answer()
 
-        if not self.canned_answers.exists():
+        # One query, or none if prefetched
+        canned_answers = list(self.canned_answers.all())
+        if not canned_answers:
             return ''
 
-        if self.canned_answers.count() == 1:
-            return self.canned_answers.get().canned_text
+        if len(canned_answers) == 1:
+            return canned_answers[0].canned_text
 
         choice = self.get_instance()._serialize_condition(choice)
         if choice is not None:
-            canned = self.canned_answers.filter(choice=choice)
-            if canned:
-                return canned[0].canned_text or choice
+            for canned in canned_answers:
+                if canned.choice == choice:
+                    return canned.canned_text or choice
         return ''
 
     def pprint(self, value: AnswerStruct):
@@ -1723,7 +1870,7 @@ class Question(DeletionMixin, ClonableModel):
         return q.get_transition_choice(answer)
 
     def get_last_answered_question_in_section(self, answers=None):
-        if not self.section.questions.exists():
+        if not self.section.has_questions:
             return None
         last = self._get_last_answered_on_trunk_question(answers)
         if last:
@@ -1735,6 +1882,13 @@ class Question(DeletionMixin, ClonableModel):
         return bool(answer)
 
     def get_next_on_trunk(self):
+        artifact = get_template_artifact(self.section.template)
+        if artifact is not None:
+            trunk = artifact['sections'][str(self.section_id)]['trunk']
+            for pk in trunk:
+                if artifact['questions'][str(pk)]['position'] > self.position:
+                    return Question.objects.get(pk=pk)
+            return None
         qs = self.section.questions.filter(on_trunk=True,
                                            position__gt=self.position)
         if not qs.exists():
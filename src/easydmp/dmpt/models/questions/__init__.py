@@ -79,7 +79,7 @@ class ChoiceQuestion(ChoiceValidationMixin, SaveMixin, Question):
         return answer
 
     def get_choices(self):
-        choices = self.canned_answers.order().values_list('choice', 'canned_text')
+        choices = [(ca.choice, ca.canned_text) for ca in self.get_ordered_canned_answers()]
         fixed_choices = []
         for (k, v) in choices:
             if not v:
@@ -118,7 +118,7 @@ class MultipleChoiceOneTextQuestion(SaveMixin, Question):
         return pprint_list(value['choice'])
 
     def get_choices(self):
-        choices = tuple(self.canned_answers.order().values_list('choice', 'choice'))
+        choices = tuple((ca.choice, ca.choice) for ca in self.get_ordered_canned_answers())
         return choices
 
     def validate_choice(self, data):
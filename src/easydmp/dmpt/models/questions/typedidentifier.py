@@ -54,7 +54,7 @@ class TypedIdentifierQuestion(SaveMixin, Question):
 
     def get_choices(self):
         # ignores CannedAnswer.canned_text
-        choices = tuple(self.canned_answers.order().values_list('choice', 'choice'))
+        choices = tuple((ca.choice, ca.choice) for ca in self.get_ordered_canned_answers())
         return choices
 
     def get_identifier(self, answer):
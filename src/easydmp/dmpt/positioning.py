@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from enum import Enum
-from typing import List
+from typing import Any, Dict, Iterable, List, Tuple
 
 
 class Move(str, Enum):
@@ -40,3 +40,28 @@ def flat_reorder(order: list, value, new_index: int) -> list:
         return new_order
     new_order.insert(new_index, value)
     return new_order
+
+
+def batch_reorder(order: list, moves: Iterable[Tuple[Any, Move]]) -> list:
+    """Apply several movements to an order, in turn
+
+    Raises ValueError like `get_new_index` if any movement is impossible.
+    """
+    new_order = list(order)
+    for value, movement in moves:
+        new_index = get_new_index(movement, new_order, value)
+        new_order = flat_reorder(new_order, value, new_index)
+    return new_order
+
+
+def plan_positions(current: Dict[Any, int], order: list, start: int = 1) -> Dict[Any, int]:
+    """Find the positions that must change for `order` to be numbered from `start`
+
+    `current` maps each value to its current position. Returns a map of
+    only the values that need a new position.
+    """
+    return {
+        value: position
+        for position, value in enumerate(order, start)
+        if current.get(value) != position
+    }
@@ -0,0 +1,247 @@
+"""JSON Schemas for answers
+
+The answer schema of a question is made by instantiating its form, which for
+choice and EEStore questions loads all the choices. Schemas are therefore
+cached, keyed on the question or template and `Template.modified`, which
+changes whenever a section, question, canned answer or explicit branch of
+the template changes. EEStore entries may change on their own, so the cached
+schemas also expire after EASYDMP_ANSWER_SCHEMA_CACHE_TIMEOUT seconds.
+"""
+
+from copy import deepcopy
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+__all__ = [
+    'make_answer_schema',
+    'get_answer_schema',
+    'make_template_schema',
+    'get_template_schema',
+]
+
+JSON_SCHEMA_DIALECT = 'https://json-schema.org/draft/2020-12/schema'
+
+
+def _get_timeout():
+    return getattr(settings, 'EASYDMP_ANSWER_SCHEMA_CACHE_TIMEOUT', 60 * 60)
+
+
+def _get_version(template):
+    modified = template.modified
+    return modified.isoformat() if modified else 'new'
+
+
+def make_answer_schema(question):
+    "Serialize the form of <question>"
+    question = question.get_instance()
+    form_class = question.get_form_class()
+    if not form_class:
+        return {}
+    boundform = form_class(question=question)
+    return boundform.serialize_form()
+
+
+def get_answer_schema(question):
+    "Get the possibly cached answer schema of <question>"
+    version = _get_version(question.section.template)
+    key = f'easydmp:dmpt:answer-schema:{question.pk}:{version}'
+    schema = cache.get(key)
+    if schema is None:
+        schema = make_answer_schema(question)
+        cache.set(key, schema, _get_timeout())
+    return schema
+
+
+def _get_items(schema):
+    items = schema.get('items')
+    if isinstance(items, dict):
+        return items
+    # Some forms serialize "items" as a set of types
+    return {'type': 'string'}
+
+
+def _choice_to_json_schema(serialized_input):
+    "Convert the `input` of an answer schema to proper JSON Schema"
+    schema = deepcopy(dict(serialized_input))
+    choices = schema.pop('choices', None)
+    if choices:
+        keys = [str(choice[0]) for choice in choices]
+        if schema.get('type') == 'array':
+            schema['items'] = dict(_get_items(schema), enum=keys)
+        elif schema.get('type') == 'object':
+            # The choices are of the "choices" property, see for instance
+            # ExternalChoiceNotListedForm
+            properties = schema.setdefault('properties', {})
+            choices_schema = properties.get('choices', {})
+            if choices_schema.get('type') == 'array':
+                choices_schema = dict(choices_schema, items=dict(_get_items(choices_schema), enum=keys))
+            else:
+                choices_schema = dict(choices_schema, enum=keys)
+            if 'not-listed' in properties:
+                # Anything goes if the answer is not listed
+                schema.pop('required', None)
+                properties['choices'] = {}
+                schema['if'] = {
+                    'properties': {'not-listed': {'const': True}},
+                    'required': ['not-listed'],
+                }
+                schema['else'] = {
+                    'properties': {'choices': choices_schema},
+                    'required': ['choices'],
+                }
+            else:
+                properties['choices'] = choices_schema
+        else:
+            schema['enum'] = keys
+    return schema
+
+
+# What counts as empty in Python
+EMPTY_VALUES = (None, False, 0, '', [], {})
+
+
+def _accepts(question, answer):
+    "Whether <question> accepts <answer>, like `SectionValidator.validate`"
+    try:
+        return bool(question.validate_choice(answer))
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return question.optional
+
+
+def _question_to_json_schema(question, answer_schema):
+    """Make the JSON Schema of an answer to <question>
+
+    Whether empty answers are valid depends on the question type and on
+    whether the question is optional, so <question> is asked.
+    """
+    choice = answer_schema['choice']
+    notes = answer_schema['notes']
+    choice_schema = _choice_to_json_schema(choice['input'])
+    accepted, rejected = [], []
+    for value in EMPTY_VALUES:
+        # Not "value in accepted", as 0 == False
+        if _accepts(question, {'choice': value}):
+            accepted.append(value)
+        else:
+            rejected.append(value)
+    keys = choice_schema.get('enum')
+    if keys is not None:
+        # Nothing else can be valid anyway
+        rejected = [value for value in rejected if value in keys]
+    if rejected:
+        choice_schema = {'allOf': [choice_schema, {'not': {'enum': rejected}}]}
+    if accepted:
+        choice_schema = {'anyOf': [{'enum': accepted}, choice_schema]}
+    schema = {
+        'type': 'object',
+        'title': choice['label'],
+        'description': choice['help_text'],
+        'properties': {
+            'choice': choice_schema,
+            'notes': dict(notes['input'], title=notes['label']),
+        },
+    }
+    if not _accepts(question, {}):
+        schema['required'] = ['choice']
+    return schema
+
+
+def _get_required_questions(rules):
+    "Find the questions that must be answered in a section"
+    if not rules.branching:
+        return {question.pk for question in rules.questions if not question.optional}
+    # Every question on the path through the section must be answered
+    if not rules.paths:
+        return set()
+    return set.intersection(*(set(path) for path in rules.paths))
+
+
+def make_template_schema(template):
+    """Make a JSON Schema for the answers of a plan using <template>
+
+    The answers are given per section, as a list of answersets, each of
+    which maps question ids to answers. This is the same as
+    `AnswerSet.data`.
+
+    The schema follows `SectionValidator` as far as JSON Schema can.
+    Answersets of optional sections may be empty, since they may be
+    skipped. Which path is taken through a branching section is not
+    checked, only that the questions on every path are answered.
+    """
+    from .validation import get_template_validators
+
+    Question = template.questions.model
+    questions = (
+        Question.objects
+        .filter(section__template=template)
+        .select_related('section__template')
+        .prefetch_related('canned_answers')
+        .order_by('section__position', 'position')
+        .typed()
+    )
+    validators = get_template_validators(template)
+    # These know their choices without further queries
+    validating_questions = {
+        question.pk: question
+        for validator in validators.values()
+        for question in validator.questions
+    }
+    defs = {}
+    section_properties = {}
+    for question in questions:
+        answer_schema = get_answer_schema(question)
+        if not answer_schema:
+            continue
+        defs[f'question-{question.pk}'] = _question_to_json_schema(
+            validating_questions[question.pk], answer_schema,
+        )
+        section_properties.setdefault(question.section_id, {})[str(question.pk)] = {
+            '$ref': f'#/$defs/question-{question.pk}',
+        }
+    properties = {}
+    for section in template.ordered_sections():
+        question_properties = section_properties.get(section.pk, {})
+        section_schema = {
+            'type': 'object',
+            'title': section.full_title(),
+            'properties': question_properties,
+            'additionalProperties': False,
+        }
+        rules = validators[section.pk].rules
+        required = [
+            question_id for question_id in map(str, sorted(_get_required_questions(rules)))
+            if question_id in question_properties
+        ]
+        if rules.questions and not section.optional:
+            section_schema['minProperties'] = 1
+        if required:
+            if section.optional:
+                section_schema['if'] = {'minProperties': 1}
+                section_schema['then'] = {'required': required}
+            else:
+                section_schema['required'] = required
+        defs[f'section-{section.pk}'] = section_schema
+        properties[str(section.pk)] = {
+            'type': 'array',
+            'items': {'$ref': f'#/$defs/section-{section.pk}'},
+        }
+    return {
+        '$schema': JSON_SCHEMA_DIALECT,
+        'title': f'Answers for "{template.title_with_version}"',
+        'type': 'object',
+        'properties': properties,
+        'additionalProperties': False,
+        '$defs': defs,
+    }
+
+
+def get_template_schema(template):
+    "Get the possibly cached JSON Schema for the answers of <template>"
+    key = f'easydmp:dmpt:template-schema:{template.pk}:{_get_version(template)}'
+    schema = cache.get(key)
+    if schema is None:
+        schema = make_template_schema(template)
+        cache.set(key, schema, _get_timeout())
+    return schema
@@ -0,0 +1,96 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+from guardian.models import GroupObjectPermission, UserObjectPermission
+
+from .access import invalidate_template_access
+from .models import Section, Question, CannedAnswer, ExplicitBranch
+from .models import Template, TemplateGroupObjectPermission, TemplateUserObjectPermission
+from .structure import touch_template
+
+
+def _touch_template_of_question(question_id):
+    template_id = (
+        Question.objects
+        .filter(pk=question_id)
+        .values_list('section__template_id', flat=True)
+        .first()
+    )
+    if template_id is not None:
+        touch_template(template_id)
+
+
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Section)
+def invalidate_template_structure_on_section(sender, instance, raw=False, **kwargs):
+    if raw:  # loading fixtures
+        return
+    touch_template(instance.template_id)
+
+
+def invalidate_template_structure_on_question(sender, instance, raw=False, **kwargs):
+    if raw:  # loading fixtures
+        return
+    template_id = (
+        Section.objects
+        .filter(pk=instance.section_id)
+        .values_list('template_id', flat=True)
+        .first()
+    )
+    if template_id is not None:
+        touch_template(template_id)
+
+
+# Questions are saved as their typed proxy classes, which are senders of
+# their own
+for question_class in {Question} | {
+    input_type.model for input_type in Question.INPUT_TYPES.values()
+    if input_type.model is not None
+}:
+    post_save.connect(invalidate_template_structure_on_question, sender=question_class)
+    post_delete.connect(invalidate_template_structure_on_question, sender=question_class)
+
+
+# These change the section graphs
+
+@receiver(post_save, sender=CannedAnswer)
+@receiver(post_delete, sender=CannedAnswer)
+def invalidate_template_structure_on_canned_answer(sender, instance, raw=False, **kwargs):
+    if raw:  # loading fixtures
+        return
+    _touch_template_of_question(instance.question_id)
+
+
+@receiver(post_save, sender=ExplicitBranch)
+@receiver(post_delete, sender=ExplicitBranch)
+def invalidate_template_structure_on_branch(sender, instance, raw=False, **kwargs):
+    if raw:  # loading fixtures
+        return
+    _touch_template_of_question(instance.current_question_id)
+
+
+# Publishing, retiring and permission changes change who may use templates
+
+@receiver(post_save, sender=Template)
+@receiver(post_delete, sender=Template)
+@receiver(post_save, sender=TemplateUserObjectPermission)
+@receiver(post_delete, sender=TemplateUserObjectPermission)
+@receiver(post_save, sender=TemplateGroupObjectPermission)
+@receiver(post_delete, sender=TemplateGroupObjectPermission)
+@receiver(post_save, sender=UserObjectPermission)
+@receiver(post_delete, sender=UserObjectPermission)
+@receiver(post_save, sender=GroupObjectPermission)
+@receiver(post_delete, sender=GroupObjectPermission)
+def invalidate_template_access_on_change(sender, raw=False, **kwargs):
+    if raw:  # loading fixtures
+        return
+    invalidate_template_access()
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+@receiver(m2m_changed, sender=get_user_model().user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_template_access_on_membership(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_template_access()
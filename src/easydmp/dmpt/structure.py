@@ -0,0 +1,213 @@
+"""Snapshots of the structure of templates
+
+Finding the order of sections, their subsections and the first or last
+question of each costs many small queries when done via the models. A
+`TemplateStructure` holds all of it, is loaded with two queries and is cached
+in the process, keyed on the template and its `modified` timestamp.
+
+Saving or deleting a section or question updates `Template.modified` via
+`touch_template`, so every process will rebuild the snapshot on next use.
+"""
+
+from collections import OrderedDict, namedtuple
+import threading
+
+from django.apps import apps
+from django.utils.timezone import now as tznow
+
+
+__all__ = [
+    'SectionInfo',
+    'TemplateStructure',
+    'get_template_structure',
+    'touch_template',
+    'clear_template_structure_cache',
+]
+
+CACHE_SIZE = 128
+
+_CACHE = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+class SectionInfo(namedtuple('SectionInfo', [
+    'pk',
+    'label',
+    'title',
+    'position',
+    'section_depth',
+    'super_section_id',
+    'optional',
+    'repeatable',
+    'branching',
+    'subsection_ids',
+    'question_ids',
+    'on_trunk_question_ids',
+])):
+    "Read-only facts about a section, questions are in order of position"
+    __slots__ = ()
+
+    def full_title(self):
+        if self.label:
+            return '{} {}'.format(self.label, self.title)
+        return self.title
+
+    @property
+    def has_questions(self):
+        return bool(self.question_ids)
+
+    @property
+    def first_question_id(self):
+        return self.question_ids[0] if self.question_ids else None
+
+    @property
+    def last_question_id(self):
+        return self.question_ids[-1] if self.question_ids else None
+
+    @property
+    def last_on_trunk_question_id(self):
+        return self.on_trunk_question_ids[-1] if self.on_trunk_question_ids else None
+
+
+class TemplateStructure:
+    """The sections and questions of a template, without the content
+
+    Sections are available both in order of position (`section_pks`) and
+    with each section followed by its subsections (`ordered_section_pks`).
+    """
+
+    def __init__(self, template_id, version, sections, questions):
+        self.template_id = template_id
+        self.version = version
+
+        question_ids = {section['id']: [] for section in sections}
+        on_trunk_question_ids = {section['id']: [] for section in sections}
+        for question in questions:
+            question_ids[question['section_id']].append(question['id'])
+            if question['on_trunk']:
+                on_trunk_question_ids[question['section_id']].append(question['id'])
+        subsection_ids = {section['id']: [] for section in sections}
+        for section in sections:
+            if section['super_section_id'] is not None:
+                subsection_ids[section['super_section_id']].append(section['id'])
+
+        self.sections = {}
+        for section in sections:
+            pk = section['id']
+            self.sections[pk] = SectionInfo(
+                pk=pk,
+                label=section['label'],
+                title=section['title'],
+                position=section['position'],
+                section_depth=section['section_depth'],
+                super_section_id=section['super_section_id'],
+                optional=section['optional'],
+                repeatable=section['repeatable'],
+                branching=section['branching'],
+                subsection_ids=tuple(subsection_ids[pk]),
+                question_ids=tuple(question_ids[pk]),
+                on_trunk_question_ids=tuple(on_trunk_question_ids[pk]),
+            )
+        self.section_pks = tuple(section['id'] for section in sections)
+        self.section_index = {pk: index for index, pk in enumerate(self.section_pks)}
+        self.topmost_section_pks = tuple(
+            pk for pk in self.section_pks
+            if self.sections[pk].super_section_id is None
+        )
+        ordered = []
+        for pk in self.topmost_section_pks:
+            self._add_with_subsections(pk, ordered)
+        self.ordered_section_pks = tuple(ordered)
+
+    def __repr__(self):
+        return f'<TemplateStructure template={self.template_id} sections={len(self.sections)}>'
+
+    def _add_with_subsections(self, pk, ordered):
+        ordered.append(pk)
+        for subsection_id in self.sections[pk].subsection_ids:
+            self._add_with_subsections(subsection_id, ordered)
+
+    @classmethod
+    def from_template(cls, template):
+        sections = list(
+            template.sections
+            .order_by('position', 'id')
+            .values(
+                'id', 'label', 'title', 'position', 'section_depth',
+                'super_section_id', 'optional', 'repeatable', 'branching',
+            )
+        )
+        questions = (
+            template.questions
+            .order_by('position', 'id')
+            .values('id', 'section_id', 'on_trunk')
+        )
+        return cls(template.pk, template.modified, sections, questions)
+
+    def get_section(self, pk):
+        return self.sections[pk]
+
+    def ordered_sections(self):
+        "Sections with subsections in a flat list"
+        return [self.sections[pk] for pk in self.ordered_section_pks]
+
+    def topmost_sections(self):
+        return [self.sections[pk] for pk in self.topmost_section_pks]
+
+    def get_topmost_section_pk(self, pk):
+        section = self.sections[pk]
+        while section.super_section_id is not None:
+            section = self.sections[section.super_section_id]
+        return section.pk
+
+    def _find_section_pk(self, pks, nonempty):
+        for pk in pks:
+            if not nonempty or self.sections[pk].has_questions:
+                return pk
+        return None
+
+    def get_next_section_pk(self, pk, nonempty=False):
+        "See `Section.get_next_section` and `get_next_nonempty_section`"
+        index = self.section_index[pk]
+        return self._find_section_pk(self.section_pks[index+1:], nonempty)
+
+    def get_prev_section_pk(self, pk, nonempty=False):
+        "See `Section.get_prev_section` and `get_prev_nonempty_section`"
+        index = self.section_index[pk]
+        return self._find_section_pk(reversed(self.section_pks[:index]), nonempty)
+
+
+def get_template_structure(template):
+    "Get the possibly cached structure of the template"
+    version = template.modified
+    with _CACHE_LOCK:
+        structure = _CACHE.get(template.pk)
+        if structure is not None and structure.version == version:
+            _CACHE.move_to_end(template.pk)
+            return structure
+    structure = TemplateStructure.from_template(template)
+    if template.pk is None or version is None:
+        return structure
+    with _CACHE_LOCK:
+        _CACHE[template.pk] = structure
+        _CACHE.move_to_end(template.pk)
+        while len(_CACHE) > CACHE_SIZE:
+            _CACHE.popitem(last=False)
+    return structure
+
+
+def touch_template(template_id):
+    """Mark the structure of the template as changed
+
+    Must be run whenever sections or questions of the template are added,
+    removed, moved or changed.
+    """
+    Template = apps.get_model('dmpt', 'Template')
+    Template.objects.filter(pk=template_id).update(modified=tznow())
+    with _CACHE_LOCK:
+        _CACHE.pop(template_id, None)
+
+
+def clear_template_structure_cache():
+    with _CACHE_LOCK:
+        _CACHE.clear()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from collections import namedtuple
+from functools import lru_cache
 import pathlib
 from typing import Callable
 
@@ -16,12 +17,16 @@ from django.utils.encoding import force_str
 from django.utils.html import format_html, escape
 
 from .positioning import Move, get_new_index, flat_reorder
+from .positioning import batch_reorder, plan_positions
 
 
 DJANGO_TEMPLATE_ENGINE = engines['django']
+# Number of compiled framing texts to keep
+COMPILED_TEMPLATE_CACHE_SIZE = 256
 
 __all__ = (
     'get_question_type_from_filename',
+    'get_compiled_template',
     'render_from_string',
     'force_items_to_str',
     'print_url',
@@ -34,10 +39,16 @@ def get_question_type_from_filename(path):
     return pathobj.stem
 
 
+@lru_cache(maxsize=COMPILED_TEMPLATE_CACHE_SIZE)
+def get_compiled_template(template_string):
+    "Compile a template string, reusing recently compiled ones"
+    return DJANGO_TEMPLATE_ENGINE.from_string(template_string)
+
+
 def render_from_string(template_string, context=None):
     if context is None:
         context = {}
-    template = DJANGO_TEMPLATE_ENGINE.from_string(template_string)
+    template = get_compiled_template(template_string)
     return template.render(context)
 
 
@@ -100,28 +111,51 @@ class PositionUtils:
         return result['position_max']
 
     @classmethod
-    def _set_order(cls, qs, pk_list, start=1):
-        assert qs.count() >= len(pk_list), "More pk's than objects to change"
-        Model = qs.model
-        qs.bulk_update(
-            [Model(pk=pk, position=pos) for pos, pk in enumerate(pk_list, start)],
-            ['position']
-        )
+    def _update_positions(cls, Model, positions):
+        "Set new positions in as few statements as the database allows"
+        objects = [Model(pk=pk, position=pos) for pk, pos in positions.items()]
+        Model._base_manager.bulk_update(objects, ['position'])
 
     @classmethod
-    def set_order(cls, queryset, pk_list):
-        # This assumes positions are unique. Override otherwise
-        # First: get first unusued position and reorder starting with that one
-        # This prevents triggering an IntegrityError (for duplicate positions)
-        startpos = cls.get_next_position(queryset)
-        cls._set_order(queryset, pk_list, startpos)
-        # Then: Renumber positions, starting from 1, for debugging readability
-        cls._set_order(queryset, pk_list)
+    def set_order(cls, queryset, pk_list, start=1):
+        """Number the objects in `pk_list` in order, starting with `start`
+
+        Only the objects whose position actually changes are written to. If
+        any of the new positions are in use, the changed objects are first
+        moved past the last used position in one statement, to not trigger
+        an IntegrityError for duplicate positions. This assumes positions are
+        unique. Override otherwise.
+        """
+        current = dict(queryset.values_list('pk', 'position'))
+        assert len(current) >= len(pk_list), "More pk's than objects to change"
+        positions = plan_positions(current, pk_list, start)
+        if not positions:
+            return
+        Model = queryset.model
+        using = router.db_for_write(Model)
+        with transaction.atomic(using=using):
+            if set(current.values()).intersection(positions.values()):
+                offset = max(current.values(), default=0) + 1
+                temporary = {pk: offset + i for i, pk in enumerate(positions)}
+                cls._update_positions(Model, temporary)
+            cls._update_positions(Model, positions)
+
+    @classmethod
+    def move(cls, queryset, moves):
+        """Apply a batch of movements, then store the new order at once
+
+        `moves` is a sequence of (pk, Move) pairs. Raises ValueError if any
+        of the movements is impossible, before anything is changed.
+        """
+        order = cls.get_order(queryset)
+        new_order = batch_reorder(order, moves)
+        cls.set_order(queryset, new_order)
+        return new_order
 
     @classmethod
     def get_order(cls, queryset):
         # This assumes positions are unique. Override otherwise
-        return [obj.pk for obj in queryset.order_by('position')]
+        return list(queryset.order_by('position').values_list('pk', flat=True))
 
     @classmethod
     def renumber_positions(cls, manager, objects):
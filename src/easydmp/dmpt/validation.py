@@ -0,0 +1,378 @@
+"""Validating the answers to all questions of a section at once
+
+Validating a question with choices needs the keys of those choices, which
+costs a query per question: canned answers, or the cached entries of an
+EEStore. The `SectionRules` of a section hold its questions, all their
+choice keys and the paths through the section, loaded up front. A
+`SectionValidator` made from them can then validate any number of
+answersets of that section without further queries.
+
+The rules of all sections of a template are cached in the process by
+`get_template_rules`, keyed on the template and its `modified` timestamp.
+They are plain, immutable data, the model instances are made anew by each
+validator. Since EEStore entries change independently of the template, the
+rules are also reloaded after EASYDMP_VALIDATOR_CACHE_TIMEOUT seconds.
+"""
+
+from collections import OrderedDict, namedtuple
+import threading
+import time
+from types import MappingProxyType
+
+from django.conf import settings
+from django.utils.functional import cached_property
+
+from easydmp.eestore.models import EEStoreCache, EEStoreMount, EEStoreSource
+
+from .errors import UnknownSectionError
+from .flow import Transition, TransitionMap, find_complete_paths
+
+
+__all__ = [
+    'ChoiceKeys',
+    'QuestionRules',
+    'SectionRules',
+    'SectionValidator',
+    'get_section_rules',
+    'get_template_rules',
+    'get_template_validators',
+    'validate_answersets',
+    'clear_validator_cache',
+]
+
+CACHE_SIZE = 32
+
+_CACHE = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+class ChoiceKeys(frozenset):
+    """The keys of the choices of a question
+
+    Answers are user input and may be lists or dicts, which cannot be looked
+    up in a set. They are never a valid choice, like with a list of keys.
+    """
+
+    def __contains__(self, item):
+        try:
+            return super().__contains__(item)
+        except TypeError:  # unhashable
+            return False
+
+
+def _get_eestore_choices_keys(question_ids):
+    "Map each question with an EEStore mount to the pids of its entries"
+    mounts = (
+        EEStoreMount.objects
+        .filter(question_id__in=question_ids)
+        .prefetch_related('sources')
+    )
+    source_ids = {}
+    for mount in mounts:
+        sources = {source.pk for source in mount.sources.all()}
+        if not sources:
+            # No sources selected means all sources of the type
+            sources = set(
+                EEStoreSource.objects
+                .filter(eestore_type_id=mount.eestore_type_id)
+                .values_list('pk', flat=True)
+            )
+        source_ids[mount.question_id] = sources
+    all_source_ids = set().union(*source_ids.values())
+    pids = {source_id: set() for source_id in all_source_ids}
+    entries = (
+        EEStoreCache.objects
+        .filter(source_id__in=all_source_ids)
+        .values_list('source_id', 'eestore_pid')
+    )
+    for source_id, pid in entries:
+        pids[source_id].add(pid)
+    return {
+        question_id: ChoiceKeys(pid for source_id in sources for pid in pids[source_id])
+        for question_id, sources in source_ids.items()
+    }
+
+
+class QuestionRules(namedtuple('QuestionRules', [
+    'pk',
+    'cls',
+    'optional',
+    'fields',
+    'input_type_fields',
+    'choices_keys',
+])):
+    """What is needed to validate the answers to a question
+
+    `cls` is the typed question class, `fields` and `input_type_fields` the
+    values of the database fields of the question and its QuestionType, as
+    (attname, value) pairs. `choices_keys` is a `ChoiceKeys`, or None if the
+    question has no choices.
+    """
+    __slots__ = ()
+
+    def make_question(self):
+        "Make a new question instance, without queries"
+        from .models import QuestionType
+
+        question = self.cls(**dict(self.fields))
+        question.input_type = QuestionType(**dict(self.input_type_fields))
+        if self.choices_keys is not None:
+            question.set_choices_keys(self.choices_keys)
+        return question
+
+
+class SectionRules(namedtuple('SectionRules', [
+    'pk',
+    'optional',
+    'branching',
+    'questions',
+    'transitions',
+    'paths',
+])):
+    """What is needed to validate the answersets of a section
+
+    Plain, immutable data that is safe to share between threads. The
+    questions are `QuestionRules` in order of position, the transitions are
+    tuples like `Transition.astuple()` and the paths are all the complete
+    paths through a branching section.
+    """
+    __slots__ = ()
+
+
+def _get_field_values(obj):
+    return tuple(
+        (field.attname, getattr(obj, field.attname))
+        for field in obj._meta.concrete_fields
+    )
+
+
+def get_section_rules(section):
+    "Load the `SectionRules` of `section`"
+    from .models.questions.mixins import EEStoreMixin
+
+    questions = list(
+        section.questions
+        .order_by('position')
+        .select_related('input_type')
+        .prefetch_related('canned_answers')
+        .typed()
+    )
+    eestore_question_ids = [
+        q.pk for q in questions if isinstance(q, EEStoreMixin)
+    ]
+    eestore_choices_keys = {}
+    if eestore_question_ids:
+        eestore_choices_keys = _get_eestore_choices_keys(eestore_question_ids)
+    question_rules = []
+    for question in questions:
+        if question.pk in eestore_choices_keys:
+            keys = eestore_choices_keys[question.pk]
+        elif question.pk in eestore_question_ids:
+            # Mount is missing
+            keys = ChoiceKeys()
+        else:
+            try:
+                keys = ChoiceKeys(question.get_choices_keys())
+            except NotImplementedError:
+                keys = None
+        question_rules.append(QuestionRules(
+            question.pk,
+            type(question),
+            question.optional,
+            _get_field_values(question),
+            _get_field_values(question.input_type),
+            keys,
+        ))
+    transitions = ()
+    paths = frozenset()
+    if section.branching and questions:
+        transition_map = section.generate_transition_map(pk=True)
+        transitions = tuple(t.astuple() for t in transition_map.transitions)
+        graph = transition_map.as_bare_adjacency_list()
+        paths = frozenset(find_complete_paths(graph, questions[0].pk))
+    return SectionRules(
+        section.pk,
+        section.optional,
+        section.branching,
+        tuple(question_rules),
+        transitions,
+        paths,
+    )
+
+
+class SectionValidator:
+    """Validate whole answersets of a section
+
+    Made from the `SectionRules` of the section, which are loaded if not
+    given. The questions are new instances, with their choice keys set so
+    that their own `validate_choice()` uses them. A validator is cheap to
+    make and should not be shared between threads, the rules can be.
+    """
+
+    def __init__(self, section=None, rules=None):
+        if rules is None:
+            rules = get_section_rules(section)
+        self.rules = rules
+        self.questions = [question.make_question() for question in rules.questions]
+        self.optional = frozenset(q.pk for q in rules.questions if q.optional)
+        self.choices_keys = {
+            q.pk: q.choices_keys for q in rules.questions if q.choices_keys is not None
+        }
+
+    def validate(self, data):
+        """Find which questions are answered validly in `data`
+
+        Returns two sets of question pks, see
+        `Section.find_validity_of_questions`.
+        """
+        valids = set(self.optional)
+        if not data:
+            invalids = {q.pk for q in self.questions if not q.optional}
+            return (valids, invalids)
+        invalids = set()
+        for question in self.questions:
+            try:
+                valid = question.validate_data(data)
+            except (AttributeError, KeyError, TypeError, ValueError):
+                # Malformed answer
+                valid = False
+                if question.optional:
+                    valid = True
+            if valid:
+                valids.add(question.pk)
+            else:
+                invalids.add(question.pk)
+        return (valids, invalids)
+
+    @cached_property
+    def transition_map(self):
+        transition_map = TransitionMap()
+        for transition in self.rules.transitions:
+            transition_map.add(Transition(*transition))
+        return transition_map
+
+    def find_path(self, data):
+        """Follow the answers in `data` through the section
+
+        Like `Section.generate_complete_path_from_data` but without queries.
+        """
+        if not self.questions:
+            return ()
+        questions = {q.pk: q for q in self.questions}
+        path = []
+        pk = self.questions[0].pk
+        while pk is not None and str(pk) in data:
+            path.append(pk)
+            try:
+                condition = questions[pk].get_condition(data)
+                transition = self.transition_map.select_transition(pk, condition)
+            except (AttributeError, KeyError, TypeError):
+                # Malformed answer, cannot be valid anyway
+                break
+            pk = transition.next if transition else None
+        return tuple(path)
+
+    def validate_section(self, data, skipped=False):
+        """Validate a single answerset of the section
+
+        Returns whether the answerset is valid as a whole, and the result of
+        `validate()`. Follows `Section.validate_data`, except that whether
+        the section is skipped is given by `skipped` rather than looked up.
+        """
+        if not self.questions:
+            return (True, set(), set())
+        valids, invalids = self.validate(data)
+        if skipped and self.rules.optional:
+            return (True, valids, invalids)
+        if not data:
+            return (False, valids, invalids)
+        if not self.rules.branching:
+            return (not invalids, valids, invalids)
+        # Like `Section.is_valid_and_complete_path`
+        path = self.find_path(data)
+        valid = path in self.rules.paths and not set(path) - valids
+        valid = valid and not invalids.intersection(path)
+        return (valid, valids, invalids)
+
+
+def _get_timeout():
+    return getattr(settings, 'EASYDMP_VALIDATOR_CACHE_TIMEOUT', 60 * 60)
+
+
+def get_template_rules(template):
+    "Get a dict of the `SectionRules` of all sections of `template`"
+    version = template.modified
+    with _CACHE_LOCK:
+        cached = _CACHE.get(template.pk)
+        if cached is not None:
+            cached_version, expires, rules = cached
+            if cached_version == version and expires > time.monotonic():
+                _CACHE.move_to_end(template.pk)
+                return rules
+    rules = MappingProxyType({
+        section.pk: get_section_rules(section)
+        for section in template.sections.all()
+    })
+    with _CACHE_LOCK:
+        _CACHE[template.pk] = (version, time.monotonic() + _get_timeout(), rules)
+        _CACHE.move_to_end(template.pk)
+        while len(_CACHE) > CACHE_SIZE:
+            _CACHE.popitem(last=False)
+    return rules
+
+
+def get_template_validators(template):
+    "Get a dict of new `SectionValidator`s for all sections of `template`"
+    return {
+        section_id: SectionValidator(rules=rules)
+        for section_id, rules in get_template_rules(template).items()
+    }
+
+
+def validate_answersets(template, answersets):
+    """Validate answersets of `template` without storing anything
+
+    Each answerset is a dict with the keys "section" (a section pk), "data"
+    (like `AnswerSet.data`) and optionally "skipped". Raises
+    UnknownSectionError if a section is not in the template.
+
+    Returns a dict with the validity of each answerset, and of each section
+    given: a section is valid if all its answersets are.
+    """
+    rules = get_template_rules(template)
+    section_ids = {answerset['section'] for answerset in answersets}
+    unknown = section_ids - set(rules)
+    if unknown:
+        raise UnknownSectionError(sorted(unknown))
+    validators = {
+        section_id: SectionValidator(rules=rules[section_id])
+        for section_id in section_ids
+    }
+    results = []
+    sections = {}
+    for answerset in answersets:
+        section_id = answerset['section']
+        validator = validators[section_id]
+        valid, valids, invalids = validator.validate_section(
+            answerset['data'],
+            skipped=answerset.get('skipped', False),
+        )
+        results.append({
+            'section': section_id,
+            'valid': valid,
+            'valid_questions': sorted(valids),
+            'invalid_questions': sorted(invalids),
+        })
+        section = sections.setdefault(section_id, {'valid': True, 'answersets': 0})
+        section['valid'] = section['valid'] and valid
+        section['answersets'] += 1
+    return {
+        'valid': all(section['valid'] for section in sections.values()),
+        'sections': sections,
+        'answersets': results,
+    }
+
+
+def clear_validator_cache():
+    with _CACHE_LOCK:
+        _CACHE.clear()
@@ -1,10 +1,12 @@
 from collections import OrderedDict
 
 from rest_framework import pagination
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
 
 __all__ = [
+    'CursorPaginationV2',
     'PageNumberPagination',
     'ToggleablePageNumberPaginationV1',
     'ToggleablePageNumberPaginationV2',
@@ -97,3 +99,78 @@ class ToggleablePageNumberPaginationV2(PageNumberPagination):
                 'results': schema,
             }
         }
+
+
+class CursorPaginationV2(pagination.CursorPagination):
+    """Paginate with an opaque cursor
+
+    Fetching a page costs the same regardless of how far into the list it
+    is, since there is no COUNT(*) and no OFFSET.
+
+    The ordering is chosen with the `cursor_ordering` GET query parameter:
+
+    * id, -id: by primary key. Rows added while walking the list turn up
+      at the end (start for -id), no row is seen twice.
+    * modified, -modified: by last modification time, ties broken by
+      primary key. Only for models with a "modified" field. A row that is
+      changed while walking the list moves to the end (start for
+      -modified) and will be seen again.
+
+    The default is "id".
+    """
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'cursor_ordering'
+    ordering = ('id',)
+    orderings = {
+        'id': ('id',),
+        '-id': ('-id',),
+        'modified': ('modified', 'id'),
+        '-modified': ('-modified', '-id'),
+    }
+
+    def get_ordering(self, request, queryset, view):
+        key = request.query_params.get(self.ordering_query_param, 'id')
+        ordering = self.orderings.get(key, None)
+        if ordering is None:
+            choices = ', '.join(self.orderings)
+            raise ValidationError({
+                self.ordering_query_param: f'Must be one of: {choices}',
+            })
+        field_names = {field.name for field in queryset.model._meta.get_fields()}
+        if not all(field.lstrip('-') in field_names for field in ordering):
+            raise ValidationError({
+                self.ordering_query_param: f'Cannot order by "{key}" here',
+            })
+        return ordering
+
+    @classmethod
+    def is_requested(cls, request):
+        return cls.cursor_query_param in request.query_params
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('on_page', len(self.page)),
+            ('page_size', self.page_size),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        pagination_response_schema = super().get_paginated_response_schema(schema)
+        return {
+            'type': pagination_response_schema['type'],
+            'properties': {
+                'on_page': {
+                    'type': 'integer',
+                    'example': 100,
+                },
+                'page_size': {
+                    'type': 'integer',
+                    'example': 100,
+                },
+                'next': pagination_response_schema['properties']['next'],
+                'previous': pagination_response_schema['properties']['previous'],
+                'results': schema,
+            }
+        }
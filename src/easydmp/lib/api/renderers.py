@@ -1,6 +1,5 @@
 from rest_framework.exceptions import AuthenticationFailed
-from rest_framework.renderers import BaseRenderer, StaticHTMLRenderer
-from weasyprint import HTML
+from rest_framework.renderers import BaseRenderer, JSONRenderer, StaticHTMLRenderer
 
 from easydmp.lib.graphviz import render_dotsource_to_bytes
 
@@ -16,6 +15,7 @@ __all__ = [
     'DotDOTRenderer',
     'StaticPlaintextRenderer',
     'HTML2PDFRenderer',
+    'NDJSONRenderer',
 ]
 
 
@@ -53,6 +53,9 @@ class DOTRenderer(BaseRenderer):
 class DotMixin:
 
     def render(self, data, media_type=None, renderer_context=None):
+        # Already rendered, for instance by Section.render_graph()
+        if isinstance(data, bytes):
+            return data
         return render_dotsource_to_bytes(self.format, data)
 
 
@@ -84,4 +87,23 @@ class HTML2PDFRenderer(PDFRenderer, StaticHTMLRenderer):
         response = renderer_context.get('response', None)
         if response and response.exception:
             data = super().render(data, media_type, renderer_context)
+        from weasyprint import HTML  # slow, so only when needed
+
         return HTML(string=data).write_pdf()
+
+
+class NDJSONRenderer(JSONRenderer):
+    """DRF renderer for newline delimited JSON
+
+    A list is rendered as one line per item, anything else as one line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, list):
+            data = [data]
+        return b''.join(self.render_line(item) for item in data)
+
+    def render_line(self, item):
+        return super().render(item) + b'\n'
@@ -1,14 +1,19 @@
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+from rest_framework.reverse import preserve_builtin_query_params
+
+from easydmp.lib import urls
 
 
 __all__ = [
+    'SelfHyperlinkedIdentityField',
     'SelfHyperlinkedRelatedField',
     'SelfHyperlinkedSlugRelatedField',
     'SelfModelSerializer',
     'SelfHyperlinkedModelSerializer',
     'SelfHyperlinkedSlugModelSerializer',
     'URLSerializer',
+    'reverse_format',
 ]
 
 
@@ -22,8 +27,44 @@ class HyperlinkedSlugSerializer(serializers.Serializer):
     self = serializers.URLField()
 
 
+def reverse_format(viewname, request=None, format=None, **kwargs):
+    """Like rest_framework.reverse.reverse() but cached
+
+    See `easydmp.lib.urls.reverse_format`.
+    """
+    if format:
+        kwargs['format'] = format
+    url = None
+    # Like the versioning scheme: the versioned view name, if there is one
+    scheme = getattr(request, 'versioning_scheme', None)
+    if getattr(request, 'version', None) is not None and hasattr(scheme, 'get_versioned_viewname'):
+        versioned_viewname = scheme.get_versioned_viewname(viewname, request)
+        if urls.get_url_format(versioned_viewname, *kwargs) is not None:
+            url = urls.reverse_format(versioned_viewname, **kwargs)
+    if url is None:
+        url = urls.reverse_format(viewname, **kwargs)
+    if request is not None:
+        url = request.build_absolute_uri(url)
+    return preserve_builtin_query_params(url, request)
+
+
+class ReverseFormatMixin:
+    "Reverse the URLs of hyperlinked fields with `reverse_format()`"
+
+    def get_url(self, obj, view_name, request, format):
+        # Unsaved objects will not yet have a valid URL.
+        if hasattr(obj, 'pk') and obj.pk in (None, ''):
+            return None
+        kwargs = {self.lookup_url_kwarg: getattr(obj, self.lookup_field)}
+        return reverse_format(view_name, request, format, **kwargs)
+
+
+class SelfHyperlinkedIdentityField(ReverseFormatMixin, serializers.HyperlinkedIdentityField):
+    pass
+
+
 @extend_schema_field(HyperlinkedIDSerializer())
-class SelfHyperlinkedRelatedField(serializers.HyperlinkedRelatedField):
+class SelfHyperlinkedRelatedField(ReverseFormatMixin, serializers.HyperlinkedRelatedField):
 
     def to_representation(self, instance):
         ret = super().to_representation(instance)
@@ -49,6 +90,7 @@ class SelfModelSerializer(serializers.ModelSerializer):
 
 class SelfHyperlinkedModelSerializer(serializers.HyperlinkedModelSerializer):
     serializer_related_field = SelfHyperlinkedRelatedField
+    serializer_url_field = SelfHyperlinkedIdentityField
     url_field_name = 'self'
 
 
@@ -1,9 +1,114 @@
+from itertools import chain
+
+from django.db.models import prefetch_related_objects
+from django.http import StreamingHttpResponse
 from rest_framework.permissions import DjangoModelPermissionsOrAnonReadOnly
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
+from .pagination import CursorPaginationV2
+from .renderers import NDJSONRenderer
+
 
-__all__ = ['AnonReadOnlyModelViewSet']
+__all__ = [
+    'AnonReadOnlyModelViewSet',
+    'StreamingListMixin',
+]
 
 
 class AnonReadOnlyModelViewSet(ReadOnlyModelViewSet):
+    """Read-only access, anonymous users included
+
+    Lists are paginated by ``pagination_class``, unless the request asks for
+    cursor pagination, see ``CursorPaginationV2``. Cursor pagination is not
+    available in version 1 of the API.
+    """
     permission_classes = [DjangoModelPermissionsOrAnonReadOnly]
+    cursor_pagination_class = CursorPaginationV2
+    use_replica = True  # see easydmp.lib.replica
+
+    def use_cursor_pagination(self):
+        request = getattr(self, 'request', None)
+        if request is None or not self.cursor_pagination_class:
+            return False
+        if getattr(request, 'version', None) == 'v1':
+            return False
+        return self.cursor_pagination_class.is_requested(request)
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.use_cursor_pagination():
+            self._paginator = self.cursor_pagination_class()
+        return super().paginator
+
+
+class StreamingListMixin:
+    """Stream unpaginated lists as JSON or NDJSON
+
+    When a list is not paginated, by setting page_size=0 or because the
+    viewset has no pagination, the rows are fetched with
+    ``QuerySet.iterator()`` and serialized one at a time into a streaming
+    response, so that the whole list is never in memory.
+
+    Use ``?format=ndjson`` or ``Accept: application/x-ndjson`` to get one
+    JSON object per line instead of a JSON array. Other renderers, like the
+    browsable API, are not streamed.
+    """
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [NDJSONRenderer]
+    stream_chunk_size = 500
+    streaming_renderer_classes = (JSONRenderer,)
+
+    def list(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        if not isinstance(renderer, self.streaming_renderer_classes + (NDJSONRenderer,)):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        rows = queryset.iterator(chunk_size=self.stream_chunk_size)
+        # Run the query before streaming starts, so that errors are reported
+        # as errors and not as a truncated response
+        first = next(rows, None)
+        rows = chain([first], rows) if first is not None else iter(())
+        # QuerySet.iterator() skips prefetch_related(), so prefetch per chunk
+        lookups = queryset._prefetch_related_lookups
+        representations = self.iterate_representations(rows, lookups)
+
+        if isinstance(renderer, NDJSONRenderer):
+            content = self.stream_ndjson(representations, renderer)
+        else:
+            content = self.stream_json_array(representations, renderer)
+        return StreamingHttpResponse(content, content_type=renderer.media_type)
+
+    def iterate_representations(self, rows, lookups=()):
+        serializer = self.get_serializer()
+        chunk = []
+        for obj in rows:
+            chunk.append(obj)
+            if len(chunk) == self.stream_chunk_size:
+                yield from self._represent_chunk(serializer, chunk, lookups)
+                chunk = []
+        yield from self._represent_chunk(serializer, chunk, lookups)
+
+    def _represent_chunk(self, serializer, chunk, lookups):
+        if lookups:
+            prefetch_related_objects(chunk, *lookups)
+        for obj in chunk:
+            yield serializer.to_representation(obj)
+
+    def stream_json_array(self, representations, renderer):
+        yield b'['
+        separator = b''
+        for data in representations:
+            yield separator + renderer.render(data)
+            separator = b','
+        yield b']'
+
+    def stream_ndjson(self, representations, renderer):
+        for data in representations:
+            yield renderer.render_line(data)
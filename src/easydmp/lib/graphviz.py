@@ -1,9 +1,20 @@
 # encoding: utf-8
+"""Render graphs with graphviz
 
+The graphviz module is imported on first use, as most processes never draw
+a graph.
+"""
+
+import logging
+import os
+import stat
 import tempfile
 from pathlib import PurePath, Path
 
-import graphviz as gv
+from django.conf import settings
+
+
+LOG = logging.getLogger(__name__)
 
 
 def _prep_dotsource(graphviz_tmpdir):
@@ -21,6 +32,8 @@ def view_dotsource(format, dotsource, graphviz_tmpdir, cleanup=True):
 
     format: a format supported by graphviz
     doutsource: show dotsource, do not generate from this fsa"""
+    import graphviz as gv
+
     _prep_dotsource(graphviz_tmpdir)
     graph = gv.Source(
         directory=str(graphviz_tmpdir),
@@ -43,6 +56,8 @@ def render_dotsource_to_file(format, filename, dotsource, root_directory, direct
     directory: directory within parent directory o generate files in. May be set by user
     mode: mode of directory. Default: 0o750
     """
+    import graphviz as gv
+
     _prep_dotsource(root_directory)
     extension = '.' + format
     # remove directories, for great paranoia
@@ -73,9 +88,72 @@ def render_dotsource_to_file(format, filename, dotsource, root_directory, direct
 
 
 def render_dotsource_to_bytes(format, dotsource):
+    import graphviz as gv
+
     graph = gv.Source(
         source=dotsource,
         format=format,
     )
     graphstring = graph.pipe()
     return graphstring
+
+
+class GraphCache:
+    """Rendered graphs on disk
+
+    Each graph is stored as <directory>/<name>/<version>.<format>. Storing a
+    new version of a graph removes the older versions in the same format.
+
+    The graphs are served to users, so the cache is not used if the
+    directory is not a real directory owned by this process' user.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._usable = None
+
+    def is_usable(self):
+        "Create the directory if need be, check that nobody else controls it"
+        if self._usable is None:
+            try:
+                self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+                info = self.directory.lstat()
+            except OSError as e:
+                LOG.warning('Not caching graphs, cannot use %s: %s', self.directory, e)
+                self._usable = False
+                return False
+            self._usable = stat.S_ISDIR(info.st_mode) and info.st_uid == os.geteuid()
+            if not self._usable:
+                LOG.warning('Not caching graphs, %s is not a directory owned by us', self.directory)
+        return self._usable
+
+    def get_path(self, name, version, format):
+        return self.directory / name / '{}.{}'.format(version, format)
+
+    def get(self, name, version, format):
+        "Get the rendered graph, or None if not cached"
+        if not self.is_usable():
+            return None
+        try:
+            return self.get_path(name, version, format).read_bytes()
+        except OSError:
+            return None
+
+    def set(self, name, version, format, data):
+        if not self.is_usable():
+            return
+        path = self.get_path(name, version, format)
+        path.parent.mkdir(mode=0o700, exist_ok=True)
+        # Write to a temporary file first so readers never see half a graph
+        fd, tmpname = tempfile.mkstemp(dir=str(path.parent), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmpname, path)
+        for stale in path.parent.glob('*.' + format):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+
+
+def get_graph_cache():
+    "Get the cache in the directory set by EASYDMP_GRAPH_CACHE_DIR"
+    return GraphCache(settings.EASYDMP_GRAPH_CACHE_DIR)
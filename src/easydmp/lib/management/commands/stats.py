@@ -0,0 +1,27 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from easydmp.lib.stats import get_series, get_stats, series, stats
+
+
+class Command(BaseCommand):
+    help = "Show statistics about plans and users as JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--series', action='store_true',
+                            help='Also show statistics per month')
+        parser.add_argument('--months', type=int, default=12,
+                            help='How many months of statistics to show, default 12')
+        parser.add_argument('--no-cache', action='store_true',
+                            help='Recount everything instead of using cached statistics')
+
+    def handle(self, *args, **options):
+        if options['no_cache']:
+            result = stats()
+        else:
+            result = get_stats()
+        if options['series']:
+            months = options['months']
+            result['series'] = series(months) if options['no_cache'] else get_series(months)
+        self.stdout.write(json.dumps(result, indent=2))
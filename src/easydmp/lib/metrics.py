@@ -0,0 +1,322 @@
+"""Per-view request metrics in the Prometheus text format
+
+`easydmp.lib.middleware.MetricsMiddleware` measures every request: wall
+time, number of database queries and time spent in the database, time
+spent rendering templates and the number of event log entries written.
+The measurements are aggregated per view into histograms in this process,
+see `REGISTRY`, and served by `metrics_view`.
+
+With several worker processes, each has its own metrics. Prometheus adds
+up the workers if each is scraped, otherwise the numbers are for whichever
+worker answered.
+
+The metrics are served to clients with EASYDMP_METRICS_TOKEN, or from the
+addresses in EASYDMP_METRICS_ALLOWED_IPS, see `metrics_view`.
+
+Streamed responses are measured until the last chunk has been sent.
+
+Requests slower than EASYDMP_SLOW_REQUEST_SECONDS are logged to the
+"easydmp.lib.metrics.slow" logger, with the EASYDMP_SLOW_REQUEST_TOP_SQL
+slowest SQL statements of the request.
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager, ExitStack
+from contextvars import ContextVar
+import heapq
+import hmac
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.models.signals import post_save
+from django.http import HttpResponse, HttpResponseForbidden
+
+
+__all__ = [
+    'Histogram',
+    'MetricsRegistry',
+    'RequestMetrics',
+    'REGISTRY',
+    'collect_request_metrics',
+    'install_instrumentation',
+    'metrics_view',
+]
+
+SLOW_LOG = logging.getLogger(__name__ + '.slow')
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_current = ContextVar('easydmp_request_metrics', default=None)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    "Cumulative histogram with fixed buckets, like Prometheus'"
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        "Yield (le, cumulative count) per bucket"
+        cumulative = 0
+        for le, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            yield le, cumulative
+
+
+class MetricsRegistry:
+    """Histograms and counters, per view
+
+    The `HISTOGRAMS` are observed once per request, for each an attribute
+    of `RequestMetrics` of the same name.
+    """
+    HISTOGRAMS = {
+        'duration': ('easydmp_request_duration_seconds',
+                     'Time spent handling the request', TIME_BUCKETS),
+        'db_queries': ('easydmp_request_db_queries',
+                       'Number of database queries per request', COUNT_BUCKETS),
+        'db_duration': ('easydmp_request_db_duration_seconds',
+                        'Time spent in the database per request', TIME_BUCKETS),
+        'template_duration': ('easydmp_request_template_render_seconds',
+                              'Time spent rendering templates per request', TIME_BUCKETS),
+    }
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.histograms = {key: {} for key in self.HISTOGRAMS}
+        self.requests = {}
+        self.eventlog_writes = {}
+
+    def clear(self):
+        with self.lock:
+            self._reset()
+
+    def record(self, view, method, status, metrics):
+        with self.lock:
+            for key, (_, _, buckets) in self.HISTOGRAMS.items():
+                histograms = self.histograms[key]
+                if view not in histograms:
+                    histograms[view] = Histogram(buckets)
+                histograms[view].observe(getattr(metrics, key))
+            request_key = (view, method, status)
+            self.requests[request_key] = self.requests.get(request_key, 0) + 1
+            if metrics.eventlog_writes:
+                self.eventlog_writes[view] = (
+                    self.eventlog_writes.get(view, 0) + metrics.eventlog_writes
+                )
+
+    def render(self):
+        "Render all metrics in the Prometheus text format"
+        lines = []
+        with self.lock:
+            requests = [
+                ((('view', view), ('method', method), ('status', status)), value)
+                for (view, method, status), value in sorted(self.requests.items())
+            ]
+            lines.extend(self._render_counter(
+                'easydmp_requests_total', 'Number of requests', requests,
+            ))
+            eventlog_writes = [
+                ((('view', view),), value)
+                for view, value in sorted(self.eventlog_writes.items())
+            ]
+            lines.extend(self._render_counter(
+                'easydmp_eventlog_writes_total', 'Number of event log entries written',
+                eventlog_writes,
+            ))
+            for key, (name, help_text, _) in self.HISTOGRAMS.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for view, histogram in sorted(self.histograms[key].items()):
+                    lines.extend(self._render_histogram(name, view, histogram))
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _render_counter(name, help_text, samples):
+        yield f'# HELP {name} {help_text}'
+        yield f'# TYPE {name} counter'
+        for labels, value in samples:
+            yield f'{name}{_format_labels(labels)} {value}'
+
+    @staticmethod
+    def _render_histogram(name, view, histogram):
+        for le, count in histogram.samples():
+            labels = _format_labels((('view', view), ('le', _format_number(le))))
+            yield f'{name}_bucket{labels} {count}'
+        labels = _format_labels((('view', view),))
+        yield f'{name}_sum{labels} {_format_number(histogram.sum)}'
+        yield f'{name}_count{labels} {histogram.count}'
+
+
+REGISTRY = MetricsRegistry()
+
+
+class RequestMetrics:
+    "The measurements of a single request"
+
+    def __init__(self, top_sql=0):
+        self.duration = 0
+        self.db_queries = 0
+        self.db_duration = 0
+        self.template_duration = 0
+        self.eventlog_writes = 0
+        self.top_sql = top_sql
+        self.slowest_sql = []  # heap of (duration, sql)
+        self._template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        "Database execute wrapper, see `connection.execute_wrapper()`"
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.db_queries += 1
+            self.db_duration += elapsed
+            if self.top_sql:
+                item = (elapsed, sql)
+                if len(self.slowest_sql) < self.top_sql:
+                    heapq.heappush(self.slowest_sql, item)
+                else:
+                    heapq.heappushpop(self.slowest_sql, item)
+
+    def get_slowest_sql(self):
+        return sorted(self.slowest_sql, reverse=True)
+
+
+@contextmanager
+def collect_request_metrics(top_sql=0, metrics=None):
+    """Measure everything done inside the block, on all database connections
+
+    Pass the `metrics` of an earlier block to add to them.
+    """
+    if metrics is None:
+        metrics = RequestMetrics(top_sql)
+    token = _current.set(metrics)
+    start = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            yield metrics
+    finally:
+        metrics.duration += time.perf_counter() - start
+        _current.reset(token)
+
+
+def log_slow_request(request, status, metrics):
+    threshold = getattr(settings, 'EASYDMP_SLOW_REQUEST_SECONDS', None)
+    if threshold is None or metrics.duration < threshold:
+        return
+    slowest = ''.join(
+        f'\n  {elapsed * 1000:.1f} ms: {sql}'
+        for elapsed, sql in metrics.get_slowest_sql()
+    )
+    SLOW_LOG.warning(
+        'Slow request: %s %s %s took %.0f ms, %i queries in %.0f ms, '
+        'templates %.0f ms%s',
+        request.method, request.get_full_path(), status,
+        metrics.duration * 1000, metrics.db_queries, metrics.db_duration * 1000,
+        metrics.template_duration * 1000, slowest,
+    )
+
+
+# START: instrumentation
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def _count_eventlog_write(sender, created=False, **kwargs):
+    metrics = _current.get()
+    if created and metrics is not None:
+        metrics.eventlog_writes += 1
+
+
+def _instrument_template_render(render):
+    def timed_render(self, *args, **kwargs):
+        metrics = _current.get()
+        if metrics is None:
+            return render(self, *args, **kwargs)
+        # Only the outermost template counts, the rest is included
+        metrics._template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            metrics._template_depth -= 1
+            if not metrics._template_depth:
+                metrics.template_duration += time.perf_counter() - start
+    timed_render.__wrapped__ = render
+    return timed_render
+
+
+def install_instrumentation():
+    "Time template rendering and count event log writes, once per process"
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        from django.template.backends.django import Template
+
+        Template.render = _instrument_template_render(Template.render)
+        post_save.connect(_count_eventlog_write, sender='eventlog.EventLog',
+                          dispatch_uid='easydmp.lib.metrics.eventlog')
+        _installed = True
+
+# END: instrumentation
+
+
+def _may_see_metrics(request):
+    token = getattr(settings, 'EASYDMP_METRICS_TOKEN', None)
+    if token:
+        authorization = request.META.get('HTTP_AUTHORIZATION', '')
+        if hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode()):
+            return True
+    allowed = getattr(settings, 'EASYDMP_METRICS_ALLOWED_IPS', ())
+    return request.META.get('REMOTE_ADDR') in allowed
+
+
+def metrics_view(request):
+    """Serve the metrics of this process
+
+    Only to clients sending the header "Authorization: Bearer
+    <EASYDMP_METRICS_TOKEN>", or from the addresses in
+    EASYDMP_METRICS_ALLOWED_IPS. Both are unset by default. Behind a reverse
+    proxy the address is the proxy's, so use the token there.
+    """
+    if not _may_see_metrics(request):
+        return HttpResponseForbidden()
+    return HttpResponse(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+metrics_view.login_required = False
@@ -1,8 +1,12 @@
 from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 from django.shortcuts import render
 from django.utils.cache import add_never_cache_headers
 from django.utils.deprecation import MiddlewareMixin
 
+from . import metrics
+from . import replica
+
 
 class MaintenanceModeMiddleware:
 
@@ -16,3 +20,89 @@ class MaintenanceModeMiddleware:
         response = render(request, '503.html', content_type='text/html', status=503)
         add_never_cache_headers(response)
         return response
+
+
+class MetricsMiddleware:
+    """Measure each request, see `easydmp.lib.metrics`
+
+    Put it first in MIDDLEWARE to include the time spent in other
+    middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.top_sql = getattr(settings, 'EASYDMP_SLOW_REQUEST_TOP_SQL', 5)
+        if getattr(settings, 'EASYDMP_SLOW_REQUEST_SECONDS', None) is None:
+            self.top_sql = 0
+        metrics.install_instrumentation()
+
+    def __call__(self, request):
+        with metrics.collect_request_metrics(self.top_sql) as request_metrics:
+            response = self.get_response(request)
+        if response.streaming:
+            # The content is made while it is sent, so measure that too
+            response.streaming_content = self.stream(
+                request, response, response.streaming_content, request_metrics,
+            )
+        else:
+            self.record(request, response, request_metrics)
+        return response
+
+    def stream(self, request, response, content, request_metrics):
+        try:
+            with metrics.collect_request_metrics(self.top_sql, request_metrics):
+                yield from content
+        finally:
+            self.record(request, response, request_metrics)
+
+    def record(self, request, response, request_metrics):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        metrics.REGISTRY.record(view, request.method, response.status_code, request_metrics)
+        metrics.log_slow_request(request, response.status_code, request_metrics)
+
+
+class ReplicaMiddleware:
+    """Read from the replica in views that allow it, see `easydmp.lib.replica`
+
+    A view allows it with the attribute ``use_replica = True``, on the
+    function or the class. Put the middleware after the authentication
+    middleware, so that sessions and users are read from "default".
+    """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        if replica.get_replica_alias() is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sticky_seconds = replica.get_sticky_seconds()
+
+    def __call__(self, request):
+        with replica.reading_from_replica(active=False) as request._replica:
+            response = self.get_response(request)
+        if response.streaming:
+            # The content is read while it is sent
+            response.streaming_content = self.stream(
+                response.streaming_content, request._replica,
+            )
+        if request.method not in self.SAFE_METHODS:
+            # Let the replica catch up before reading from it again
+            response.set_cookie(
+                replica.STICKY_COOKIE, '1',
+                max_age=self.sticky_seconds, httponly=True, samesite='Lax',
+            )
+        return response
+
+    def stream(self, content, state):
+        with replica.reading_from_replica(state=state):
+            yield from content
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in self.SAFE_METHODS:
+            return None
+        if replica.STICKY_COOKIE in request.COOKIES:
+            return None
+        view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+        if getattr(view_func, 'use_replica', False) or getattr(view_class, 'use_replica', False):
+            request._replica.active = True
+        return None
@@ -0,0 +1,95 @@
+"""Send reads to a replica of the database
+
+This is optional: set DMP_REPLICA_DATABASE_URL to add a database "replica"
+and install `ReplicaRouter`, see the settings.
+
+Only views that opt in by setting ``use_replica = True`` read from the
+replica, and only for GET, HEAD and OPTIONS. See `ReplicaMiddleware`.
+Everything else, and everything written, goes to "default".
+
+To read your own writes: after a request with any other method, the client
+gets a cookie that keeps its reads on "default" for
+EASYDMP_REPLICA_STICKY_SECONDS, long enough for the replica to catch up.
+Within a request, reads also go to "default" once anything has been
+written, or inside a transaction. Streamed responses read from the same
+database while their content is sent.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+
+
+__all__ = [
+    'STICKY_COOKIE',
+    'ReplicaRouter',
+    'get_replica_alias',
+    'get_sticky_seconds',
+    'reading_from_replica',
+]
+
+REPLICA = 'replica'
+STICKY_COOKIE = 'easydmp_primary'
+
+_current = ContextVar('easydmp_replica_state', default=None)
+
+
+class _State:
+
+    def __init__(self, active):
+        self.active = active
+        self.written = False
+
+
+def get_replica_alias():
+    "Get the alias of the replica, None if there is none"
+    alias = getattr(settings, 'EASYDMP_REPLICA_DATABASE', REPLICA)
+    return alias if alias in settings.DATABASES else None
+
+
+def get_sticky_seconds():
+    return getattr(settings, 'EASYDMP_REPLICA_STICKY_SECONDS', 10)
+
+
+@contextmanager
+def reading_from_replica(active=True, state=None):
+    """Let `ReplicaRouter` send the reads inside the block to the replica
+
+    Set ``.active`` of the yielded object to turn it on or off later. Pass
+    it as `state` to continue where an earlier block left off.
+    """
+    if state is None:
+        state = _State(active)
+    token = _current.set(state)
+    try:
+        yield state
+    finally:
+        _current.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        if state is None or not state.active or state.written:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return get_replica_alias()
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        if state is not None:
+            state.written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both databases have the same rows, eventually
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == get_replica_alias():
+            return False
+        return None
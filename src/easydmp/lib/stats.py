@@ -1,5 +1,17 @@
+"""Statistics about plans and users
+
+Everything is counted by the database, so that it stays fast with millions
+of rows. Use `get_stats()` and `get_series()` rather than `stats()` and
+`series()` in views, they cache the results for
+EASYDMP_STATS_CACHE_TIMEOUT seconds.
+"""
+
 from datetime import timedelta
 
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Value
+from django.db.models.functions import StrIndex, Substr, TruncMonth
 from django.utils.timezone import now as tznow
 
 from easydmp.auth.models import User
@@ -8,38 +20,119 @@ from easydmp.plan.models import Plan
 
 __all__ = [
     'stats',
+    'series',
+    'get_stats',
+    'get_series',
 ]
 
 
-def _get_user_email_domains(user_qs):
-    emails = user_qs.filter(email__contains='@').values_list('email', flat=True)
-    domains = set([email.rsplit('@', 1)[1] for email in emails])
-    return domains
+def _get_timeout():
+    return getattr(settings, 'EASYDMP_STATS_CACHE_TIMEOUT', 15 * 60)
+
+
+def _count_users_and_domains(since):
+    recent = Q(date_joined__gte=since)
+    # The domain is everything after the first "@"
+    domain = Substr('email', StrIndex('email', Value('@')) + 1)
+    users = User.objects.aggregate(
+        all=Count('pk'),
+        last_30days=Count('pk', filter=recent),
+    )
+    domains = (
+        User.objects
+        .filter(email__contains='@')
+        .annotate(domain=domain)
+        .aggregate(
+            all=Count('domain', distinct=True),
+            last_30days=Count('domain', distinct=True, filter=recent),
+        )
+    )
+    return users, domains
 
 
 def stats():
     """
     Collect some statistics about plans and users
     """
-    all_users = User.objects.all()
-    all_plans = Plan.objects.all()
+    last_30days = tznow() - timedelta(days=30)
+    users, domains = _count_users_and_domains(last_30days)
+    plans = Plan.objects.aggregate(
+        all=Count('pk'),
+        last_30days=Count('pk', filter=Q(added__gte=last_30days)),
+    )
+    return {
+        'users': users,
+        'plans': plans,
+        'domains': domains,
+    }
+
+
+def _per_month(queryset, field, count):
+    rows = (
+        queryset
+        .annotate(month=TruncMonth(field))
+        .values('month')
+        .annotate(count=count)
+        .order_by('month')
+    )
+    return [
+        {'month': row['month'].strftime('%Y-%m'), 'count': row['count']}
+        for row in rows
+    ]
+
 
-    now = tznow()
-    last_30days = now - timedelta(days=30)
-    last_30days_users = User.objects.filter(date_joined__gte=last_30days)
-    last_30days_plans = Plan.objects.filter(added__gte=last_30days)
+def _get_start_of_month(now, months_ago):
+    "Get the start of the month <months_ago> calendar months before <now>"
+    year, month = divmod(now.year * 12 + now.month - 1 - months_ago, 12)
+    return now.replace(
+        year=year, month=month + 1,
+        day=1, hour=0, minute=0, second=0, microsecond=0,
+    )
 
+
+def series(months=12):
+    """
+    Collect statistics per month for the last <months> months
+
+    Active editors are the users that last changed a plan that month.
+    """
+    since = _get_start_of_month(tznow(), months - 1)
+    published_per_template = (
+        Plan.objects
+        .filter(published__isnull=False)
+        .values('template_id')
+        .annotate(count=Count('pk'))
+        .order_by('-count', 'template_id')
+    )
     return {
-        'users': {
-            'all': all_users.count(),
-            'last_30days': last_30days_users.count(),
-        },
-        'plans': {
-            'all': all_plans.count(),
-            'last_30days': last_30days_plans.count(),
-        },
-        'domains': {
-            'all': len(_get_user_email_domains(all_users)),
-            'last_30days': len(_get_user_email_domains(last_30days_users)),
-        },
+        'plans_per_month': _per_month(
+            Plan.objects.filter(added__gte=since), 'added', Count('pk'),
+        ),
+        'active_editors_per_month': _per_month(
+            Plan.objects.filter(modified__gte=since), 'modified',
+            Count('modified_by', distinct=True),
+        ),
+        'published_plans_per_template': [
+            {'template': row['template_id'], 'count': row['count']}
+            for row in published_per_template
+        ],
     }
+
+
+def get_stats():
+    "Like `stats()`, but cached"
+    result = cache.get('easydmp:stats')
+    if result is None:
+        result = stats()
+        cache.set('easydmp:stats', result, _get_timeout())
+    return result
+
+
+def get_series(months=12):
+    "Like `series()`, but cached"
+    key = f'easydmp:stats:series:{months}'
+    result = cache.get(key)
+    if result is None:
+        result = series(months)
+        cache.set(key, result, _get_timeout())
+    return result
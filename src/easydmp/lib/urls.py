@@ -0,0 +1,65 @@
+"""Reversing the same URL pattern for many objects
+
+reverse() walks the URL resolver on every call. When building many links to
+the same view, reverse once with placeholders and fill in the values with
+str.format().
+"""
+
+from functools import lru_cache
+
+from django.urls import reverse, NoReverseMatch
+from django.urls import get_script_prefix, get_urlconf
+
+
+__all__ = [
+    'get_url_format',
+    'reverse_format',
+]
+
+# Integers, since they fit both int and str path converters
+PLACEHOLDER_BASE = 10**18
+
+
+@lru_cache(maxsize=256)
+def _get_url_format(urlconf, script_prefix, viewname, names):
+    placeholders = {name: PLACEHOLDER_BASE + i for i, name in enumerate(names)}
+    try:
+        url = reverse(viewname, urlconf=urlconf, kwargs=placeholders)
+    except NoReverseMatch:
+        return None
+    url = url.replace('{', '{{').replace('}', '}}')
+    for name, placeholder in placeholders.items():
+        placeholder = str(placeholder)
+        if url.count(placeholder) != 1:
+            return None
+        url = url.replace(placeholder, '{%s}' % name)
+    return url
+
+
+def get_url_format(viewname, *names):
+    """Get a format string for the URL of `viewname`
+
+    The URL is reversed with the keyword arguments in `names`, each is
+    replaced by a `{name}` slot. Returns None if that is not possible.
+    """
+    return _get_url_format(get_urlconf(), get_script_prefix(), viewname,
+                           tuple(sorted(names)))
+
+
+def _is_digits(value):
+    # Placeholders are made of digits, so these pass the same converters
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def reverse_format(viewname, **kwargs):
+    """Like reverse(viewname, kwargs=kwargs) but cached
+
+    Only non-negative integers are filled in directly. Other values must be
+    checked by the path converters, so they are reversed the slow way.
+    """
+    if not all(_is_digits(value) for value in kwargs.values()):
+        return reverse(viewname, kwargs=kwargs)
+    url_format = get_url_format(viewname, *kwargs)
+    if url_format is None:
+        return reverse(viewname, kwargs=kwargs)
+    return url_format.format(**kwargs)
@@ -1,3 +1,9 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from django.views.generic.edit import FormMixin
 
 from ..forms import DeleteForm
@@ -7,3 +13,74 @@ class DeleteFormMixin(FormMixin):
     # FormMixin needed in order to use a proper form in the
     # confirmation step. A DeleteView just needs a POST.
     form_class = DeleteForm
+
+
+class KeysetPaginationMixin:
+    """Paginate a ListView by the values of the last row shown
+
+    Unlike page numbers, fetching a page deep into the list costs the same as
+    fetching the first page: there is no OFFSET and no COUNT(*).
+
+    Set ``keyset_ordering`` to an ordering that is unique per row, for
+    instance by ending it with the primary key. The queryset is ordered by
+    it. The cursor for the next page is in the context as ``next_cursor``,
+    and is read back from the GET-parameter named by ``cursor_param``.
+    """
+    keyset_ordering = ('-pk',)
+    cursor_param = 'after'
+    paginate_by = 100
+
+    def _get_keyset_fields(self):
+        return [(field.lstrip('-'), field.startswith('-')) for field in self.keyset_ordering]
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, name) for name, _ in self._get_keyset_fields()]
+        # str() keeps the microseconds of datetimes, DjangoJSONEncoder doesn't
+        blob = json.dumps(values, default=str).encode('utf-8')
+        return urlsafe_base64_encode(blob)
+
+    def decode_cursor(self, cursor, model):
+        try:
+            values = json.loads(urlsafe_base64_decode(cursor))
+        except ValueError:
+            raise Http404('Invalid cursor')
+        fields = self._get_keyset_fields()
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise Http404('Invalid cursor')
+        opts = model._meta
+        try:
+            return [
+                opts.get_field(name if name != 'pk' else opts.pk.name).to_python(value)
+                for (name, _), value in zip(fields, values)
+            ]
+        except ValidationError:
+            raise Http404('Invalid cursor')
+
+    def filter_after(self, queryset, values):
+        "Only keep rows that sort after the row with the given key values"
+        after = Q()
+        equal = Q()
+        for (name, descending), value in zip(self._get_keyset_fields(), values):
+            lookup = 'lt' if descending else 'gt'
+            after |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return queryset.filter(after)
+
+    def paginate_queryset(self, queryset, page_size):
+        queryset = queryset.order_by(*self.keyset_ordering)
+        cursor = self.request.GET.get(self.cursor_param)
+        if cursor:
+            queryset = self.filter_after(queryset, self.decode_cursor(cursor, queryset.model))
+        # Fetch one extra row to find out whether there is a next page
+        object_list = list(queryset[:page_size + 1])
+        has_next = len(object_list) > page_size
+        object_list = object_list[:page_size]
+        self.next_cursor = self.encode_cursor(object_list[-1]) if has_next else None
+        return (None, None, object_list, has_next)
+
+    def get_context_data(self, **kwargs):
+        self.next_cursor = None
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.next_cursor
+        context['cursor_param'] = self.cursor_param
+        return context
@@ -41,8 +41,29 @@ class AnswerSetSectionFilter(admin.SimpleListFilter):
         return queryset
 
 
+class AnswerSetAdminForm(forms.ModelForm):
+    # Not model fields, see AnswerSet.save_payload()
+    data = forms.JSONField(required=False)
+    previous_data = forms.JSONField(required=False)
+
+    class Meta:
+        model = AnswerSet
+        exclude = ['payload']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field in AnswerSet.PAYLOAD_FIELDS:
+            self.initial[field] = getattr(self.instance, field)
+
+    def save(self, commit=True):
+        for field in AnswerSet.PAYLOAD_FIELDS:
+            setattr(self.instance, field, self.cleaned_data[field] or {})
+        return super().save(commit)
+
+
 @admin.register(AnswerSet)
 class AnswerSetAdmin(AdminConvenienceMixin, admin.ModelAdmin):
+    form = AnswerSetAdminForm
     list_display = ['plan', 'section', 'identifier']
     list_filter = [
         'section__template',
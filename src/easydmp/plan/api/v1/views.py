@@ -140,7 +140,7 @@ class PlanSerializer(serializers.HyperlinkedModelSerializer):
         sections = obj.template.sections.prefetch_related('answersets')
         outdict = {}
         for section in sections:
-            answerset = section.answersets.filter(plan=obj).order_by('pk').first()
+            answerset = section.answersets.filter(plan=obj).with_answers().order_by('pk').first()
             if answerset:
                 outdict.update(**answerset.data)
         return outdict
@@ -149,7 +149,7 @@ class PlanSerializer(serializers.HyperlinkedModelSerializer):
         sections = obj.template.sections.prefetch_related('answersets')
         outdict = {}
         for section in sections:
-            answerset = section.answersets.filter(plan=obj).order_by('pk').first()
+            answerset = section.answersets.filter(plan=obj).with_answers().order_by('pk').first()
             if answerset:
                 outdict.update(**answerset.previous_data)
         return outdict
@@ -1,11 +1,11 @@
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
-from rest_framework.reverse import reverse
 
 from easydmp.lib.api.serializers import SelfHyperlinkedModelSerializer
 from easydmp.lib.api.serializers import SelfModelSerializer
 from easydmp.lib.api.serializers import SelfHyperlinkedRelatedField
+from easydmp.lib.api.serializers import reverse_format
 from easydmp.plan.models import Plan
 from easydmp.plan.models import AnswerSet
 from easydmp.plan.models import Answer
@@ -74,15 +74,16 @@ class LightPlanSerializer(SelfHyperlinkedModelSerializer):
             'published',
         ]
 
+    def _get_export_url(self, obj, format):
+        return reverse_format('v2:plan-export', self.context['request'], format, pk=obj.id)
+
     @extend_schema_field(OpenApiTypes.URI)
     def get_generated_html_url(self, obj):
-        return reverse('v2:plan-export', kwargs={'pk': obj.id, 'format': 'html'},
-                       request=self.context['request'])
+        return self._get_export_url(obj, 'html')
 
     @extend_schema_field(OpenApiTypes.URI)
     def get_generated_pdf_url(self, obj):
-        return reverse('v2:plan-export', kwargs={'pk': obj.id, 'format': 'pdf'},
-                       request=self.context['request'])
+        return self._get_export_url(obj, 'pdf')
 
 
 class HeavyPlanSerializer(LightPlanSerializer):
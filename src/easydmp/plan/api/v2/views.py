@@ -1,6 +1,7 @@
 from django.db import IntegrityError
+from django.db.models import Prefetch
 
-from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.rest_framework import CharFilter, DjangoFilterBackend
 from django_filters.rest_framework.filterset import FilterSet
 from drf_spectacular.utils import extend_schema
 from rest_framework.decorators import action
@@ -15,7 +16,7 @@ from easydmp.lib.api.pagination import ToggleablePageNumberPaginationV2
 from easydmp.lib.api.renderers import StaticPlaintextRenderer, HTML2PDFRenderer
 from easydmp.lib.api.response_exceptions import DRFIntegrityError
 from easydmp.lib.api.serializers import URLSerializer
-from easydmp.lib.api.viewsets import AnonReadOnlyModelViewSet
+from easydmp.lib.api.viewsets import AnonReadOnlyModelViewSet, StreamingListMixin
 from easydmp.lib.import_export import get_export_from_url
 from easydmp.plan.export_plan import serialize_plan_export, SingleVersionExportSerializer
 from easydmp.plan.import_plan import (
@@ -78,6 +79,7 @@ def _import_rdadcs_plan(request, export_dict):
 
 
 class PlanFilter(FilterSet):
+    fulltext = CharFilter(method='filter_fulltext', label='Full text search of the answers')
 
     class Meta:
         model = Plan
@@ -90,8 +92,11 @@ class PlanFilter(FilterSet):
             'valid': ['exact'],
         }
 
+    def filter_fulltext(self, queryset, name, value):
+        return queryset.search(value)
 
-class PlanViewSet(AnonReadOnlyModelViewSet):
+
+class PlanViewSet(StreamingListMixin, AnonReadOnlyModelViewSet):
     filter_class = PlanFilter
     search_fields = ['=id', 'title', '=abbreviation', 'search_data']
     serializer_class = serializers.HeavyPlanSerializer
@@ -109,11 +114,14 @@ class PlanViewSet(AnonReadOnlyModelViewSet):
         return serializers.LightPlanSerializer
 
     def get_queryset(self):
-        qs = Plan.objects.all()
-        if self.request.user.is_authenticated:
-            pas = self.request.user.plan_accesses.all()
-            qs = qs | Plan.objects.filter(accesses__in=pas)
-        return qs.distinct()
+        qs = Plan.objects.order_by('-added', '-id')
+        if self.action == 'retrieve':
+            # Matches the nesting in HeavyPlanSerializer
+            qs = qs.prefetch_related(
+                Prefetch('answersets', queryset=AnswerSet.objects.with_answers()),
+                'answersets__answers',
+            )
+        return qs
 
     @extend_schema(responses=None)
     @action(detail=True, methods=['get'], url_path="export/rda", renderer_classes=[JSONRenderer])
@@ -231,12 +239,13 @@ class AnswerSetFilter(FilterSet):
         }
 
 
-class AnswerSetViewSet(AnonReadOnlyModelViewSet):
+class AnswerSetViewSet(StreamingListMixin, AnonReadOnlyModelViewSet):
     filter_class = AnswerSetFilter
     serializer_class = serializers.AnswerSetSerializer
-    queryset = AnswerSet.objects.order_by('pk')
+    # Matches the nesting in AnswerSetSerializer
+    queryset = AnswerSet.objects.with_answers().order_by('pk').prefetch_related('answers')
     pagination_class = ToggleablePageNumberPaginationV2
-    search_fields = ['data', 'previous_data']
+    search_fields = ['payload__data', 'payload__previous_data']
 
 
 class AnswerFilter(FilterSet):
@@ -254,7 +263,7 @@ class AnswerFilter(FilterSet):
         }
 
 
-class AnswerViewSet(AnonReadOnlyModelViewSet):
+class AnswerViewSet(StreamingListMixin, AnonReadOnlyModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filter_class = AnswerFilter
     serializer_class = serializers.AnswerSerializer
@@ -1,5 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def reinstall_search_index(sender, using, **kwargs):
+    # Rebuilding a table in SQLite drops its triggers
+    from django.db import connections
+    from .search import install_search_index
+
+    install_search_index(connections[using])
 
 
 class EasyDMPPlanConfig(AppConfig):
     name = 'easydmp.plan'
+
+    def ready(self):
+        post_migrate.connect(reinstall_search_index, sender=self)
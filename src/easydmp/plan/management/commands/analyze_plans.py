@@ -53,7 +53,7 @@ class Command(BaseCommand):
                     f'\tSection {section.position} ({section.id}) has '
                     f'{question_ids.count()} questions'
                 )
-                for answerset in plan.answersets.filter(section=section):
+                for answerset in plan.answersets.filter(section=section).with_answers():
                     answer_ids = set(map(int, answerset.data.keys()))
                     answered_in_answerset = set(tuple(question_ids)) & answer_ids
                     report.append('\tAnswerset "{}": {}'.format(
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from easydmp.plan.models import Plan, AnswerSetRepair
+
+
+class Command(BaseCommand):
+    help = "Make the answersets of plans fit the sections of their templates"
+
+    def add_arguments(self, parser):
+        parser.add_argument('-t', '--template', nargs='+', type=int, default=[],
+                            help='Only repair plans using the specific templates (id)')
+        parser.add_argument('-p', '--plan', nargs='+', type=int, default=[],
+                            help='Only repair the specific plans (id)')
+        parser.add_argument('-b', '--batch-size', type=int, default=500,
+                            help='Number of plans to repair per transaction')
+        parser.add_argument('-n', '--dry-run', action='store_true',
+                            help='Only report which plans need repair')
+
+    def get_batches(self, plan_qs, batch_size):
+        plan_qs = plan_qs.only('id', 'template_id').order_by('pk')
+        last_pk = 0
+        while True:
+            batch = list(plan_qs.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                return
+            yield batch
+            last_pk = batch[-1].pk
+
+    def handle(self, *args, **options):
+        plan_qs = Plan.objects.all()
+        if options['plan']:
+            plan_qs = plan_qs.filter(id__in=options['plan'])
+        if options['template']:
+            plan_qs = plan_qs.filter(template_id__in=options['template'])
+        dry_run = options['dry_run']
+        verbosity = options['verbosity']
+
+        num_plans = 0
+        num_changed = 0
+        for batch in self.get_batches(plan_qs, options['batch_size']):
+            with transaction.atomic():
+                for plan in batch:
+                    repair = AnswerSetRepair(plan)
+                    changed = repair.run(dry_run=dry_run)
+                    if changed:
+                        num_changed += 1
+                        if verbosity > 1:
+                            self.stdout.write(
+                                f'Plan {plan.pk}: {len(repair.to_create)} missing, '
+                                f'{len(repair.to_unskip)} wrongly skipped, '
+                                f'{len(repair.to_delete)} superfluous answersets'
+                            )
+            num_plans += len(batch)
+        verb = 'need repair' if dry_run else 'repaired'
+        self.stdout.write(f'{num_changed} of {num_plans} plans {verb}')
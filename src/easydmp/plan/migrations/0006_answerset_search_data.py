@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+from easydmp.lib import dump_obj_to_searchable_string
+from easydmp.plan.search import install_search_index, uninstall_search_index
+
+
+def populate_answerset_search_data(apps, _):
+    AnswerSet = apps.get_model('plan', 'AnswerSet')
+    batch = []
+    for answerset in AnswerSet.objects.only('id', 'data').iterator(chunk_size=1000):
+        answerset.search_data = dump_obj_to_searchable_string(answerset.data)
+        batch.append(answerset)
+        if len(batch) >= 1000:
+            AnswerSet.objects.bulk_update(batch, ['search_data'])
+            batch = []
+    AnswerSet.objects.bulk_update(batch, ['search_data'])
+
+
+def install_index(_, schema_editor):
+    install_search_index(schema_editor.connection)
+
+
+def uninstall_index(_, schema_editor):
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plan', '0005_answerset_plan_answerset_skipped_never_false'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answerset',
+            name='search_data',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(populate_answerset_search_data, migrations.RunPython.noop),
+        migrations.RunPython(install_index, uninstall_index),
+    ]
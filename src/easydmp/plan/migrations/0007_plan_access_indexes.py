@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-18 21:48
+
+from django.db import migrations, models
+
+
+# Covers the subqueries of PlanQuerySet.editable/viewable. Only PostgreSQL
+# supports included columns, elsewhere the unique index on (user, plan) has
+# to do. Not in PlanAccess.Meta.indexes since Django warns about the
+# include on other databases (models.W040).
+
+def create_covering_index(_, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS plan_access_user_plan_idx '
+            'ON plan_planaccess (user_id, plan_id) INCLUDE (may_edit)'
+        )
+
+
+def drop_covering_index(_, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS plan_access_user_plan_idx')
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plan', '0006_answerset_search_data'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='plan',
+            index=models.Index(fields=['added', 'id'], name='plan_added_id_idx'),
+        ),
+        migrations.RunPython(create_covering_index, drop_covering_index),
+    ]
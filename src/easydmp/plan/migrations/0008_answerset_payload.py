@@ -0,0 +1,94 @@
+# Generated by Django 3.2.25 on 2026-10-18 23:02
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def move_answers_to_payloads(apps, schema_editor):
+    AnswerSet = apps.get_model('plan', 'AnswerSet')
+    AnswerSetPayload = apps.get_model('plan', 'AnswerSetPayload')
+    bulk = schema_editor.connection.features.can_return_rows_from_bulk_insert
+    answersets = (
+        AnswerSet.objects
+        .exclude(data={}, previous_data={})
+        .only('id', 'data', 'previous_data', 'search_data')
+        .iterator(chunk_size=1000)
+    )
+    batch = []
+
+    def flush():
+        payloads = [
+            AnswerSetPayload(
+                data=answerset.data,
+                previous_data=answerset.previous_data,
+                search_data=answerset.search_data,
+            )
+            for answerset in batch
+        ]
+        if bulk:
+            AnswerSetPayload.objects.bulk_create(payloads)
+        else:
+            for payload in payloads:
+                payload.save()
+        for answerset, payload in zip(batch, payloads):
+            answerset.payload = payload
+        AnswerSet.objects.bulk_update(batch, ['payload'])
+        batch.clear()
+
+    for answerset in answersets:
+        batch.append(answerset)
+        if len(batch) >= 1000:
+            flush()
+    flush()
+
+
+def move_answers_from_payloads(apps, _):
+    AnswerSet = apps.get_model('plan', 'AnswerSet')
+    batch = []
+    for answerset in AnswerSet.objects.filter(payload__isnull=False).select_related('payload').iterator(chunk_size=1000):
+        answerset.data = answerset.payload.data
+        answerset.previous_data = answerset.payload.previous_data
+        answerset.search_data = answerset.payload.search_data
+        batch.append(answerset)
+        if len(batch) >= 1000:
+            AnswerSet.objects.bulk_update(batch, ['data', 'previous_data', 'search_data'])
+            batch = []
+    AnswerSet.objects.bulk_update(batch, ['data', 'previous_data', 'search_data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plan', '0007_plan_access_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnswerSetPayload',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('previous_data', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('search_data', models.TextField(blank=True, default='')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='answerset',
+            name='payload',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='answersets', to='plan.answersetpayload'),
+        ),
+        migrations.RunPython(move_answers_to_payloads, move_answers_from_payloads),
+        migrations.RemoveField(
+            model_name='answerset',
+            name='data',
+        ),
+        migrations.RemoveField(
+            model_name='answerset',
+            name='previous_data',
+        ),
+        migrations.RemoveField(
+            model_name='answerset',
+            name='search_data',
+        ),
+    ]
@@ -11,10 +11,11 @@ from uuid import uuid4
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
 from django.db import models
 from django.db import transaction
 from django.forms import model_to_dict
-from django.db.models import Q, Count
+from django.db.models import Q, Count, Exists, OuterRef, Value
 from django.template.loader import render_to_string
 from django.utils.safestring import mark_safe
 from django.utils.timezone import now as tznow
@@ -22,6 +23,7 @@ from django.utils.timezone import now as tznow
 from easydmp.constants import NotSet
 from easydmp.dmpt.forms import make_form, NotesForm
 from easydmp.dmpt.export_template import create_template_export_obj
+from easydmp.dmpt.models import Question, Section
 from easydmp.dmpt.models.base import get_section_meta_summary
 from easydmp.dmpt.utils import DeletionMixin, make_qid
 from easydmp.eventlog.utils import log_event
@@ -29,6 +31,8 @@ from easydmp.lib import dump_obj_to_searchable_string
 from easydmp.lib.import_export import get_origin
 from easydmp.lib.models import ClonableModel
 
+from .permissions import forget_plan_permissions
+from .search import JoinSearchData, search_plans
 from .utils import purge_answer
 from .utils import get_editors_for_plan
 
@@ -68,7 +72,7 @@ def create_plan_export_obj(plan, variant, include_template=True, comment=''):
     obj.metadata = metadata
 
     obj.plan = plan
-    obj.answersets = plan.answersets.all()
+    obj.answersets = plan.answersets.with_answers()
 
     answers = Answer.objects.filter(answerset__in=obj.answersets)
     obj.answers = answers
@@ -76,6 +80,41 @@ def create_plan_export_obj(plan, variant, include_template=True, comment=''):
     return obj
 
 
+def render_canned_text(plan, answersets=None):
+    """Render the canned text of every answer in the answersets of a plan
+
+    The questions of the template, with their canned answers, are loaded
+    once instead of once per answerset.
+
+    Returns a dict of answerset id to the output of
+    `Section.generate_canned_text`.
+    """
+    if answersets is None:
+        answersets = plan.answersets.with_answers().select_related('section')
+    questions = defaultdict(list)
+    question_qs = (
+        Question.objects
+        .filter(section__template_id=plan.template_id)
+        .order_by('section', 'position')
+        .prefetch_related('canned_answers')
+        .typed()
+    )
+    for question in question_qs:
+        questions[question.section_id].append(question)
+    skipped = {}
+    texts = {}
+    for answerset in answersets:
+        section = answerset.section
+        if section.pk not in skipped:
+            skipped[section.pk] = section.is_skipped
+        texts[answerset.pk] = section.generate_canned_text(
+            answerset.data,
+            questions=questions[section.pk],
+            is_skipped=skipped[section.pk],
+        )
+    return texts
+
+
 def _ensure_possible_answerset(section, plan, answerset_parent=None):
     error_message = None
     if plan.template != section.template:
@@ -139,7 +178,7 @@ def remove_extraneous_answersets_for_singleton_sections(section, answersets):
     except AnswerSet.MultipleObjectsReturned:
         # Try deleting extras
         num_answersets = answersets.count()
-        empties = answersets.filter(data={})
+        empties = answersets.without_data()
         num_empties = empties.count()
         if num_answersets > num_empties:
             empties.delete()
@@ -181,10 +220,196 @@ def fix_answersets(section, plan, answerset_parent=None):
 
 
 def fix_all_answersets(plan):
-    plan.add_missing_answersets()
-    for section in plan.template.sections.filter(super_section__isnull=True):
-        for answerset in plan.answersets.filter(section=section):
-            answerset.fix_children()
+    return AnswerSetRepair(plan).run()
+
+
+# START: set-based answerset repair
+
+class AnswerSetRepair:
+    """Make the answersets of a plan fit the section tree of its template
+
+    The expected answersets are calculated in memory from the sections of the
+    template and the existing answersets, using the same rules as
+    `fix_answersets`. Then the missing answersets are created, the wrongly
+    skipped are unskipped and the superfluous are deleted, in bulk. A plan
+    that is already consistent costs two queries.
+
+    If `purge` is False, missing answersets are created but nothing else is
+    changed.
+    """
+
+    def __init__(self, plan, purge=True):
+        self.plan = plan
+        self.purge = purge
+        self.to_create = []
+        self.to_unskip = set()
+        self.to_delete = set()
+        self.num_created = 0
+
+    @property
+    def changed(self):
+        return bool(self.to_create or self.to_unskip or self.to_delete)
+
+    def load(self):
+        sections = (
+            Section.objects
+            .filter(template_id=self.plan.template_id)
+            .only('id', 'super_section_id', 'position', 'optional', 'repeatable')
+            .order_by('position', 'id')
+        )
+        self.topmost_sections = []
+        self.subsections = defaultdict(list)
+        for section in sections:
+            if section.super_section_id is None:
+                self.topmost_sections.append(section)
+            else:
+                self.subsections[section.super_section_id].append(section)
+        answersets = (
+            AnswerSet.objects
+            .filter(plan_id=self.plan.pk)
+            .only('id', 'section_id', 'parent_id', 'skipped', 'identifier')
+            .order_by('pk')
+        )
+        self.groups = defaultdict(list)
+        self.identifiers = defaultdict(set)
+        for answerset in answersets:
+            self.groups[(answerset.section_id, answerset.parent_id)].append(answerset)
+            self.identifiers[answerset.section_id].add(answerset.identifier)
+
+    def check(self):
+        "Find what needs to be changed"
+        for section in self.topmost_sections:
+            self.check_section(section)
+
+    def check_section(self, section, parent_id=None):
+        answersets = self.groups.get((section.id, parent_id))
+        if not answersets:
+            self.to_create.append((section, parent_id))
+            return
+        if self.purge:
+            answersets = self.purge_wrongly_skipped(section, answersets)
+            answersets = self.remove_extraneous(section, answersets)
+        for answerset in answersets:
+            for subsection in self.subsections[section.id]:
+                self.check_section(subsection, answerset.id)
+
+    def purge_wrongly_skipped(self, section, answersets):
+        "See `purge_wrongly_skipped_answersets`"
+        skipped = [answerset for answerset in answersets if answerset.skipped]
+        if not skipped:
+            return answersets
+        unskipped = [answerset for answerset in answersets if not answerset.skipped]
+        if unskipped:
+            self.to_delete.update(answerset.id for answerset in skipped)
+            return unskipped
+        answerset, *extra = skipped
+        self.to_delete.update(answerset.id for answerset in extra)
+        if not section.optional:
+            self.to_unskip.add(answerset.id)
+        return [answerset]
+
+    def remove_extraneous(self, section, answersets):
+        "See `remove_extraneous_answersets_for_singleton_sections`"
+        if section.repeatable or len(answersets) < 2:
+            return answersets
+        empties = set(
+            AnswerSet.objects
+            .filter(pk__in=[answerset.id for answerset in answersets])
+            .without_data()
+            .values_list('pk', flat=True)
+        )
+        if len(empties) == len(answersets):
+            answerset, *extra = answersets
+            self.to_delete.update(answerset.id for answerset in extra)
+            return [answerset]
+        self.to_delete.update(empties)
+        answersets = [answerset for answerset in answersets if answerset.id not in empties]
+        if len(answersets) > 1:
+            # We can't know which to delete so leave them be
+            LOG.warning('Plan %i: section %i has %i answersets with data, should have one',
+                        self.plan.pk, section.id, len(answersets))
+        return answersets
+
+    def get_identifier(self, section):
+        "See `AnswerSet.generate_next_identifier`"
+        used = self.identifiers[section.id]
+        count = len(used)
+        while str(count + 1) in used:
+            count += 1
+        identifier = str(count + 1)
+        used.add(identifier)
+        return identifier
+
+    def create(self, missing):
+        answersets = [
+            AnswerSet(
+                plan_id=self.plan.pk,
+                section=section,
+                parent_id=parent_id,
+                identifier=self.get_identifier(section),
+                skipped=True if section.optional else None,
+                valid=False,
+            )
+            for section, parent_id in missing
+        ]
+        AnswerSet.objects.bulk_create(answersets)
+        if any(answerset.pk is None for answerset in answersets):
+            # Not every database returns the new primary keys
+            lookup = {
+                (answerset.section_id, answerset.parent_id, answerset.identifier): answerset
+                for answerset in answersets
+            }
+            rows = (
+                AnswerSet.objects
+                .filter(plan_id=self.plan.pk, section_id__in={key[0] for key in lookup})
+                .values_list('pk', 'section_id', 'parent_id', 'identifier')
+            )
+            for pk, *key in rows:
+                answerset = lookup.get(tuple(key))
+                if answerset is not None:
+                    answerset.pk = pk
+        questions = (
+            Question.objects
+            .filter(section_id__in={answerset.section_id for answerset in answersets})
+            .values_list('pk', 'section_id')
+        )
+        questions_by_section = defaultdict(list)
+        for question_id, section_id in questions:
+            questions_by_section[section_id].append(question_id)
+        Answer.objects.bulk_create(
+            Answer(answerset_id=answerset.pk, question_id=question_id)
+            for answerset in answersets
+            for question_id in questions_by_section[answerset.section_id]
+        )
+        self.num_created += len(answersets)
+        return answersets
+
+    @transaction.atomic
+    def apply(self):
+        "Make the changes found by `check`"
+        if self.to_delete:
+            AnswerSet.objects.filter(pk__in=self.to_delete).delete()
+        if self.to_unskip:
+            AnswerSet.objects.filter(pk__in=self.to_unskip).update(skipped=None)
+        missing = self.to_create
+        while missing:
+            created = self.create(missing)
+            # New answersets need all their children
+            missing = [
+                (subsection, answerset.pk)
+                for answerset in created
+                for subsection in self.subsections[answerset.section_id]
+            ]
+
+    def run(self, dry_run=False):
+        "Repair the plan, return whether anything needed to be changed"
+        self.load()
+        self.check()
+        if self.changed and not dry_run:
+            self.apply()
+        return self.changed
+
+# END: set-based answerset repair
 
 
 def add_answerset(section, plan, answerset):
@@ -381,8 +606,139 @@ AnswerSetParentKey = namedtuple('AnswerSetParentKey', 'plan_id section_id parent
 AnswerSetSectionKey = namedtuple('AnswerSetSectionKey', 'plan_id section_id')
 
 
+class AnswerSetPayloadQuerySet(models.QuerySet):
+
+    def unused(self):
+        "Payloads that no answerset uses any more"
+        return self.filter(answersets__isnull=True)
+
+
+class AnswerSetPayload(models.Model):
+    """The answers of one or more answersets
+
+    New versions of a plan share the payloads of the old version, an
+    answerset only gets a payload of its own when its answers change. Read
+    and write the answers via `AnswerSet.data` and `AnswerSet.previous_data`.
+    """
+    # The user's answers, represented as a Question PK keyed dict in JSON.
+    data = models.JSONField(default=dict, encoder=DjangoJSONEncoder, blank=True)
+    previous_data = models.JSONField(default=dict, encoder=DjangoJSONEncoder, blank=True)
+    # The answerset's contribution to Plan.search_data
+    search_data = models.TextField(blank=True, default='')
+
+    objects = AnswerSetPayloadQuerySet.as_manager()
+
+    def __str__(self):
+        return f'Payload #{self.pk}'
+
+
+def delete_unused_payloads(payload_ids):
+    "Delete the payloads in <payload_ids> that no answerset uses any more"
+    payload_ids = set(payload_ids) - {None}
+    if payload_ids:
+        AnswerSetPayload.objects.filter(pk__in=payload_ids).unused().delete()
+
+
+def save_payloads(answersets):
+    """Store the changed answers of <answersets> in their payloads
+
+    A payload is only changed in place if no other answerset uses it,
+    otherwise the answerset gets a new payload: copy on write. The payloads
+    are locked before checking, so that a plan cloned meanwhile cannot start
+    sharing them. The number of queries does not depend on the number of
+    answersets.
+    """
+    touched = [answerset for answerset in answersets if answerset._answers]
+    payload_field = AnswerSet._meta.get_field('payload')
+    not_loaded = {answerset.payload_id for answerset in touched
+                  if answerset.payload_id and not payload_field.is_cached(answerset)}
+    if not_loaded:
+        payloads = AnswerSetPayload.objects.in_bulk(not_loaded)
+        for answerset in touched:
+            if answerset.payload_id in not_loaded:
+                answerset.payload = payloads.get(answerset.payload_id)
+    changed = [answerset for answerset in touched if answerset.answers_have_changed()]
+    if not changed:
+        return
+
+    with transaction.atomic():
+        payload_ids = {answerset.payload_id for answerset in changed} - {None}
+        unshared = set()
+        if payload_ids:
+            unshared = set(
+                AnswerSetPayload.objects
+                .select_for_update()
+                .filter(pk__in=payload_ids)
+                .order_by('pk')
+                .values_list('pk', flat=True)
+            )
+            unshared -= set(
+                AnswerSet.objects
+                .filter(payload_id__in=payload_ids)
+                .exclude(pk__in=[answerset.pk for answerset in changed if answerset.pk])
+                .values_list('payload_id', flat=True)
+            )
+        to_update, to_create = [], []
+        payloads = []
+        for answerset in changed:
+            if answerset.payload_id in unshared:
+                # Answersets in the same batch may share it too
+                unshared.remove(answerset.payload_id)
+                payload = answerset.payload
+                to_update.append(payload)
+            else:
+                payload = AnswerSetPayload()
+                to_create.append(payload)
+            payload.data = deepcopy(answerset.data)
+            payload.previous_data = deepcopy(answerset.previous_data)
+            payload.search_data = dump_obj_to_searchable_string(answerset.data)
+            payloads.append(payload)
+        AnswerSetPayload.objects.bulk_update(to_update, ['data', 'previous_data', 'search_data'])
+        if connection.features.can_return_rows_from_bulk_insert:
+            AnswerSetPayload.objects.bulk_create(to_create)
+        else:
+            # Not every database returns the new primary keys
+            for payload in to_create:
+                payload.save()
+        for answerset, payload in zip(changed, payloads):
+            answerset.payload = payload
+
+
 class AnswerSetQuerySet(models.QuerySet):
 
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        save_payloads(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        fields = set(fields)
+        if fields & AnswerSet.PAYLOAD_FIELDS:
+            objs = list(objs)
+            save_payloads(objs)
+            fields = (fields - AnswerSet.PAYLOAD_FIELDS) | {'payload'}
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    @transaction.atomic
+    def delete(self):
+        # Nested answersets are deleted too, they are in the same plans
+        payload_ids = set(
+            AnswerSet.objects
+            .filter(plan_id__in=self.values('plan_id'))
+            .values_list('payload_id', flat=True)
+        )
+        result = super().delete()
+        delete_unused_payloads(payload_ids)
+        return result
+
+    def with_answers(self):
+        "Load the answers together with the answersets"
+        return self.select_related('payload')
+
+    def without_data(self):
+        "Answersets without any answers"
+        return self.filter(Q(payload__isnull=True) | Q(payload__data={}))
+
     def get_by_natural_key(self, plan_id, parent_id, section_id, identifier):
         return self.get(
             answerset__plan_id=plan_id,
@@ -396,15 +752,17 @@ class AnswerSetQuerySet(models.QuerySet):
 
     # START: optimized answerset access
 
-    def childmap(self):
+    def childmap(self, qs=None):
         mapping = defaultdict(OrderedDict)
-        qs = (
-            self
-            .select_related('section')
-            .only('id', 'parent_id', 'section_id', 'section__position')
-            .order()
-        )
-        for answerset in qs.iterator():
+        if qs is None:
+            qs = (
+                self
+                .select_related('section')
+                .only('id', 'parent_id', 'section_id', 'section__position')
+                .order()
+                .iterator()
+            )
+        for answerset in qs:
             mapping[answerset.parent_id][answerset.id] = answerset.section_id
         return mapping
 
@@ -426,8 +784,8 @@ class AnswerSetQuerySet(models.QuerySet):
     def lookup_map(self):
         child_mapping = self.childmap()
         mapping = {}
-        for answerset in self.iterator():
-            parent_id = answerset.parent.pk if answerset.parent else None
+        for answerset in self.with_answers().iterator():
+            parent_id = answerset.parent_id
             decoration = getattr(answerset, 'decoration', None)
             answersetobj = SimpleNamespace(
                 children=child_mapping[answerset.id],
@@ -440,8 +798,9 @@ class AnswerSetQuerySet(models.QuerySet):
             mapping[answerset.id] = answersetobj
         return mapping
 
-    def map_by_parent_key(self):
-        qs = self.order()
+    def map_by_parent_key(self, qs=None):
+        if qs is None:
+            qs = self.order()
         mapping = defaultdict(list)
         for answerset in qs:
             key = AnswerSetParentKey(answerset.plan_id, answerset.section_id, answerset.parent_id)
@@ -449,6 +808,13 @@ class AnswerSetQuerySet(models.QuerySet):
         result = {k: tuple(v) for k, v in mapping.items()}
         return {k: tuple(v) for k, v in mapping.items()}
 
+    def with_section_has_questions(self):
+        return self.annotate(
+            section_has_questions=Exists(
+                Question.objects.filter(section=OuterRef('section_id'))
+            )
+        )
+
     # END: optimized answerset access
 
 
@@ -463,12 +829,15 @@ class AnswerSet(ClonableModel):
     valid = models.BooleanField(default=False)
     last_validated = models.DateTimeField(auto_now=True)
     skipped = models.BooleanField(null=True, blank=True, help_text='True or None')
-    # The user's answers, represented as a Question PK keyed dict in JSON.
-    data = models.JSONField(default=dict, encoder=DjangoJSONEncoder, blank=True)
-    previous_data = models.JSONField(default=dict, encoder=DjangoJSONEncoder, blank=True)
+    # The answers, possibly shared with other versions of the plan. None if
+    # there are no answers. Use .data and .previous_data, not this.
+    payload = models.ForeignKey(AnswerSetPayload, models.PROTECT, related_name='answersets',
+                                null=True, blank=True)
 
     objects = AnswerSetQuerySet.as_manager()
 
+    PAYLOAD_FIELDS = {'data', 'previous_data'}
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -493,8 +862,71 @@ class AnswerSet(ClonableModel):
             msg = msg + f', valid: {self.valid}'
         return msg
 
+    # START: answers, copied on write
+
+    def _get_answers(self, name):
+        # A copy, so that changes made in place can be told apart
+        if name not in self._answers:
+            answers = getattr(self.payload, name) if self.payload_id else {}
+            self._answers[name] = deepcopy(answers)
+        return self._answers[name]
+
+    @property
+    def _answers(self):
+        return self.__dict__.setdefault('_answers_cache', {})
+
+    @property
+    def data(self) -> dict:
+        return self._get_answers('data')
+
+    @data.setter
+    def data(self, value):
+        self._answers['data'] = value
+
+    @property
+    def previous_data(self) -> dict:
+        return self._get_answers('previous_data')
+
+    @previous_data.setter
+    def previous_data(self, value):
+        self._answers['previous_data'] = value
+
+    def answers_have_changed(self):
+        "Whether the answers differ from those in the payload"
+        if not self.payload_id:
+            return bool(self.data or self.previous_data)
+        payload = self.payload
+        return self.data != payload.data or self.previous_data != payload.previous_data
+
+    def save_payload(self):
+        "Store changed answers in the payload, see `save_payloads()`"
+        save_payloads([self])
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._answers.clear()
+
+    @transaction.atomic
+    def delete(self, *args, **kwargs):
+        # Nested answersets are deleted too, they are in the same plan
+        payload_ids = set(
+            AnswerSet.objects
+            .filter(plan_id=self.plan_id)
+            .values_list('payload_id', flat=True)
+        )
+        result = super().delete(*args, **kwargs)
+        delete_unused_payloads(payload_ids)
+        return result
+
+    # END: answers, copied on write
+
     @transaction.atomic
     def save(self, importing=False, *args, **kwargs):
+        update_fields = kwargs.get('update_fields', None)
+        if update_fields is None or self.PAYLOAD_FIELDS & set(update_fields):
+            self.save_payload()
+            if update_fields is not None:
+                kwargs['update_fields'] = (set(update_fields) - self.PAYLOAD_FIELDS) | {'payload'}
         if importing:
             kwargs.pop('force_insert', None)
             kwargs.pop('force_update', None)
@@ -778,8 +1210,7 @@ class AnswerSet(ClonableModel):
         new = self.__class__.objects.create(
             plan=plan,
             section=self.section,
-            data=self.data,
-            previous_data=self.previous_data,
+            payload_id=self.payload_id,
             valid=self.valid,
             parent=parent,
             last_validated=self.last_validated
@@ -820,12 +1251,16 @@ class AnswerSet(ClonableModel):
             LOG.info('Removed spurious answers from answerset %s', self.id)
             self.validate()
 
-    def validate(self, timestamp: datetime = None) -> bool:
+    def validate(self, timestamp: datetime = None, sections: dict = None) -> bool:
         """
         Validates the answers and persists the validity state on this as well as on related Answers.
 
+        <sections> maps section pks to sections, to reuse their validators.
+
         Returns validity.
         """
+        if sections is not None:
+            self.section = sections[self.section_id]
         if self.skipped and not self.section.optional:  # in case of garbage
             self.skipped = None
 
@@ -839,7 +1274,7 @@ class AnswerSet(ClonableModel):
 
             children = self.answersets.all()
             child_validity = set(
-                child.validate(self.last_validated)
+                child.validate(self.last_validated, sections)
                 for child in children if not child.skipped
             )
             valid = valid and False not in child_validity
@@ -867,6 +1302,167 @@ class AnswerSet(ClonableModel):
             answer.save()
 
 
+class AnswerSetTree:
+    """Navigate between the answersets of a plan without further queries
+
+    All answersets of the plan, with their sections, are loaded with one
+    query. The traversal mirrors the Traversal-methods of AnswerSet, but
+    never creates missing answersets: sections without answersets are
+    skipped.
+    """
+
+    def __init__(self, plan):
+        self.plan = plan
+        answersets = tuple(
+            plan.answersets.order().with_section_has_questions()
+        )
+        self.answersets = {answerset.id: answerset for answerset in answersets}
+
+        # Children and siblings, in the same order as AnswerSet.order()
+        self.children = {
+            parent_id: tuple(children)
+            for parent_id, children in AnswerSet.objects.childmap(answersets).items()
+        }
+        self.child_index = {
+            answerset_id: index
+            for children in self.children.values()
+            for index, answerset_id in enumerate(children)
+        }
+        self.parent_map = AnswerSet.objects.map_by_parent_key(answersets)
+        self.sibling_index = {
+            answerset_id: index
+            for siblings in self.parent_map.values()
+            for index, answerset_id in enumerate(siblings)
+        }
+
+        # Sections in the order of Section.position
+        sections = {}
+        section_answersets = defaultdict(list)
+        self.nonempty_sections = set()
+        for answerset in answersets:
+            sections.setdefault(answerset.section_id, answerset.section)
+            section_answersets[answerset.section_id].append(answerset.id)
+            if answerset.section_has_questions:
+                self.nonempty_sections.add(answerset.section_id)
+        self.section_answersets = {
+            section_id: tuple(sorted(ids))
+            for section_id, ids in section_answersets.items()
+        }
+        ordered_sections = sorted(sections.values(), key=lambda s: (s.position, s.id))
+        self.next_sections = self._link_sections(ordered_sections)
+        self.prev_sections = self._link_sections(reversed(ordered_sections))
+
+    def _link_sections(self, sections):
+        "Map section id to the following section and nonempty section"
+        mapping = {}
+        following = None
+        following_nonempty = None
+        for section in reversed(tuple(sections)):
+            mapping[section.id] = (following, following_nonempty)
+            following = section
+            if section.id in self.nonempty_sections:
+                following_nonempty = section
+        return mapping
+
+    def _lookup(self, answerset_ids, index):
+        if not answerset_ids:
+            return None
+        return self.answersets[answerset_ids[index]]
+
+    def _full_siblings(self, answerset):
+        key = AnswerSetParentKey(answerset.plan_id, answerset.section_id, answerset.parent_id)
+        return self.parent_map.get(key, ())
+
+    # START: Sections
+
+    def get_next_section(self, section, nonempty=False):
+        following, following_nonempty = self.next_sections.get(section.id, (None, None))
+        return following_nonempty if nonempty else following
+
+    def get_prev_section(self, section, nonempty=False):
+        preceding, preceding_nonempty = self.prev_sections.get(section.id, (None, None))
+        return preceding_nonempty if nonempty else preceding
+
+    def get_answersets_for_section(self, section):
+        ids = self.section_answersets.get(section.id, ())
+        return tuple(self.answersets[answerset_id] for answerset_id in ids)
+
+    # END: Sections
+
+    # START: Traversal
+
+    def can_be_answered(self, answerset):
+        return answerset.section_id in self.nonempty_sections
+
+    def get_first_child(self, answerset):
+        return self._lookup(self.children.get(answerset.id), 0)
+
+    def get_last_child(self, answerset):
+        return self._lookup(self.children.get(answerset.id), -1)
+
+    def get_next_sibling(self, answerset):
+        if answerset.section.repeatable:
+            siblings = self._full_siblings(answerset)
+            index = self.sibling_index[answerset.id] + 1
+            if index < len(siblings):
+                return self.answersets[siblings[index]]
+        return None
+
+    def get_prev_sibling(self, answerset):
+        if answerset.section.repeatable:
+            siblings = self.children.get(answerset.parent_id, ())
+            index = self.child_index[answerset.id]
+            if index > 0:
+                return self.answersets[siblings[index - 1]]
+        return None
+
+    def get_next_section_answerset(self, answerset):
+        next_section = self.get_next_section(answerset.section, nonempty=True)
+        if next_section:
+            return self._lookup(self.section_answersets[next_section.id], 0)
+        return None
+
+    def get_prev_section_answerset(self, answerset):
+        prev_section = self.get_prev_section(answerset.section, nonempty=True)
+        if prev_section:
+            return self._lookup(self.section_answersets[prev_section.id], -1)
+        return None
+
+    def get_next_answerset(self, answerset):
+        if answerset.skipped:
+            return self.get_next_section_answerset(answerset)
+        return (
+            self.get_first_child(answerset)
+            or self.get_next_sibling(answerset)
+            or self.get_next_section_answerset(answerset)
+        )
+
+    def get_prev_answerset(self, answerset):
+        sibling = self.get_prev_sibling(answerset)
+        if sibling:
+            if sibling.skipped:
+                return self.get_prev_answerset(sibling)
+            child = self.get_last_child(sibling)
+            if child:
+                return child
+            if self.can_be_answered(sibling):
+                return sibling
+        prev_section = self.get_prev_section_answerset(answerset)
+        if prev_section:
+            if prev_section.skipped:
+                return self.get_prev_answerset(prev_section)
+            child = self.get_last_child(prev_section)
+            if child:
+                if not child.skipped:
+                    return child
+            if self.can_be_answered(prev_section):
+                return prev_section
+        # We've run out of possible answersets
+        return None
+
+    # END: Traversal
+
+
 class AnswerQuerySet(models.QuerySet):
 
     def get_by_natural_key(self, answerset, question_id):
@@ -942,22 +1538,48 @@ class PlanQuerySet(models.QuerySet):
     def invalid(self):
         return self.exclude(valid=True)
 
+    # Access is checked with correlated subqueries rather than joins so that
+    # there are no duplicate rows to remove with DISTINCT, see
+    # PlanAccess.Meta.indexes
+
+    @staticmethod
+    def _has_access(user, **kwargs):
+        accesses = PlanAccess.objects.filter(plan=OuterRef('pk'), user=user, **kwargs)
+        return Exists(accesses)
+
     def editable(self, user, superpowers=True):
+        if not user.is_authenticated:
+            return self.none()
         if superpowers and user.has_superpowers:
             return self.all()
-        return self.filter(accesses__user=user, accesses__may_edit=True)
+        return self.filter(self._has_access(user, may_edit=True))
 
     def viewable(self, user, superpowers=True, include_public=True):
-        public = self.none()
-        if include_public:
-            public = self.filter(published__isnull=False)
+        public = Q(published__isnull=False)
         if not user.is_authenticated:
-            return public
+            return self.filter(public) if include_public else self.none()
         if superpowers and user.has_superpowers:
             return self.all()
-        qs = public | self.filter(accesses__user=user)
-        qs = qs.distinct()
-        return qs
+        has_access = Q(self._has_access(user))
+        if include_public:
+            return self.filter(public | has_access)
+        return self.filter(has_access)
+
+    def with_permissions(self, user):
+        """Annotate whether <user> may view and edit each plan
+
+        Feed the result to `PlanPermissions.prime()` to avoid a query per plan.
+        """
+        if not user.is_authenticated:
+            return self.annotate(user_may_view=Value(False), user_may_edit=Value(False))
+        return self.annotate(
+            user_may_view=self._has_access(user),
+            user_may_edit=self._has_access(user, may_edit=True),
+        )
+
+    def search(self, query):
+        "Full text search of the answers"
+        return search_plans(self, query)
 
 
 class Plan(DeletionMixin, ClonableModel):
@@ -1002,6 +1624,12 @@ class Plan(DeletionMixin, ClonableModel):
 
     objects = PlanQuerySet.as_manager()
 
+    class Meta:
+        indexes = [
+            # Plan lists are ordered newest first, see PlanListView
+            models.Index(fields=['added', 'id'], name='plan_added_id_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -1016,7 +1644,16 @@ class Plan(DeletionMixin, ClonableModel):
 
     @property
     def total_answers(self):
-        return [answerset.data for answerset in self.answersets.all()]
+        return [answerset.data for answerset in self.answersets.with_answers()]
+
+    def get_search_data(self):
+        "Collect the searchable text of all answersets"
+        result = (
+            self.answersets
+            .exclude(payload__search_data='')
+            .aggregate(search_data=JoinSearchData('payload__search_data'))
+        )
+        return result['search_data'] or ''
 
     @property
     def num_total_answers(self):
@@ -1035,24 +1672,23 @@ class Plan(DeletionMixin, ClonableModel):
         if not self.answersets.exists():
             return True
         return not any(bool(answerset.data)
-                       for answerset in self.answersets.all())
+                       for answerset in self.answersets.with_answers())
 
     # Access
     # TODO: Replace with django-guardian?
 
+    # Views and templates should use easydmp.plan.permissions instead, which
+    # loads the accesses once per request
+
     def may_edit(self, user):
         if not user.is_authenticated:
             return False
-        if self.accesses.filter(user=user, may_edit=True):
-            return True
-        return False
+        return self.accesses.filter(user=user, may_edit=True).exists()
 
     def may_view(self, user):
         if not user.is_authenticated:
             return False
-        if self.accesses.filter(user=user):
-            return True
-        return False
+        return self.accesses.filter(user=user).exists()
 
     def get_viewers(self):
         User = get_user_model()
@@ -1067,12 +1703,14 @@ class Plan(DeletionMixin, ClonableModel):
             user=user,
             plan=self,
             defaults={'may_edit': False})
+        forget_plan_permissions(user)
 
     def add_user_to_editors(self, user):
         ua, _ = PlanAccess.objects.update_or_create(
             user=user,
             plan=self,
             defaults={'may_edit': True})
+        forget_plan_permissions(user)
 
     def set_adder_as_editor(self):
         self.add_user_to_editors(self.added_by)
@@ -1149,7 +1787,7 @@ class Plan(DeletionMixin, ClonableModel):
                       timestamp=self.added, template=template)
             return
 
-        self.search_data = dump_obj_to_searchable_string(self.total_answers)
+        self.search_data = self.get_search_data()
         self.modified = tznow()
         if question is not None:
             # set visited
@@ -1169,7 +1807,9 @@ class Plan(DeletionMixin, ClonableModel):
     def delete(self, user, **kwargs):
         template = '{timestamp} {actor} deleted {target}'
         log_event(user, 'delete', target=self, template=template)
+        payload_ids = set(self.answersets.values_list('payload_id', flat=True))
         super().delete(**kwargs)
+        delete_unused_payloads(payload_ids)
 
     @transaction.atomic
     def save_as(self, title, user, abbreviation='', keep_users=True, **kwargs):
@@ -1268,8 +1908,7 @@ class Plan(DeletionMixin, ClonableModel):
 
     @transaction.atomic
     def add_missing_answersets(self):
-        for section in self.template.sections.filter(super_section__isnull=True):
-            self.ensure_answersets(section)
+        AnswerSetRepair(self, purge=False).run()
 
     @transaction.atomic
     def create_answerset(self, section, parent=None, identifier=None):
@@ -1312,6 +1951,10 @@ class Plan(DeletionMixin, ClonableModel):
     def get_first_question(self):
         return self.template.first_question
 
+    def get_answerset_tree(self):
+        "Get an AnswerSetTree for navigating between answersets"
+        return AnswerSetTree(self)
+
     def get_answersets_for_section(self, section, parent=NotSet):
         kwargs={'section': section, 'plan': self}
         if parent != NotSet:
@@ -1326,19 +1969,72 @@ class Plan(DeletionMixin, ClonableModel):
     # Validation
 
     def clone_answersets(self, oldplan):
-        answerset_mapping = {}
-        for answerset in oldplan.answersets.all():
-            new_answerset = answerset.clone(self)
-            answerset_mapping[answerset] = new_answerset
-        for old_answerset, new_answerset in answerset_mapping.items():
-            if old_answerset.parent:
-                new_answerset.parent = answerset_mapping[old_answerset.parent]
-                new_answerset.save()
+        """Copy the answersets of <oldplan> and their answers to this plan
+
+        The copies share the payloads of the originals, the answers are only
+        copied when changed, see `AnswerSet.save_payload()`. The answersets
+        are made in bulk, one level of nesting at a time, so the number of
+        queries does not grow with the size of the plan.
+        """
+        timestamp = tznow()
+        old_answersets = list(oldplan.answersets.all())
+        mapping = {}  # old answerset id -> new answerset
+        level = [answerset for answerset in old_answersets if answerset.parent_id is None]
+        while level:
+            copies = [
+                AnswerSet(
+                    plan=self,
+                    section_id=answerset.section_id,
+                    parent=mapping.get(answerset.parent_id),
+                    identifier=answerset.identifier,
+                    payload_id=answerset.payload_id,
+                    valid=answerset.valid,
+                    skipped=answerset.skipped,
+                    cloned_from=answerset,
+                    cloned_when=timestamp,
+                )
+                for answerset in level
+            ]
+            AnswerSet.objects.bulk_create(copies)
+            if copies[0].pk is None:
+                # Not every database returns the new primary keys
+                copies = self.answersets.filter(cloned_from__in=level)
+            mapping.update((new.cloned_from_id, new) for new in copies)
+            level_ids = {answerset.id for answerset in level}
+            level = [answerset for answerset in old_answersets
+                     if answerset.parent_id in level_ids]
+
+        # Only answers to questions still in the section are kept, and
+        # some old plans lack answers
+        section_ids = {answerset.section_id for answerset in old_answersets}
+        question_ids = defaultdict(list)
+        for section_id, question_id in (Question.objects
+                                        .filter(section_id__in=section_ids)
+                                        .values_list('section_id', 'id')):
+            question_ids[section_id].append(question_id)
+        old_answers = {
+            (answer.answerset_id, answer.question_id): answer
+            for answer in Answer.objects.filter(answerset__plan=oldplan)
+        }
+        answers = []
+        for answerset in old_answersets:
+            if answerset.id not in mapping:
+                continue
+            for question_id in question_ids[answerset.section_id]:
+                old_answer = old_answers.get((answerset.id, question_id))
+                answers.append(Answer(
+                    answerset=mapping[answerset.id],
+                    question_id=question_id,
+                    valid=old_answer.valid if old_answer else False,
+                    cloned_from=old_answer,
+                    cloned_when=timestamp if old_answer else None,
+                ))
+        Answer.objects.bulk_create(answers)
 
     def clean(self):
         if self.template_id:
             for section in self.template.sections.all():
-                for answerset in self.answersets.filter(section=section):
+                for answerset in self.answersets.filter(section=section).with_answers():
                     if answerset.data or answerset.previous_data:
                         answerset.clean()
 
@@ -1355,10 +2051,12 @@ class Plan(DeletionMixin, ClonableModel):
             LOG.info(error.format(self, self.pk))
             return False
         if recalculate:
-            for answerset in self.answersets.order_by(
+            # Share sections, and thereby their validators, between answersets
+            sections = self.template.sections.in_bulk()
+            for answerset in self.answersets.with_answers().order_by(
                     'section__super_section__position', 'section__position'
             ).iterator():
-                answerset.validate()
+                answerset.validate(sections=sections)
         # All answersets of all sections must be valid for a plan to be valid
         for section in self.template.sections.all():
             if self.answersets.filter(section=section, valid=False, skipped=None).exists():
@@ -1513,9 +2211,13 @@ class Plan(DeletionMixin, ClonableModel):
         qs = self.answersets.select_related('parent', 'section').order_by('pk')
         self.answerset_mapping = self.answersets.filter(
             Q(skipped__isnull=True) | ~Q(section__optional_canned_text='')
-        ).lookup_map()
+        ).select_related('section').lookup_map()
+        canned_texts = render_canned_text(
+            self,
+            [value.answerset for value in self.answerset_mapping.values()],
+        )
         for value in self.answerset_mapping.values():
-            decoration = self.make_canned_text_of_answerset(value.answerset)
+            decoration = SimpleNamespace(answerset=canned_texts[value.answerset.id])
             value.decoration = decoration
         sections = self.template.sections.order_by('position')
         self.linear_sections = sections.lookup_map()
@@ -1604,6 +2306,7 @@ class PlanAccess(ClonableModel):
     may_edit = models.BooleanField(blank=True, null=True)
 
     class Meta:
+        # On PostgreSQL there is also a covering index, see migration 0007
         unique_together = ('user', 'plan')
 
     def __repr__(self):
@@ -0,0 +1,83 @@
+"""Who may view, edit and publish which plans, resolved once per request
+
+Access to a plan is stored as a `PlanAccess` per user. `Plan.may_view()` and
+`Plan.may_edit()` look that up every time they are called, which adds up
+when a template checks several plans, or the same plan several times.
+
+`get_plan_permissions(user)` instead loads all of the user's accesses on
+first use and answers from memory after that. The resolver is kept on the
+user instance, and since `request.user` is made anew for every request, it
+lives as long as the request does. List views can avoid even that by
+annotating the plans via `PlanQuerySet.with_permissions()` and passing them
+to `PlanPermissions.prime()`.
+
+Changes to the accesses are not seen by a resolver already in use, except
+via `Plan.add_user_to_viewers()` and `Plan.add_user_to_editors()`.
+"""
+
+__all__ = [
+    'PlanPermissions',
+    'get_plan_permissions',
+    'forget_plan_permissions',
+]
+
+_ATTRIBUTE = '_plan_permissions'
+_NO_ACCESS = object()
+
+
+class PlanPermissions:
+    "Answers permission checks for the plans of a single user"
+
+    def __init__(self, user):
+        self.user = user
+        self._accesses = {}  # plan id -> PlanAccess.may_edit or _NO_ACCESS
+        self._complete = not user.is_authenticated
+
+    def _load(self):
+        accesses = self.user.plan_accesses.values_list('plan_id', 'may_edit')
+        self._accesses.update(accesses)
+        self._complete = True
+
+    def _get_access(self, plan):
+        plan_id = getattr(plan, 'pk', plan)
+        if plan_id not in self._accesses and not self._complete:
+            self._load()
+        return self._accesses.get(plan_id, _NO_ACCESS)
+
+    def prime(self, plans):
+        "Remember the permissions of plans from `PlanQuerySet.with_permissions()`"
+        for plan in plans:
+            if plan.user_may_view:
+                self._accesses[plan.pk] = plan.user_may_edit
+            else:
+                self._accesses[plan.pk] = _NO_ACCESS
+        return plans
+
+    def may_view(self, plan):
+        return self._get_access(plan) is not _NO_ACCESS
+
+    def may_edit(self, plan):
+        return self._get_access(plan) is True
+
+    def may_publish(self, plan):
+        "Only valid, locked plans may be published, see PublishPlanView"
+        if plan.published or not (plan.locked and plan.valid):
+            return False
+        return self.may_view(plan)
+
+
+def get_plan_permissions(user):
+    "Get the permission resolver of <user>, making it if necessary"
+    permissions = getattr(user, _ATTRIBUTE, None)
+    if permissions is None:
+        permissions = PlanPermissions(user)
+        setattr(user, _ATTRIBUTE, permissions)
+    return permissions
+
+
+def forget_plan_permissions(user):
+    "Make the next `get_plan_permissions()` reload the accesses of <user>"
+    try:
+        delattr(user, _ATTRIBUTE)
+    except AttributeError:
+        pass
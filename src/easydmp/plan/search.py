@@ -0,0 +1,202 @@
+"""Full text search of plans
+
+The searchable text of a plan is stored in ``Plan.search_data``. It is built
+from the ``search_data`` of the payloads of the plan's answersets, which is
+updated whenever the answers change, so saving a plan no longer needs to load
+and dump the answers of every answerset. The texts are joined by the database
+with the `JoinSearchData` aggregate.
+
+The text is indexed by the database:
+
+* PostgreSQL: a GIN index on ``to_tsvector('simple', search_data)``
+* SQLite: an FTS5 table kept in sync with ``plan_plan`` via triggers
+
+On any other database, or if the index is missing, searching falls back to
+case insensitive substring matching.
+"""
+
+import logging
+
+from django.db import connections
+from django.db.models import Aggregate, TextField
+from django.db.models.expressions import RawSQL
+
+__all__ = [
+    'SEARCH_CONFIG',
+    'JoinSearchData',
+    'install_search_index',
+    'uninstall_search_index',
+    'search_plans',
+]
+
+LOG = logging.getLogger(__name__)
+
+# No stemming or stop words: answers are in many different languages
+SEARCH_CONFIG = 'simple'
+
+POSTGRESQL_INDEX = 'plan_plan_search_data_gin'
+SQLITE_FTS_TABLE = 'plan_plan_fts'
+SQLITE_FTS_TRIGGERS = {
+    f'{SQLITE_FTS_TABLE}_ai': f'''
+        CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ai
+        AFTER INSERT ON plan_plan BEGIN
+            INSERT INTO {SQLITE_FTS_TABLE}(rowid, search_data)
+            VALUES (new.id, new.search_data);
+        END''',
+    f'{SQLITE_FTS_TABLE}_ad': f'''
+        CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ad
+        AFTER DELETE ON plan_plan BEGIN
+            INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, search_data)
+            VALUES ('delete', old.id, old.search_data);
+        END''',
+    f'{SQLITE_FTS_TABLE}_au': f'''
+        CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_au
+        AFTER UPDATE OF search_data ON plan_plan BEGIN
+            INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, search_data)
+            VALUES ('delete', old.id, old.search_data);
+            INSERT INTO {SQLITE_FTS_TABLE}(rowid, search_data)
+            VALUES (new.id, new.search_data);
+        END''',
+}
+
+
+# START: index maintenance
+
+def _install_postgresql(cursor):
+    cursor.execute(
+        f'CREATE INDEX IF NOT EXISTS {POSTGRESQL_INDEX} ON plan_plan '
+        f"USING gin (to_tsvector('{SEARCH_CONFIG}'::regconfig, "
+        "COALESCE(search_data, '')))"
+    )
+
+
+def _uninstall_postgresql(cursor):
+    cursor.execute(f'DROP INDEX IF EXISTS {POSTGRESQL_INDEX}')
+
+
+def _get_sqlite_fts_objects(cursor):
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE name = %s OR name IN "
+        f"({', '.join(['%s'] * len(SQLITE_FTS_TRIGGERS))})",
+        [SQLITE_FTS_TABLE, *SQLITE_FTS_TRIGGERS]
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _install_sqlite(cursor):
+    existing = _get_sqlite_fts_objects(cursor)
+    if existing == {SQLITE_FTS_TABLE, *SQLITE_FTS_TRIGGERS}:
+        return
+    cursor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} '
+        "USING fts5(search_data, content='plan_plan', content_rowid='id')"
+    )
+    for sql in SQLITE_FTS_TRIGGERS.values():
+        cursor.execute(sql)
+    # Triggers are lost whenever a migration rebuilds plan_plan, so the
+    # index might be stale
+    cursor.execute(
+        f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')"
+    )
+
+
+def _uninstall_sqlite(cursor):
+    for trigger in SQLITE_FTS_TRIGGERS:
+        cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    cursor.execute(f'DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}')
+
+
+def install_search_index(connection):
+    """Create the full text index of plans, if supported
+
+    Safe to run more than once.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            _install_postgresql(cursor)
+        elif connection.vendor == 'sqlite':
+            try:
+                _install_sqlite(cursor)
+            except connection.Database.OperationalError as e:
+                # SQLite compiled without FTS5
+                LOG.warning('Could not install full text search of plans: %s', e)
+
+
+def uninstall_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            _uninstall_postgresql(cursor)
+        elif connection.vendor == 'sqlite':
+            _uninstall_sqlite(cursor)
+
+# END: index maintenance
+
+
+# START: building
+
+class JoinSearchData(Aggregate):
+    "Join the texts of many rows with spaces, in no particular order"
+    function = 'GROUP_CONCAT'
+    template = "%(function)s(%(expressions)s, ' ')"
+    output_field = TextField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, function='STRING_AGG', **extra_context)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        template = "%(function)s(%(expressions)s SEPARATOR ' ')"
+        return self.as_sql(compiler, connection, template=template, **extra_context)
+
+# END: building
+
+
+# START: searching
+
+def _search_postgresql(queryset, query):
+    from django.contrib.postgres.search import SearchQuery, SearchVector
+
+    vector = SearchVector('search_data', config=SEARCH_CONFIG)
+    return queryset.alias(search_vector=vector).filter(
+        search_vector=SearchQuery(query, config=SEARCH_CONFIG)
+    )
+
+
+def _search_sqlite(queryset, terms):
+    # Quote every term so that FTS5 operators in the query are not
+    # interpreted, all terms must match
+    fts_query = ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+    matches = RawSQL(
+        f'SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s',
+        (fts_query,)
+    )
+    return queryset.filter(pk__in=matches)
+
+
+def _search_substrings(queryset, terms):
+    for term in terms:
+        queryset = queryset.filter(search_data__icontains=term)
+    return queryset
+
+
+def _has_sqlite_fts(connection):
+    with connection.cursor() as cursor:
+        return SQLITE_FTS_TABLE in _get_sqlite_fts_objects(cursor)
+
+
+def search_plans(queryset, query):
+    """Filter a queryset of plans down to those where all words in query
+    occur in the answers
+
+    An empty query does not filter.
+    """
+    terms = query.split()
+    if not terms:
+        return queryset
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(queryset, query)
+    if connection.vendor == 'sqlite' and _has_sqlite_fts(connection):
+        return _search_sqlite(queryset, terms)
+    return _search_substrings(queryset, terms)
+
+# END: searching
@@ -1,17 +1,24 @@
 from django import template
 
+from easydmp.plan.permissions import get_plan_permissions
+
 
 register = template.Library()
 
 
 @register.filter
 def may_edit_plan(user, plan):
-    return plan.may_edit(user)
+    return get_plan_permissions(user).may_edit(plan)
 
 
 @register.filter
 def may_view_plan(user, plan):
-    return plan.may_view(user)
+    return get_plan_permissions(user).may_view(plan)
+
+
+@register.filter
+def may_publish_plan(user, plan):
+    return get_plan_permissions(user).may_publish(plan)
 
 
 @register.inclusion_tag('easydmp/plan/checkmark.html')
@@ -48,7 +48,8 @@ def select_plans(plan_ids=(), template_ids=(), section_ids=()):
 
     plans_with_answers = tuple(AnswerSet.objects
         .exclude(skipped=True)
-        .exclude(data={})
+        .exclude(payload=None)
+        .exclude(payload__data={})
         .values_list('plan_id', flat=True).distinct()
     )
     plan_qs = Plan.objects.filter(id__in=plans_with_answers)
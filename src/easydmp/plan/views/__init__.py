@@ -2,6 +2,7 @@ from copy import deepcopy
 import logging
 
 from django.contrib import messages
+from django.db.models import Min
 from django.template.loader import render_to_string
 from django.urls import reverse, reverse_lazy, NoReverseMatch
 from django.http import Http404
@@ -20,9 +21,9 @@ from django.views.generic import (
     RedirectView,
     TemplateView,
 )
-from weasyprint import HTML
 
-from easydmp.lib.views.mixins import DeleteFormMixin
+from easydmp.lib.urls import reverse_format
+from easydmp.lib.views.mixins import DeleteFormMixin, KeysetPaginationMixin
 from easydmp.dmpt.models import Question, Section, Template
 from easydmp.dmpt.forms import AbstractNodeFormSet
 from easydmp.eventlog.models import EventLog
@@ -36,6 +37,7 @@ from ..models import AnswerSetException
 from ..models import Plan
 from ..models import PlanAccess
 from ..models import remove_answerset
+from ..permissions import get_plan_permissions
 from ..forms import ConfirmForm
 from ..forms import SaveAsPlanForm
 from ..forms import StartPlanForm
@@ -53,14 +55,25 @@ def progress(so_far, all):
 
 def get_section_progress(plan, current_section):
     viewname = 'answerset_detail'
-    sections = plan.template.sections.filter(section_depth=1).order_by('position')
-    visited_sections = plan.visited_sections.all()
+    structure = plan.template.structure
+    sections = [s for s in structure.topmost_sections() if s.section_depth == 1]
+    first_answersets = dict(
+        plan.answersets
+        .filter(section_id__in=[section.pk for section in sections])
+        .values('section_id')
+        .annotate(first=Min('pk'))
+        .values_list('section_id', 'first')
+    )
+    visited_sections = set(plan.visited_sections.values_list('pk', flat=True))
     section_struct = []
-    current_section = current_section.get_topmost_section()
+    current_section_pk = structure.get_topmost_section_pk(current_section.pk)
     for section in sections:
-        answerset = section.answersets.filter(plan=plan).order_by('pk').first()
-        kwargs = {'plan': plan.id, 'section': section.pk, 'answerset': answerset.pk}
-        link = reverse(viewname, kwargs=kwargs)
+        answerset_pk = first_answersets.get(section.pk)
+        if answerset_pk is None:
+            # Nothing to link to
+            continue
+        kwargs = {'plan': plan.id, 'section': section.pk, 'answerset': answerset_pk}
+        link = reverse_format(viewname, **kwargs)
         section_dict = {
             'label': section.label,
             'title': section.title,
@@ -69,9 +82,9 @@ def get_section_progress(plan, current_section):
             'status': 'new',
             'link': link,
         }
-        if section in visited_sections:
+        if section.pk in visited_sections:
             section_dict['status'] = 'visited'
-        if section == current_section:
+        if section.pk == current_section_pk:
             section_dict['status'] = 'active'
         section_struct.append(section_dict)
     return section_struct
@@ -438,7 +451,7 @@ class AddAnswerSetView(RedirectView):
         self.sibling = None
         if sibling_id:
             self.sibling = get_object_or_404(AnswerSet, pk=sibling_id)
-        editable = self.plan.may_edit(request.user)
+        editable = get_plan_permissions(request.user).may_edit(self.plan)
         if not editable:
             raise Http404  # go away, peon
 
@@ -488,8 +501,9 @@ class AnswerSetSectionMixin(AnswerSetAccessViewMixin):
         correct_plan = self.plan.pk == self.kwargs['plan']
         self.section = self.answerset.section
         correct_section = self.section.pk == self.kwargs['section']
-        viewable = self.plan.may_view(request.user)
-        self.editable = self.plan.may_edit(request.user)
+        permissions = get_plan_permissions(request.user)
+        viewable = permissions.may_view(self.plan)
+        self.editable = permissions.may_edit(self.plan)
         if not all((correct_plan, correct_section, viewable)):
             raise Http404
 
@@ -534,6 +548,7 @@ class GetAnswerSetView(AnswerSetSectionMixin, DetailView):
         method = getattr(self, f'get_{action}', None)
 
         self.plan_pk = self.plan.pk
+        self.structure = self.plan.template.structure
         template = '{timestamp} {actor} accessed {action_object} of {target}'
         log_event(request.user, 'access', target=self.plan,
                   object=self.answerset, template=template)
@@ -554,28 +569,32 @@ class GetAnswerSetView(AnswerSetSectionMixin, DetailView):
         return reverse('plan_detail', kwargs={'plan': self.plan_pk})
 
     def get_next(self):
-        next_section = self.section.get_next_nonempty_section()
+        tree = self.plan.get_answerset_tree()
+        next_section = tree.get_next_section(self.section, nonempty=True)
         if not next_section:
             return self.get_summary()
 
-        answerset = self.answerset.get_next_answerset()
-        return self.get_url(answerset.section.first_question.pk, answerset)
+        answerset = tree.get_next_answerset(self.answerset)
+        question_pk = self.structure.get_section(answerset.section_id).first_question_id
+        return self.get_url(question_pk, answerset)
 
     get_skip_to_next = get_next
 
     def get_prev(self):
-        prev_section = self.section.get_prev_nonempty_section()
+        tree = self.plan.get_answerset_tree()
+        prev_section = tree.get_prev_section(self.section, nonempty=True)
         if not prev_section:
             return self.get_summary()
 
-        answerset = self.answerset.get_prev_answerset()
-        return self.get_url(answerset.section.last_question.pk, answerset)
+        answerset = tree.get_prev_answerset(self.answerset)
+        question_pk = self.structure.get_section(answerset.section_id).last_question_id
+        return self.get_url(question_pk, answerset)
 
     get_skip_to_prev = get_prev
 
     def get_current(self):
-        answerset = self.answerset.get_prev_answerset()
-        return self.get_url(self.section.first_question.pk, self.answerset)
+        question_pk = self.structure.get_section(self.section.pk).first_question_id
+        return self.get_url(question_pk, self.answerset)
 
 
 class AnswerLinearSectionView(AnswerSetSectionMixin, DetailView):
@@ -866,8 +885,9 @@ class GetAnswerView(AnswerSetAccessViewMixin, DetailView):
         self.plan = self.answerset.plan
         correct_plan = self.plan.pk == self.kwargs['plan']
         self.section = self.answerset.section
-        viewable = self.plan.may_view(request.user)
-        self.editable = self.plan.may_edit(request.user)
+        permissions = get_plan_permissions(request.user)
+        viewable = permissions.may_view(self.plan)
+        self.editable = permissions.may_edit(self.plan)
         if not all((correct_plan, viewable)):
             raise Http404
         self.question_pk = self.kwargs.get('question')
@@ -1115,11 +1135,12 @@ class FirstQuestionView(PlanAccessViewMixin, RedirectView):
         return url
 
 
-class PlanListView(ListView):
+class PlanListView(KeysetPaginationMixin, ListView):
     "List all plans for a user"
 
     model = Plan
     template_name = 'easydmp/plan/plan_list.html'
+    keyset_ordering = ('-added', '-id')
 
     def has_superpowers(self):
         return 'superpowers' in self.request.GET
@@ -1129,8 +1150,18 @@ class PlanListView(ListView):
             self.request.user,
             superpowers=self.has_superpowers(),
             include_public=False,
-        )
-        return qs.order_by('-added')
+        ).with_permissions(self.request.user).select_related('template')
+        query = self.request.GET.get('q', '')
+        if query:
+            qs = qs.search(query)
+        return qs
+
+    def get_context_data(self, **kwargs):
+        kwargs['query'] = self.request.GET.get('q', '')
+        context = super().get_context_data(**kwargs)
+        # The template checks the permissions per plan
+        get_plan_permissions(self.request.user).prime(context['object_list'])
+        return context
 
     def get(self, request, *args, **kwargs):
         next = super().get(request, *args, **kwargs)
@@ -1147,7 +1178,8 @@ class PlanDetailView(PlanAccessViewMixin, DetailView):
     login_required = False  # Public plans are accessible to all
 
     def get_context_data(self, **kwargs):
-        editable = self.object.may_edit(self.request.user) and not self.object.locked
+        permissions = get_plan_permissions(self.request.user)
+        editable = permissions.may_edit(self.object) and not self.object.locked
         context = {
             'output': self.object.get_nested_summary(),
             'plan': self.object,
@@ -1184,6 +1216,7 @@ class AbstractGeneratedPlanView(DetailView):
     model = Plan
     pk_url_kwarg = 'plan'
     login_required = False
+    use_replica = True
 
     def get_queryset(self):
         "Show published plans to the public, otherwise only viewable"
@@ -1228,6 +1261,8 @@ class GeneratedPlanPDFView(AbstractGeneratedPlanView):
     content_type = 'application/pdf'
 
     def get(self, request, *args, **kwargs):
+        from weasyprint import HTML  # slow, so only when needed
+
         self.generate_exported_plan()
         self.log(request)
         result = HTML(string=self.export).write_pdf()
@@ -1296,11 +1331,11 @@ class AnswerSetDetailView(AnswerSetSectionMixin, DetailView):
     def next(self):
         "Generate link to next page"
         plan_pk = self.plan.pk
-        next_section = self.section.get_next_section()
+        next_section = self.tree.get_next_section(self.section)
         kwargs = {'plan': plan_pk}
         if next_section is not None:
             if self.editable:
-                answerset = self.plan.get_answersets_for_section(next_section).first()
+                answerset = self.tree.get_answersets_for_section(next_section)[0]
                 kwargs['answerset'] = answerset.pk
                 # Has questions
                 question = next_section.first_question
@@ -1315,11 +1350,11 @@ class AnswerSetDetailView(AnswerSetSectionMixin, DetailView):
     def prev(self):
         "Generate link to previous page"
         plan_pk = self.plan.pk
-        prev_section = self.section.get_prev_section()
+        prev_section = self.tree.get_prev_section(self.section)
         kwargs = {'plan': plan_pk}
         if prev_section is not None:
             if self.editable:
-                answerset = self.plan.get_answersets_for_section(prev_section).last()
+                answerset = self.tree.get_answersets_for_section(prev_section)[-1]
                 kwargs['answerset'] = answerset.pk
                 # Has questions
                 question = prev_section.first_question
@@ -1332,6 +1367,7 @@ class AnswerSetDetailView(AnswerSetSectionMixin, DetailView):
         return reverse('plan_detail', kwargs=kwargs)
 
     def get_context_data(self, **kwargs):
+        self.tree = self.plan.get_answerset_tree()
         context = {
             'plan': self.plan,
             'next': self.next(),
@@ -19,7 +19,7 @@ class GenerateRDA11:
         self.plan = plan
         self.answersets = self.plan.answersets.exclude(skipped=True).filter(
             valid=True,
-        )
+        ).with_answers()
         self.rda_question_links = self.get_rda_question_links()
         self.rda_section_links = self.get_rda_section_links()
 
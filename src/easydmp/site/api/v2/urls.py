@@ -11,6 +11,7 @@ from easydmp.dmpt.api.v2 import router as dmpt_router
 from easydmp.lib.api.routers import ContainerRouter
 from easydmp.plan.api.v2 import router as plan_router
 from easydmp.rdadcs.api.v2 import router as rdadcs_router
+from easydmp.site.api.v2.views import StatsView
 
 
 jwt_urls = [
@@ -30,6 +31,7 @@ router.register_router(rdadcs_router)
 
 urlpatterns = jwt_urls + [
     path('auth/', include('rest_framework.urls', namespace='rest_framework')),
+    path('stats/', StatsView.as_view(), name='stats'),
 ] + router.urls
 
 app_name = 'v2'
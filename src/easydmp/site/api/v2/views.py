@@ -0,0 +1,32 @@
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from easydmp.lib.stats import get_series, get_stats
+
+
+MAX_MONTHS = 120
+
+
+class StatsView(GenericAPIView):
+    "Statistics about plans and users, the same as on the front page"
+    permission_classes = [AllowAny]
+    login_required = False
+
+    @extend_schema(
+        parameters=[OpenApiParameter('months', int, description='Months of statistics per month, default 12')],
+        responses=OpenApiTypes.OBJECT,
+    )
+    def get(self, request, *args, **kwargs):
+        try:
+            months = int(request.query_params.get('months', 12))
+        except ValueError:
+            months = 0
+        if not 0 < months <= MAX_MONTHS:
+            raise ValidationError({'months': f'Must be a number from 1 to {MAX_MONTHS}'})
+        result = dict(get_stats())
+        result['series'] = get_series(months)
+        return Response(result)
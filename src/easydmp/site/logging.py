@@ -37,6 +37,11 @@ DEFAULT = {
             'level': 'INFO',
             'propagate': False,
         },
+        'easydmp.lib.metrics.slow': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
         'django.db.backends': {
             'handlers': ['console'],
             'filters': ['select_filter'],
@@ -65,6 +65,7 @@ INSTALLED_APPS = [
 SITE_ID = 1 # For flatpages
 
 MIDDLEWARE = [
+    'easydmp.lib.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'easydmp.lib.middleware.MaintenanceModeMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -74,6 +75,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'easydmp.auth.middleware.LoginRequiredMiddleware',
+    'easydmp.lib.middleware.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.contrib.flatpages.middleware.FlatpageFallbackMiddleware',
@@ -132,6 +134,15 @@ else:
         }
     }
 
+# Optional read replica, see easydmp.lib.replica
+_REPLICA_DATABASE_URL = getenv('DMP_REPLICA_DATABASE_URL', None)
+if _REPLICA_DATABASE_URL is not None:
+    DATABASES['replica'] = dj_database_url.parse(_REPLICA_DATABASE_URL)
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_ROUTERS = ['easydmp.lib.replica.ReplicaRouter']
+del _REPLICA_DATABASE_URL
+EASYDMP_REPLICA_STICKY_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/1.11/ref/settings/#auth-password-validators
@@ -280,5 +291,18 @@ CORS_URLS_REGEX = r'^/api/.*$'
 
 PUBLIC_URLS = ('/api/', '/psa/', '/admin/login/')
 
+# Request metrics, see easydmp.lib.metrics
+# Behind a reverse proxy every client has the proxy's address, so prefer
+# the token there
+EASYDMP_METRICS_ALLOWED_IPS = ()
+EASYDMP_METRICS_TOKEN = getenv('EASYDMP_METRICS_TOKEN', None)
+_SLOW_REQUEST_SECONDS = getenv('EASYDMP_SLOW_REQUEST_SECONDS', None)
+EASYDMP_SLOW_REQUEST_SECONDS = float(_SLOW_REQUEST_SECONDS) if _SLOW_REQUEST_SECONDS else None
+EASYDMP_SLOW_REQUEST_TOP_SQL = 5
+
+# Rendered section graphs, see easydmp.lib.graphviz. The graphs are served
+# to users, so the directory must be owned by the user running the site
+EASYDMP_GRAPH_CACHE_DIR = getenv('EASYDMP_GRAPH_CACHE_DIR', pathjoin(BASE_DIR, 'graph_cache'))
+
 EASYDMP_INVITATION_FROM_ADDRESS = getenv('EASYDMP_INVITATION_FROM_ADDRESS', None)
 assert EASYDMP_INVITATION_FROM_ADDRESS, 'Env "EASYDMP_INVITATION_FROM_ADDRESS" not set'
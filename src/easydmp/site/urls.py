@@ -7,6 +7,7 @@ from django.urls import include, path
 
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+from easydmp.lib.metrics import metrics_view
 from easydmp.site.views import Homepage
 from easydmp.site.views import LoginView
 from easydmp.site.views import logout_view
@@ -26,6 +27,7 @@ urlpatterns = [
     path('', Homepage.as_view(), name='home'),
     path('login/', LoginView.as_view(), name='login-selector'),
     path('logout', logout_view, name='logout'),
+    path('metrics', metrics_view, name='metrics'),
     path('privacy/', PublicTemplateView.as_view(template_name='privacy.html'), name='privacy'),
     path('account/', include('easydmp.auth.urls')),
 
@@ -3,7 +3,7 @@ from django.contrib.auth import logout
 from django.shortcuts import redirect, render
 from django.views.generic import TemplateView
 
-from easydmp.lib.stats import stats
+from easydmp.lib.stats import get_stats
 
 
 __all__ = [
@@ -28,7 +28,7 @@ class Homepage(TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['stats'] = stats()
+        context['stats'] = get_stats()
         return context
 
 
@@ -0,0 +1,115 @@
+"""Benchmarks
+
+These are slow and need a lot of data, so they are only run if the
+environment variable EASYDMP_BENCHMARK is set::
+
+    EASYDMP_BENCHMARK=1 python manage.py test --settings=tests.test_settings tests.benchmarks
+
+Results are printed to stdout. Benchmarks are most meaningful when run
+against PostgreSQL, see TEST_DATABASE_URL in tests/test_settings.py.
+
+Suites using `BenchmarkResults` also write their results as JSON to the
+directory in EASYDMP_BENCHMARK_OUTPUT, if set. Compare two runs with::
+
+    python -m tests.benchmarks.compare old/scaling.json new/scaling.json
+"""
+
+import datetime
+import json
+import os
+from pathlib import Path
+import subprocess
+import time
+import unittest
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+__all__ = [
+    'benchmark',
+    'get_scale',
+    'timed',
+    'BenchmarkResults',
+]
+
+
+def benchmark(cls_or_func):
+    "Skip unless benchmarks are turned on"
+    reason = 'Set EASYDMP_BENCHMARK to run benchmarks'
+    return unittest.skipUnless(os.environ.get('EASYDMP_BENCHMARK'), reason)(cls_or_func)
+
+
+def get_scale(name, default):
+    "Get a size from EASYDMP_BENCHMARK_<name>, falling back to <default>"
+    return int(os.environ.get(f'EASYDMP_BENCHMARK_{name.upper()}', default))
+
+
+@contextmanager
+def timed(label, repeat=1):
+    "Print the time spent in the block, per repetition"
+    start = time.perf_counter()
+    yield
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f'{label}: {elapsed * 1000:.2f} ms')
+
+
+def _get_commit():
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+class BenchmarkResults:
+    "Time and count the queries of benchmarks, and save the results as JSON"
+
+    def __init__(self, suite, **parameters):
+        self.suite = suite
+        self.parameters = parameters
+        self.results = {}
+
+    @contextmanager
+    def measure(self, label, repeat=1):
+        "Like `timed()`, but also count the queries and keep the result"
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            yield
+            elapsed = (time.perf_counter() - start) / repeat
+        num_queries = len(queries) / repeat
+        self.results[label] = {
+            'ms': round(elapsed * 1000, 3),
+            'queries': num_queries,
+        }
+        print(f'{label}: {elapsed * 1000:.2f} ms, {num_queries:g} queries')
+
+    def add(self, label, ms, queries=0):
+        "Keep a result measured some other way"
+        self.results[label] = {'ms': round(ms, 3), 'queries': queries}
+        print(f'{label}: {ms:.2f} ms')
+
+    def as_dict(self):
+        return {
+            'suite': self.suite,
+            'commit': _get_commit(),
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'parameters': self.parameters,
+            'results': self.results,
+        }
+
+    def write(self, directory=None):
+        "Write to <directory>/<suite>.json, by default EASYDMP_BENCHMARK_OUTPUT"
+        directory = directory or os.environ.get('EASYDMP_BENCHMARK_OUTPUT')
+        if not directory:
+            return None
+        path = Path(directory) / f'{self.suite}.json'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.as_dict(), indent=2, default=str))
+        return path
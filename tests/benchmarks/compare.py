@@ -0,0 +1,40 @@
+"""Compare two benchmark result files
+
+    python -m tests.benchmarks.compare old.json new.json
+"""
+
+import json
+import sys
+
+
+def compare(old, new):
+    "Yield a line per benchmark in <old> or <new>"
+    old_results = old['results']
+    new_results = new['results']
+    yield f'{old["commit"] or "?"}  ->  {new["commit"] or "?"}'
+    for label in list(old_results) + [l for l in new_results if l not in old_results]:
+        before = old_results.get(label)
+        after = new_results.get(label)
+        if before is None or after is None:
+            result = before or after
+            side = 'old' if after is None else 'new'
+            yield f'{label}: only in {side}: {result["ms"]} ms, {result["queries"]:g} queries'
+            continue
+        change = ''
+        if before['ms']:
+            change = f' ({(after["ms"] - before["ms"]) / before["ms"]:+.0%})'
+        yield (f'{label}: {before["ms"]} -> {after["ms"]} ms{change}, '
+               f'{before["queries"]:g} -> {after["queries"]:g} queries')
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        sys.exit(__doc__)
+    old, new = (json.loads(open(path).read()) for path in argv)
+    for line in compare(old, new):
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+"""Generate large templates and plans for benchmarks
+
+Everything is made with bulk_create, so a template with thousands of
+questions takes seconds rather than minutes. The same spec and seed always
+give the same template and answers, so results can be compared across
+commits.
+"""
+
+from dataclasses import dataclass, fields
+import datetime
+import random
+
+from easydmp.dmpt.models import CannedAnswer
+from easydmp.dmpt.models import ExplicitBranch
+from easydmp.dmpt.models import Question
+from easydmp.dmpt.models import Section
+from easydmp.dmpt.models import Template
+from easydmp.dmpt.structure import touch_template
+from easydmp.plan.models import Answer, AnswerSet, Plan
+
+from . import get_scale
+
+
+__all__ = [
+    'TemplateSpec',
+    'generate_template',
+    'generate_plan',
+]
+
+# input type: how to answer it
+ANSWERS = {
+    'reason': lambda rng, pk: f'Reason for question {pk}',
+    'shortfreetext': lambda rng, pk: f'Text {pk}',
+    'positiveinteger': lambda rng, pk: rng.randint(0, 1000),
+    'date': lambda rng, pk: (datetime.date(2020, 1, 1)
+                             + datetime.timedelta(days=rng.randint(0, 1000))).isoformat(),
+    'choice': lambda rng, pk: rng.choice(CHOICES),
+    'bool': lambda rng, pk: rng.choice(('Yes', 'No')),
+}
+CHOICES = ('alpha', 'beta', 'gamma')
+
+
+@dataclass
+class TemplateSpec:
+    """The shape of a generated template
+
+    `sections` is the number of topmost sections, each of which has
+    `subsections` subsections per level down to `depth`. `branching` is the
+    fraction of sections that branch, `repeatable` the fraction of
+    subsections that are repeatable. The input types of the questions are
+    picked from `question_types`.
+    """
+    sections: int = 10
+    depth: int = 2
+    subsections: int = 2
+    questions: int = 10
+    branching: float = 0.3
+    repeatable: float = 0.3
+    question_types: tuple = ('reason', 'shortfreetext', 'positiveinteger',
+                             'date', 'choice', 'bool')
+    seed: int = 0
+
+    @classmethod
+    def from_environment(cls, **defaults):
+        """Override the numbers via EASYDMP_BENCHMARK_<field>
+
+        Fractions are given in percent.
+        """
+        spec = cls(**defaults)
+        for field in fields(cls):
+            value = getattr(spec, field.name)
+            if isinstance(value, float):
+                value = get_scale(field.name, round(value * 100)) / 100
+            elif isinstance(value, int):
+                value = get_scale(field.name, value)
+            setattr(spec, field.name, value)
+        return spec
+
+    def as_dict(self):
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+
+def _generate_sections(template, spec, rng):
+    sections = []
+    position = 0
+
+    def add(level, super_section):
+        nonlocal position
+        position += 1
+        section = Section(
+            template=template,
+            title=f'Section {position}',
+            position=position,
+            section_depth=level,
+            super_section=super_section,
+            branching=rng.random() < spec.branching,
+            repeatable=level > 1 and rng.random() < spec.repeatable,
+        )
+        sections.append(section)
+        return section
+
+    def add_subtree(level, super_section):
+        section = add(level, super_section)
+        if level < spec.depth:
+            section.save()
+            for _ in range(spec.subsections):
+                add_subtree(level + 1, section)
+
+    for _ in range(spec.sections):
+        add_subtree(1, None)
+    Section.objects.bulk_create(s for s in sections if s.pk is None)
+    return list(template.sections.order_by('position'))
+
+
+def _generate_questions(section, spec, rng):
+    questions = []
+    for position in range(1, spec.questions + 1):
+        input_type = rng.choice(spec.question_types)
+        questions.append(Question(
+            section=section,
+            position=position,
+            question=f'Question {position} of {section.title}',
+            input_type_id=input_type,
+            optional=rng.random() < 0.1,
+        ))
+    if section.branching:
+        # Every third question may skip the next one
+        for i in range(0, len(questions) - 2, 3):
+            questions[i].input_type_id = 'bool'
+            questions[i].optional = False
+            questions[i + 1].on_trunk = False
+    return questions
+
+
+def generate_template(spec=None, **kwargs):
+    "Generate a template shaped by `spec`, `kwargs` are passed to the template"
+    spec = spec or TemplateSpec()
+    rng = random.Random(spec.seed)
+    kwargs.setdefault('title', f'Benchmark template {spec.seed}')
+    template = Template.objects.create(**kwargs)
+    sections = _generate_sections(template, spec, rng)
+    Question.objects.bulk_create(
+        question
+        for section in sections
+        for question in _generate_questions(section, spec, rng)
+    )
+    questions = list(
+        Question.objects
+        .filter(section__template=template)
+        .order_by('section__position', 'position')
+    )
+    canned_answers = []
+    branches = []
+    by_position = {(q.section_id, q.position): q for q in questions}
+    for question in questions:
+        if question.input_type_id == 'bool':
+            choices = ('Yes', 'No')
+        elif question.input_type_id == 'choice':
+            choices = CHOICES
+        else:
+            continue
+        for position, choice in enumerate(choices, start=1):
+            canned_answers.append(CannedAnswer(
+                question=question,
+                position=position,
+                choice=choice,
+                canned_text=f'{choice} for {question.pk}',
+            ))
+        next_question = by_position.get((question.section_id, question.position + 1))
+        skip_to = by_position.get((question.section_id, question.position + 2))
+        if next_question and skip_to and not next_question.on_trunk:
+            branches.append(ExplicitBranch(
+                current_question=question,
+                category='CannedAnswer',
+                condition='Yes',
+                next_question=skip_to,
+            ))
+    CannedAnswer.objects.bulk_create(canned_answers)
+    ExplicitBranch.objects.bulk_create(branches)
+    touch_template(template.pk)
+    return Template.objects.get(pk=template.pk)
+
+
+def _make_answers(questions, rng):
+    data = {}
+    skip = False
+    for question, next_question in zip(questions, questions[1:] + [None]):
+        if skip:
+            skip = False
+            continue
+        choice = ANSWERS[question.input_type_id](rng, question.pk)
+        data[str(question.pk)] = {'choice': choice, 'notes': ''}
+        # "Yes" skips the next question if it is off the trunk
+        skip = (question.input_type_id == 'bool' and choice == 'Yes'
+                and next_question is not None and not next_question.on_trunk)
+    return data
+
+
+def generate_plan(template, user, repeats=3, seed=0):
+    """Generate a plan for `template` with all questions answered
+
+    Repeatable sections get `repeats` answersets each.
+    """
+    rng = random.Random(seed)
+    plan = Plan(
+        template=template,
+        title=f'Benchmark plan {seed}',
+        added_by=user,
+        modified_by=user,
+    )
+    plan.save()  # Adds an answerset per section
+    sections = {section.pk: section for section in template.sections.all()}
+    extra = [
+        AnswerSet(
+            plan=plan,
+            section_id=answerset.section_id,
+            parent_id=answerset.parent_id,
+            identifier=str(i),
+            valid=False,
+        )
+        for answerset in plan.answersets.all()
+        if sections[answerset.section_id].repeatable
+        for i in range(2, repeats + 1)
+    ]
+    AnswerSet.objects.bulk_create(extra)
+    new_answersets = AnswerSet.objects.filter(plan=plan).exclude(answers__isnull=False)
+    question_ids = {}
+    for pk, section_id in Question.objects.filter(section__in=sections).values_list('pk', 'section_id'):
+        question_ids.setdefault(section_id, []).append(pk)
+    Answer.objects.bulk_create(
+        Answer(answerset=answerset, question_id=question_id)
+        for answerset in new_answersets
+        for question_id in question_ids.get(answerset.section_id, ())
+    )
+    plan.add_missing_answersets()  # Children of the new answersets
+
+    questions = {}
+    for question in Question.objects.filter(section__in=sections).order_by('position'):
+        questions.setdefault(question.section_id, []).append(question)
+    answersets = list(plan.answersets.order_by('pk'))
+    for answerset in answersets:
+        answerset.data = _make_answers(questions.get(answerset.section_id, ()), rng)
+        answerset.skipped = None
+    AnswerSet.objects.bulk_update(answersets, ['data', 'skipped'])
+    return Plan.objects.get(pk=plan.pk)
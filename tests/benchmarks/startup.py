@@ -0,0 +1,82 @@
+"""Measure what is imported when starting up
+
+Each measurement runs in a fresh Python process, with ``-X importtime``,
+so that nothing is imported already.
+"""
+
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+
+__all__ = [
+    'LAZY_MODULES',
+    'ImportTimes',
+    'run_python',
+    'load_wsgi_app',
+    'manage_py_check',
+]
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+SETTINGS = 'tests.test_settings'
+
+# Slow to import and only needed for some requests or commands
+LAZY_MODULES = ('weasyprint', 'graphviz')
+
+_LOAD_WSGI_APP = '''
+import json, sys
+import easydmp.site.wsgi
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps(sorted(sys.modules)), file=sys.stderr)
+'''
+
+
+class ImportTimes:
+    "The output of ``python -X importtime``"
+
+    def __init__(self, stderr):
+        self.cumulative = {}  # module -> microseconds, including its imports
+        self.total = 0
+        self.other = []
+        for line in stderr.splitlines():
+            if not line.startswith('import time:'):
+                self.other.append(line)
+                continue
+            _, cumulative, module = line.split('|')
+            if not cumulative.strip().isdigit():  # the header
+                continue
+            name = module.strip()
+            self.cumulative[name] = int(cumulative)
+            # Nested imports are indented by two more spaces per level
+            if len(module) - len(module.lstrip()) == 1:
+                self.total += int(cumulative)
+
+    def slowest(self, num=10):
+        "The <num> imports taking the most time, with what they import"
+        return sorted(self.cumulative.items(), key=lambda item: -item[1])[:num]
+
+
+def run_python(*args):
+    "Run a Python process with the test settings, return its ImportTimes"
+    env = dict(os.environ)
+    env['DJANGO_SETTINGS_MODULE'] = SETTINGS
+    env['PYTHONPATH'] = os.pathsep.join(sys.path)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        capture_output=True, text=True, cwd=ROOT, env=env, check=True,
+    )
+    return ImportTimes(result.stderr)
+
+
+def load_wsgi_app():
+    "Load the WSGI app and the urls, return ImportTimes and the imported modules"
+    import_times = run_python('-c', _LOAD_WSGI_APP)
+    modules = set(json.loads(import_times.other[-1]))
+    return import_times, modules
+
+
+def manage_py_check():
+    return run_python('manage.py', 'check', f'--settings={SETTINGS}')
@@ -0,0 +1,62 @@
+from django import test
+from django.urls import reverse
+
+from easydmp.plan.models import AnswerSet, Answer
+from tests.auth.factories import UserFactory
+from tests.dmpt.factories import create_smallest_template
+from tests.plan.factories import PlanFactory
+
+from . import benchmark, timed
+
+
+@benchmark
+class BenchmarkAPILists(test.TestCase):
+    "v2 list endpoints serializing 100, 1000 and 10000 rows"
+    SIZES = (100, 1_000, 10_000)
+
+    @classmethod
+    def setUpTestData(cls):
+        template = create_smallest_template()
+        section = template.sections.get()
+        question = section.questions.get()
+        cls.user = UserFactory()
+        plans = [PlanFactory(template=template, added_by=cls.user) for _ in range(10)]
+        AnswerSet.objects.bulk_create(
+            AnswerSet(
+                plan=plans[i % len(plans)],
+                section=section,
+                identifier=f'bench{i}',
+                data={str(question.pk): {'choice': f'Answer {i}', 'notes': ''}},
+            )
+            for i in range(max(cls.SIZES))
+        )
+        Answer.objects.bulk_create(
+            Answer(answerset_id=answerset_id, question=question)
+            for answerset_id in AnswerSet.objects.filter(identifier__startswith='bench')
+                                                 .values_list('id', flat=True)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def run_list(self, urlname):
+        url = reverse(urlname)
+        for size in self.SIZES:
+            with timed(f'{urlname}, {size} rows, paginated'):
+                response = self.client.get(url, {'page_size': size})
+                self.assertEqual(response.status_code, 200)
+            with timed(f'{urlname}, {size} rows, cursor'):
+                response = self.client.get(url, {'page_size': size, 'cursor': ''})
+                self.assertEqual(response.status_code, 200)
+
+    def test_answerset_list(self):
+        self.run_list('v2:answerset-list')
+
+    def test_answer_list(self):
+        self.run_list('v2:answer-list')
+
+    def test_answerset_list_streamed(self):
+        url = reverse('v2:answerset-list')
+        with timed('v2:answerset-list, all rows, streamed'):
+            response = self.client.get(url, {'page_size': 0})
+            b''.join(response.streaming_content)
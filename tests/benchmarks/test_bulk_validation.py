@@ -0,0 +1,88 @@
+from django import test
+from django.urls import reverse
+
+from easydmp.dmpt.models import ExplicitBranch, Section, Template
+from easydmp.dmpt.validation import clear_validator_cache
+from tests.auth.factories import UserFactory
+from tests.dmpt.factories import (
+    TemplateFactory,
+    SectionFactory,
+    BooleanQuestionFactory,
+    ChoiceQuestionFactory,
+    ReasonQuestionFactory,
+    ShortFreetextQuestionFactory,
+)
+
+from . import benchmark, get_scale, timed
+
+
+@benchmark
+class BenchmarkBulkValidation(test.TestCase):
+    "Validating thousands of answersets in one request"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        template = TemplateFactory()
+        cls.section = SectionFactory(template=template, position=1)
+        questions = []
+        for position in range(1, 21):
+            if position % 2:
+                question = ChoiceQuestionFactory(section=cls.section, position=position)
+            else:
+                question = ShortFreetextQuestionFactory(section=cls.section, position=position)
+            questions.append(question.get_instance())
+        answers = {}
+        for question in questions:
+            try:
+                choice = question.get_choices_keys()[0]
+            except NotImplementedError:
+                choice = 'Some text'
+            answers[str(question.pk)] = {'choice': choice, 'notes': ''}
+        # Every "Yes" skips the next question
+        cls.branching_section = SectionFactory(template=template, position=2, branching=True)
+        branching_answers = {}
+        for position in range(1, 21, 2):
+            question = BooleanQuestionFactory(section=cls.branching_section, position=position)
+            detour = ReasonQuestionFactory(section=cls.branching_section,
+                                           position=position + 1, on_trunk=False)
+            branching_answers[str(question.pk)] = {'choice': 'No', 'notes': ''}
+            branching_answers[str(detour.pk)] = {'choice': 'Some text', 'notes': ''}
+            if position > 1:
+                ExplicitBranch.objects.create(
+                    current_question=previous, condition='Yes',
+                    category='CannedAnswer', next_question=question,
+                )
+            previous = question
+        cls.template = Template.objects.get(pk=template.pk)
+        num = get_scale('answersets', 5_000)
+        cls.answersets = [
+            {'section': cls.section.pk, 'data': answers}
+            for _ in range(num // 2)
+        ] + [
+            {'section': cls.branching_section.pk, 'data': branching_answers}
+            for _ in range(num - num // 2)
+        ]
+        print(f'\n{len(cls.answersets)} answersets of {len(questions)} questions, '
+              'half of them in a branching section')
+
+    def setUp(self):
+        clear_validator_cache()
+        self.client.force_login(self.user)
+
+    def test_validate(self):
+        url = reverse('v2:template-validate', kwargs={'pk': self.template.pk})
+        sample = self.answersets[:50] + self.answersets[-50:]
+        sections = Section.objects.in_bulk()
+        with timed('Section.validate_data, per answerset', repeat=len(sample)):
+            for answerset in sample:
+                sections[answerset['section']].validate_data(answerset['data'])
+        payload = {'answersets': self.answersets}
+        with timed('First request, validators not cached'):
+            response = self.client.post(url, payload, content_type='application/json')
+        self.assertTrue(response.json()['valid'])
+        with timed('Second request', repeat=3):
+            for _ in range(3):
+                self.client.post(url, payload, content_type='application/json')
+        with timed('Second request, per answerset', repeat=len(self.answersets)):
+            self.client.post(url, payload, content_type='application/json')
@@ -0,0 +1,59 @@
+from unittest import mock
+
+from django import test
+
+from easydmp.dmpt.utils import get_compiled_template
+from easydmp.plan.models import AnswerSet, Plan, render_canned_text
+from tests.plan.test_canned_text import make_template, answer
+
+from . import benchmark, get_scale, timed
+
+
+@benchmark
+class BenchmarkCannedText(test.TestCase):
+    "Rendering the canned text of a plan with many answersets"
+
+    @classmethod
+    def setUpTestData(cls):
+        num_answersets = get_scale('canned_text_answersets', 300)
+        template, (choice, freetext, forecast) = make_template()
+        cls.plan = Plan(template=template, added_by_id=1, modified_by_id=1, valid=False)
+        cls.plan.save()
+        section = template.sections.get()
+        forecasts = [
+            {'year': 2030 + i, 'storage_estimate': i, 'backup_percentage': '10%'}
+            for i in range(5)
+        ]
+        AnswerSet.objects.bulk_create(
+            AnswerSet(
+                plan=cls.plan,
+                section=section,
+                identifier=f'bench{i}',
+                data={
+                    **answer(choice, 'ab'[i % 2]),
+                    **answer(freetext, f'Dataset {i}'),
+                    **answer(forecast, forecasts),
+                },
+            )
+            for i in range(num_answersets)
+        )
+        print(f'\nCanned text of {num_answersets} answersets')
+
+    def render_per_answerset(self):
+        answersets = self.plan.answersets.select_related('section')
+        return {
+            answerset.pk: self.plan.make_canned_text_of_answerset(answerset)
+            for answerset in answersets
+        }
+
+    def test_render(self):
+        uncached = get_compiled_template.__wrapped__
+        with mock.patch('easydmp.dmpt.utils.get_compiled_template', uncached):
+            with timed('per answerset, compiling every framing text'):
+                self.render_per_answerset()
+        with timed('per answerset, cached compiled framing texts'):
+            self.render_per_answerset()
+        with timed('render_canned_text'):
+            render_canned_text(self.plan)
+        with timed('Plan.get_nested_canned_text'):
+            self.plan.get_nested_canned_text()
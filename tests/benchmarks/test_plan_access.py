@@ -0,0 +1,80 @@
+import random
+
+from django import test
+
+from easydmp.auth.models import User
+from easydmp.lib.views.mixins import KeysetPaginationMixin
+from easydmp.plan.models import Plan, PlanAccess
+from tests.dmpt.factories import TemplateFactory
+
+from . import benchmark, get_scale, timed
+
+
+@benchmark
+class BenchmarkPlanAccess(test.TestCase):
+    """Plan lists for users among many plans and accesses
+
+    Scale with EASYDMP_BENCHMARK_PLANS and EASYDMP_BENCHMARK_USERS.
+    """
+    PAGE_SIZE = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        num_plans = get_scale('plans', 100_000)
+        num_users = get_scale('users', 10_000)
+        rng = random.Random(0)
+        template = TemplateFactory()
+        User.objects.bulk_create(
+            User(username=f'bench{i}', email=f'bench{i}@example.com')
+            for i in range(num_users)
+        )
+        user_ids = list(User.objects.values_list('id', flat=True))
+        plans = []
+        for i in range(num_plans):
+            user_id = rng.choice(user_ids)
+            plans.append(Plan(
+                title=f'Plan {i}',
+                template=template,
+                added_by_id=user_id,
+                modified_by_id=user_id,
+                published=None,
+            ))
+        Plan.objects.bulk_create(plans, batch_size=5000)
+        accesses = []
+        for plan_id, user_id in Plan.objects.values_list('id', 'added_by_id'):
+            accesses.append(PlanAccess(plan_id=plan_id, user_id=user_id, may_edit=True))
+            viewer_id = rng.choice(user_ids)
+            if viewer_id != user_id:
+                accesses.append(PlanAccess(plan_id=plan_id, user_id=viewer_id, may_edit=False))
+        PlanAccess.objects.bulk_create(accesses, batch_size=5000)
+        # A heavy user with access to a tenth of all plans
+        cls.user = User.objects.create(username='heavy', email='heavy@example.com')
+        plan_ids = Plan.objects.values_list('id', flat=True)[:max(num_plans // 10, 1)]
+        PlanAccess.objects.bulk_create(
+            (PlanAccess(plan_id=plan_id, user=cls.user, may_edit=True) for plan_id in plan_ids),
+            batch_size=5000,
+        )
+
+    def test_viewable_first_page(self):
+        qs = Plan.objects.viewable(self.user).order_by('-added', '-id')
+        with self.assertNumQueries(1), timed('viewable, first page'):
+            list(qs[:self.PAGE_SIZE])
+
+    def test_viewable_last_page(self):
+        pagination = KeysetPaginationMixin()
+        pagination.keyset_ordering = ('-added', '-id')
+        qs = Plan.objects.viewable(self.user).order_by(*pagination.keyset_ordering)
+        last = qs.reverse()[self.PAGE_SIZE]
+        page = pagination.filter_after(qs, [last.added, last.id])
+        with self.assertNumQueries(1), timed('viewable, last page by keyset'):
+            plans = list(page[:self.PAGE_SIZE])
+        self.assertEqual(plans, list(qs.reverse()[:self.PAGE_SIZE])[::-1])
+
+    def test_viewable_count(self):
+        with timed('viewable, count'):
+            Plan.objects.viewable(self.user).count()
+
+    def test_editable_first_page(self):
+        qs = Plan.objects.editable(self.user).order_by('-added', '-id')
+        with self.assertNumQueries(1), timed('editable, first page'):
+            list(qs[:self.PAGE_SIZE])
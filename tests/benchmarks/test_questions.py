@@ -0,0 +1,48 @@
+from django import test
+
+from easydmp.dmpt.models import Question, ShortFreetextQuestion, Section
+
+from tests.dmpt.factories import TemplateFactory, SectionFactory
+
+from . import benchmark, get_scale, timed
+
+
+@benchmark
+class BenchmarkQuestionCasting(test.TestCase):
+    "Converting questions to their subtypes in validation and summary loops"
+
+    @classmethod
+    def setUpTestData(cls):
+        num_questions = get_scale('questions', 500)
+        cls.section = SectionFactory(template=TemplateFactory(), position=1)
+        ShortFreetextQuestion.objects.bulk_create(
+            ShortFreetextQuestion(section=cls.section, position=position,
+                                  question=f'Question {position}',
+                                  input_type_id='shortfreetext')
+            for position in range(1, num_questions + 1)
+        )
+        cls.data = {
+            str(pk): {'choice': f'Answer {pk}', 'notes': ''}
+            for pk in Question.objects.values_list('pk', flat=True)
+        }
+        print(f'\nSection with {num_questions} questions')
+
+    def test_cast_overhead(self):
+        qs = Question.objects.filter(section=self.section)
+        with timed('Load untyped, then get_instance()'):
+            [question.get_instance() for question in qs]
+        with timed('Load with typed()'):
+            questions = list(qs.typed())
+        with timed('get_instance() on typed questions, 10 passes', repeat=10):
+            for _ in range(10):
+                for question in questions:
+                    question.get_instance()
+
+    def test_loops(self):
+        section = Section.objects.get(pk=self.section.pk)
+        with timed('find_validity_of_questions', repeat=5):
+            for _ in range(5):
+                section.find_validity_of_questions(self.data)
+        with timed('get_data_summary', repeat=5):
+            for _ in range(5):
+                section.get_data_summary(self.data)
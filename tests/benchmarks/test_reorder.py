@@ -0,0 +1,40 @@
+from django import test
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from easydmp.dmpt.models import ShortFreetextQuestion
+from easydmp.dmpt.positioning import Move
+from tests.dmpt.factories import TemplateFactory, SectionFactory
+
+from . import benchmark, get_scale, timed
+
+
+@benchmark
+class BenchmarkReorderQuestions(test.TestCase):
+    "Moving questions around in a big section"
+
+    @classmethod
+    def setUpTestData(cls):
+        num_questions = get_scale('reorder_questions', 200)
+        cls.section = SectionFactory(template=TemplateFactory(), position=1)
+        ShortFreetextQuestion.objects.bulk_create(
+            ShortFreetextQuestion(section=cls.section, position=position,
+                                  input_type_id='shortfreetext')
+            for position in range(1, num_questions + 1)
+        )
+        print(f'\nReordering a section of {num_questions} questions')
+
+    def test_moves(self):
+        order = self.section.get_question_order()
+        with CaptureQueriesContext(connection) as queries:
+            with timed('Move one question down, one at a time', repeat=10):
+                for _ in range(10):
+                    self.section.reorder_questions(order[0], Move.DOWN)
+        print(f'  {len(queries) / 10:.1f} queries per move')
+        moves = [(pk, Move.DOWN) for pk in order[:10]]
+        with CaptureQueriesContext(connection) as queries:
+            with timed('Ten moves in one batch'):
+                self.section.move_questions(moves)
+        print(f'  {len(queries)} queries')
+        with timed('Reverse the whole order'):
+            self.section.set_question_order(order[::-1])
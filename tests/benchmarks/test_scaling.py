@@ -0,0 +1,111 @@
+import json
+
+from django import test
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from easydmp.dmpt.export_template import serialize_template_export
+from easydmp.dmpt.import_template import import_or_get_template
+from easydmp.dmpt.models import Question
+from easydmp.plan.models import Plan
+from easydmp.rdadcs.lib.export_plan import GenerateRDA11
+from tests.auth.factories import UserFactory
+
+from . import benchmark, get_scale, BenchmarkResults
+from .generator import TemplateSpec, generate_template, generate_plan
+
+
+@benchmark
+@override_settings(VERSION='benchmark')
+class BenchmarkScaling(test.TestCase):
+    """How the main operations on templates and plans scale
+
+    The size of the template and plan is set via EASYDMP_BENCHMARK_SECTIONS,
+    _DEPTH, _SUBSECTIONS, _QUESTIONS, _BRANCHING, _REPEATABLE and _REPEATS,
+    see `TemplateSpec`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.spec = TemplateSpec.from_environment()
+        cls.repeats = get_scale('repeats', 3)
+        cls.user = UserFactory()
+        cls.template = generate_template(cls.spec)
+        cls.plan = generate_plan(cls.template, cls.user, repeats=cls.repeats)
+        cls.num_questions = Question.objects.filter(section__template=cls.template).count()
+        cls.num_answersets = cls.plan.answersets.count()
+        print(f'\nTemplate with {cls.template.sections.count()} sections and '
+              f'{cls.num_questions} questions, plan with {cls.num_answersets} answersets')
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.results = BenchmarkResults(
+            'scaling',
+            repeats=cls.repeats,
+            num_questions=cls.num_questions,
+            num_answersets=cls.num_answersets,
+            **cls.spec.as_dict(),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        path = cls.results.write()
+        if path:
+            print(f'Results written to {path}')
+        super().tearDownClass()
+
+    def get_plan(self):
+        return Plan.objects.get(pk=self.plan.pk)
+
+    def test_get_nested_summary(self):
+        plan = self.get_plan()
+        with self.results.measure('Plan.get_nested_summary'):
+            plan.get_nested_summary()
+
+    def test_get_nested_canned_text(self):
+        plan = self.get_plan()
+        with self.results.measure('Plan.get_nested_canned_text'):
+            plan.get_nested_canned_text()
+
+    def test_validate(self):
+        plan = self.get_plan()
+        with self.results.measure('Plan.validate'):
+            plan.validate(self.user, recalculate=True)
+        self.assertTrue(self.get_plan().valid)
+
+    def test_rda_export(self):
+        plan = self.get_plan()
+        with self.results.measure('GenerateRDA11.json'):
+            GenerateRDA11(plan).json()
+
+    def test_template_export_import(self):
+        with self.results.measure('Template export'):
+            export = JSONRenderer().render(
+                serialize_template_export(self.template.pk).data
+            )
+        export_dict = json.loads(export)
+        with self.results.measure('Template import'):
+            tim = import_or_get_template(export_dict, origin='benchmark')
+        self.assertEqual(
+            Question.objects.filter(section__template=tim.template).count(),
+            self.num_questions,
+        )
+
+    def test_plan_clone(self):
+        plan = self.get_plan()
+        with self.results.measure('Plan.clone'):
+            plan.clone()
+
+    def test_get_next_question(self):
+        plan = self.get_plan()
+        answersets = {answerset.section_id: answerset.data
+                      for answerset in plan.answersets.all()}
+        questions = list(
+            Question.objects
+            .filter(section__template=self.template)
+            .order_by('section__position', 'position')[:get_scale('next_questions', 100)]
+        )
+        with self.results.measure('Question.get_next_question', repeat=len(questions)):
+            for question in questions:
+                question.get_next_question(answersets.get(question.section_id, {}))
@@ -0,0 +1,36 @@
+import unittest
+
+from . import benchmark, get_scale, BenchmarkResults
+from .startup import load_wsgi_app, manage_py_check
+
+
+@benchmark
+class BenchmarkStartup(unittest.TestCase):
+    """How long it takes to import everything needed to start
+
+    Prints the EASYDMP_BENCHMARK_SLOWEST_IMPORTS slowest imports, as
+    measured by ``python -X importtime``.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.results = BenchmarkResults('startup')
+        cls.num_slowest = get_scale('slowest_imports', 10)
+
+    @classmethod
+    def tearDownClass(cls):
+        path = cls.results.write()
+        if path:
+            print(f'Results written to {path}')
+
+    def report(self, label, import_times):
+        self.results.add(label, import_times.total / 1000)
+        for module, us in import_times.slowest(self.num_slowest):
+            print(f'  {us / 1000:8.2f} ms  {module}')
+
+    def test_load_wsgi_app(self):
+        import_times, _ = load_wsgi_app()
+        self.report('Imports of WSGI app', import_times)
+
+    def test_manage_py_check(self):
+        self.report('Imports of manage.py check', manage_py_check())
@@ -2,6 +2,7 @@ from django import test
 
 from easydmp.dmpt.flow import Transition
 from easydmp.dmpt.models import ExplicitBranch
+from easydmp.dmpt.models import Question, ReasonQuestion, ShortFreetextQuestion
 from easydmp.dmpt.positioning import Move
 
 from tests.dmpt.factories import (
@@ -276,3 +277,24 @@ class TestIdentifyingQuestions(CannedData, test.TestCase):
         self.assertFalse(reason.can_identify)
         with self.assertRaises(NotImplementedError):
             reason.get_identifier('vfbgnhj')
+
+
+class TestTypedQuestions(CannedData, test.TestCase):
+
+    def test_typed_yields_subtypes(self):
+        ReasonQuestionFactory(section=self.section, position=1)
+        ShortFreetextQuestionFactory(section=self.section, position=2)
+        questions = list(Question.objects.filter(section=self.section).typed())
+        self.assertEqual([type(q) for q in questions],
+                         [ReasonQuestion, ShortFreetextQuestion])
+
+    def test_untyped_yields_base_class(self):
+        ReasonQuestionFactory(section=self.section, position=1)
+        question = self.section.questions.get()
+        self.assertIs(type(question), Question)
+        self.assertIs(question.get_instance(), question)
+        self.assertIs(type(question), ReasonQuestion)
+
+    def test_typed_does_not_affect_values(self):
+        q = ReasonQuestionFactory(section=self.section, position=1)
+        self.assertEqual(list(self.section.questions.typed().values_list('pk', flat=True)), [q.pk])
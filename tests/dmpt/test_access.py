@@ -0,0 +1,108 @@
+from django import test
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.db.models import F
+from django.urls import reverse
+from django.utils.timezone import now as utcnow
+from guardian.shortcuts import assign_perm, remove_perm
+
+from easydmp.dmpt.access import get_accessible_template_ids
+from easydmp.dmpt.admin import get_templates_for_user
+from easydmp.dmpt.models import Template, TemplateAccessVersion, TemplateUserObjectPermission
+
+from tests.auth.factories import UserFactory
+from tests.dmpt.factories import TemplateFactory
+
+
+class TestAccessibleTemplates(test.TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory()
+        self.public = TemplateFactory(published=utcnow())
+        self.private = TemplateFactory()
+        self.retired = TemplateFactory(published=utcnow(), retired=utcnow())
+
+    def test_publicly_available_templates_are_accessible(self):
+        result = Template.objects.has_access(self.user)
+        self.assertEqual(set(result), {self.public})
+
+    def test_permitted_templates_are_accessible(self):
+        assign_perm('dmpt.use_template', self.user, self.private)
+        result = Template.objects.has_access(self.user)
+        self.assertEqual(set(result), {self.public, self.private})
+
+    def test_group_permitted_templates_are_accessible(self):
+        group = Group.objects.create(name='Testers')
+        assign_perm('dmpt.use_template', group, self.private)
+        self.assertNotIn(self.private.pk, get_accessible_template_ids(self.user))
+        self.user.groups.add(group)
+        self.assertIn(self.private.pk, get_accessible_template_ids(self.user))
+
+    def test_accessible_templates_are_cached(self):
+        get_accessible_template_ids(self.user)
+        # Only the version is looked up
+        with self.assertNumQueries(1):
+            get_accessible_template_ids(self.user)
+
+    def test_version_is_shared_between_processes(self):
+        self.assertNotIn(self.private.pk, get_accessible_template_ids(self.user))
+        # As if in another process: no signal reaches this one
+        TemplateUserObjectPermission.objects.bulk_create([
+            TemplateUserObjectPermission(
+                user=self.user, content_object=self.private,
+                permission=Permission.objects.get(codename='use_template'),
+            )
+        ])
+        self.assertNotIn(self.private.pk, get_accessible_template_ids(self.user))
+        TemplateAccessVersion.objects.update(version=F('version') + 1)
+        self.assertIn(self.private.pk, get_accessible_template_ids(self.user))
+
+    def test_permission_changes_invalidate_cache(self):
+        self.assertNotIn(self.private.pk, get_accessible_template_ids(self.user))
+        assign_perm('dmpt.use_template', self.user, self.private)
+        self.assertIn(self.private.pk, get_accessible_template_ids(self.user))
+        remove_perm('dmpt.use_template', self.user, self.private)
+        self.assertNotIn(self.private.pk, get_accessible_template_ids(self.user))
+
+    def test_publish_and_retire_invalidate_cache(self):
+        self.assertNotIn(self.private.pk, get_accessible_template_ids(self.user))
+        self.private.published = utcnow()
+        self.private.save()
+        self.assertIn(self.private.pk, get_accessible_template_ids(self.user))
+        self.private.retired = utcnow()
+        self.private.save()
+        self.assertNotIn(self.private.pk, get_accessible_template_ids(self.user))
+
+    def test_get_templates_for_user(self):
+        assign_perm('dmpt.change_template', self.user, self.private)
+        self.assertEqual(set(get_templates_for_user(self.user)), {self.private})
+        self.assertFalse(get_templates_for_user(self.user, ['delete']).exists())
+
+
+class TestTemplateViewSetUsableFilter(test.TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory()
+        self.public = TemplateFactory(published=utcnow())
+        self.private = TemplateFactory()
+        assign_perm('dmpt.use_template', self.user, self.private)
+        self.other = TemplateFactory()
+
+    def get_pks(self, query):
+        response = self.client.get(reverse('v2:template-list') + query)
+        self.assertEqual(response.status_code, 200)
+        return {template['id'] for template in response.json()}
+
+    def test_usable_for_user(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.get_pks('?usable=true'), {self.public.pk, self.private.pk})
+        self.assertEqual(self.get_pks('?usable=false'), {self.other.pk})
+
+    def test_unfiltered(self):
+        self.client.force_login(self.user)
+        self.assertEqual(
+            self.get_pks(''),
+            {self.public.pk, self.private.pk, self.other.pk},
+        )
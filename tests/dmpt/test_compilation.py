@@ -0,0 +1,148 @@
+from io import StringIO
+
+from django import test
+from django.core.management import call_command
+from django.utils.timezone import now as tznow
+
+from easydmp.dmpt.compilation import compile_template, get_template_artifact
+from easydmp.dmpt.compilation import clear_template_artifact_cache
+from easydmp.dmpt.models import CompiledTemplate, ExplicitBranch, Section, Template
+from easydmp.dmpt.flow import find_cycle_nodes, find_reachable_nodes
+
+from tests.dmpt.factories import (
+    TemplateFactory,
+    SectionFactory,
+    BooleanQuestionFactory,
+    ReasonQuestionFactory,
+)
+
+
+class TestGraphHelpers(test.SimpleTestCase):
+
+    def test_find_reachable_nodes(self):
+        graph = {1: {2}, 2: {None}, 3: {2}}
+        self.assertEqual(find_reachable_nodes(graph, 1), {1, 2, None})
+
+    def test_find_cycle_nodes(self):
+        graph = {1: {2}, 2: {3}, 3: {2, None}}
+        self.assertEqual(find_cycle_nodes(graph), {2, 3})
+
+
+class TestCompileTemplate(test.TestCase):
+
+    def setUp(self):
+        clear_template_artifact_cache()
+        self.template = TemplateFactory()
+        self.section = SectionFactory(template=self.template, position=1, branching=True)
+        self.qstart = BooleanQuestionFactory(section=self.section, position=1)
+        self.qdetour = ReasonQuestionFactory(section=self.section, position=2, on_trunk=False)
+        self.qend = ReasonQuestionFactory(section=self.section, position=3)
+        ExplicitBranch.objects.create(current_question=self.qstart, condition='Yes',
+                                      category='CannedAnswer', next_question=self.qend)
+        self.empty_section = SectionFactory(template=self.template, position=2)
+
+    def publish(self):
+        template = Template.objects.get(pk=self.template.pk)
+        template.published = tznow()
+        template.save()
+        return Template.objects.get(pk=self.template.pk)
+
+    def test_compile_template(self):
+        artifact = compile_template(self.template)
+        self.assertTrue(artifact['valid'])
+        section = artifact['sections'][str(self.section.pk)]
+        self.assertEqual(section['start'], self.qstart.pk)
+        self.assertEqual(section['trunk'], [self.qstart.pk, self.qend.pk])
+        self.assertEqual(section['branch'], [self.qdetour.pk])
+        self.assertEqual(section['reachable'], [self.qstart.pk, self.qdetour.pk, self.qend.pk])
+        self.assertEqual(
+            sorted(section['paths']),
+            sorted([[self.qstart.pk, self.qend.pk],
+                    [self.qstart.pk, self.qdetour.pk, self.qend.pk]]),
+        )
+        self.assertFalse(artifact['sections'][str(self.empty_section.pk)]['has_questions'])
+        question = artifact['questions'][str(self.qstart.pk)]
+        self.assertEqual(question['input_type'], 'bool')
+        self.assertTrue(question['branching_possible'])
+
+    def test_unreachable_question_is_invalid(self):
+        ExplicitBranch.objects.create(current_question=self.qstart, condition='',
+                                      category='ExplicitBranch', next_question=self.qend)
+        with self.assertLogs('easydmp.dmpt.compilation', 'WARNING') as logs:
+            artifact = compile_template(self.template)
+        self.assertIn('Cannot be reached: [{}]'.format(self.qdetour.pk), logs.output[0])
+        section = artifact['sections'][str(self.section.pk)]
+        self.assertFalse(artifact['valid'])
+        self.assertNotIn(self.qdetour.pk, section['reachable'])
+
+    def test_editable_template_has_no_artifact(self):
+        self.assertIsNone(get_template_artifact(self.template))
+        self.assertFalse(CompiledTemplate.objects.exists())
+
+    def test_publishing_compiles(self):
+        template = self.publish()
+        compiled = CompiledTemplate.objects.get(template=template)
+        self.assertEqual(compiled.version, template.modified)
+        clear_template_artifact_cache()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_template_artifact(template), compiled.data)
+        with self.assertNumQueries(0):
+            get_template_artifact(template)
+
+    def test_paths_are_read_from_artifact(self):
+        template = self.publish()
+        section = Section.objects.get(pk=self.section.pk)
+        section.template = template
+        expected = section.find_all_paths()
+        with self.assertNumQueries(0):
+            self.assertEqual(section.find_all_paths(), expected)
+            self.assertTrue(section.is_complete_path((self.qstart.pk, self.qend.pk)))
+
+    def test_reading_does_not_compile(self):
+        template = self.publish()
+        CompiledTemplate.objects.all().delete()
+        clear_template_artifact_cache()
+        with self.assertNumQueries(1):
+            self.assertIsNone(get_template_artifact(template))
+        self.assertFalse(CompiledTemplate.objects.exists())
+
+    def test_changed_template_is_recompiled_on_save(self):
+        template = self.publish()
+        ReasonQuestionFactory(section=self.empty_section, position=4)
+        template = Template.objects.get(pk=template.pk)
+        self.assertIsNone(get_template_artifact(template))
+        template.save()
+        template = Template.objects.get(pk=template.pk)
+        artifact = get_template_artifact(template)
+        self.assertTrue(artifact['sections'][str(self.empty_section.pk)]['has_questions'])
+        self.assertEqual(CompiledTemplate.objects.get().version, template.modified)
+
+    def test_navigation_is_read_from_artifact(self):
+        template = self.publish()
+        section = Section.objects.get(pk=self.section.pk)
+        section.template = template
+        empty_section = Section.objects.get(pk=self.empty_section.pk)
+        empty_section.template = template
+        with self.assertNumQueries(0):
+            self.assertFalse(empty_section.has_questions)
+            self.assertIsNone(empty_section.first_question)
+            self.assertIsNone(empty_section.last_on_trunk_question)
+            self.assertTrue(empty_section.validate_data({}))
+        with self.assertNumQueries(1):
+            self.assertEqual(section.last_on_trunk_question, self.qend)
+        qstart = section.questions.get(pk=self.qstart.pk)
+        qstart.section = section
+        with self.assertNumQueries(1):
+            self.assertEqual(qstart.get_next_on_trunk(), self.qend)
+        answers = {str(self.qstart.pk): {'choice': 'Yes'}}
+        with self.assertNumQueries(1):
+            self.assertEqual(section._get_last_answered_on_trunk_question(answers),
+                             self.qstart)
+
+    def test_command(self):
+        self.publish()
+        CompiledTemplate.objects.all().delete()
+        out = StringIO()
+        call_command('compile_templates', stdout=out)
+        self.assertIn('1 templates compiled, 0 invalid', out.getvalue())
+        self.assertTrue(CompiledTemplate.objects.exists())
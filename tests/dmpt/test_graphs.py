@@ -0,0 +1,126 @@
+from io import StringIO
+import os
+from pathlib import Path
+import tempfile
+from unittest import mock
+
+from django import test
+from django.core.management import call_command
+from django.urls import reverse
+
+from easydmp.dmpt.models import ShortFreetextQuestion, Section
+from easydmp.lib.graphviz import GraphCache
+from tests.auth.factories import UserFactory
+from tests.dmpt.factories import TemplateFactory, SectionFactory
+
+
+def fake_render(format, dotsource):
+    return '{}:{}'.format(format, len(dotsource)).encode()
+
+
+class GraphCacheMixin:
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.cache_dir = Path(tmpdir.name)
+        settings = self.settings(EASYDMP_GRAPH_CACHE_DIR=str(self.cache_dir / 'cache'))
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.section = SectionFactory(template=TemplateFactory(), position=1)
+        ShortFreetextQuestion(section=self.section, position=1).save()
+        self.section = Section.objects.select_related('template').get(pk=self.section.pk)
+
+
+class TestGraphCache(test.SimpleTestCase):
+
+    def test_new_version_replaces_old(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = GraphCache(directory)
+            self.assertIsNone(cache.get('graph', '1', 'pdf'))
+            cache.set('graph', '1', 'pdf', b'one')
+            cache.set('graph', '1', 'svg', b'one')
+            cache.set('graph', '2', 'pdf', b'two')
+            self.assertIsNone(cache.get('graph', '1', 'pdf'))
+            self.assertEqual(cache.get('graph', '1', 'svg'), b'one')
+            self.assertEqual(cache.get('graph', '2', 'pdf'), b'two')
+
+    def test_directory_is_private(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = GraphCache(Path(directory) / 'cache')
+            cache.set('graph', '1', 'pdf', b'one')
+            self.assertEqual(cache.directory.stat().st_mode & 0o777, 0o700)
+            self.assertEqual((cache.directory / 'graph').stat().st_mode & 0o777, 0o700)
+
+    def test_directory_owned_by_others_is_not_used(self):
+        with tempfile.TemporaryDirectory() as directory:
+            GraphCache(directory).set('graph', '1', 'pdf', b'planted')
+            cache = GraphCache(directory)
+            with mock.patch('os.geteuid', return_value=os.geteuid() + 1):
+                with self.assertLogs('easydmp.lib.graphviz', level='WARNING'):
+                    self.assertIsNone(cache.get('graph', '1', 'pdf'))
+                cache.set('graph', '2', 'pdf', b'two')
+            self.assertFalse(cache.get_path('graph', '2', 'pdf').exists())
+
+    def test_symlink_is_not_used(self):
+        with tempfile.TemporaryDirectory() as directory:
+            target = Path(directory) / 'elsewhere'
+            target.mkdir()
+            link = Path(directory) / 'cache'
+            link.symlink_to(target)
+            cache = GraphCache(link)
+            with self.assertLogs('easydmp.lib.graphviz', level='WARNING'):
+                cache.set('graph', '1', 'pdf', b'one')
+            self.assertFalse(list(target.iterdir()))
+
+
+@mock.patch('easydmp.dmpt.models.base.render_dotsource_to_bytes', side_effect=fake_render)
+class TestSectionRenderGraph(GraphCacheMixin, test.TestCase):
+
+    def test_unchanged_section_is_rendered_once(self, render):
+        first = self.section.render_graph('pdf')
+        with self.assertNumQueries(0):
+            second = self.section.render_graph('pdf')
+        self.assertEqual(first, second)
+        self.assertEqual(render.call_count, 1)
+        self.section.render_graph('pdf', debug=True)
+        self.section.render_graph('svg')
+        self.assertEqual(render.call_count, 3)
+
+    def test_changed_section_is_rendered_again(self, render):
+        self.section.render_graph('pdf')
+        ShortFreetextQuestion(section=self.section, position=2).save()
+        section = Section.objects.select_related('template').get(pk=self.section.pk)
+        section.render_graph('pdf')
+        self.assertEqual(render.call_count, 2)
+
+
+@mock.patch('easydmp.dmpt.management.commands.dump_section_graphs.render_dotsource_to_bytes',
+            side_effect=fake_render)
+class TestDumpSectionGraphs(GraphCacheMixin, test.TestCase):
+
+    def dump(self):
+        out = StringIO()
+        call_command('dump_section_graphs', '-A', '-f', 'pdf', 'svg',
+                     '-o', str(self.cache_dir / 'out'), stdout=out)
+        return out.getvalue()
+
+    def test_dump_uses_cache(self, render):
+        self.assertIn('2 graphs rendered, 0 from cache', self.dump())
+        self.assertIn('0 graphs rendered, 2 from cache', self.dump())
+        self.assertEqual(render.call_count, 2)
+        filename = self.section.get_dotsource_filename('svg')
+        self.assertTrue((self.cache_dir / 'out' / filename).read_bytes().startswith(b'svg:'))
+
+
+@mock.patch('easydmp.dmpt.models.base.render_dotsource_to_bytes', side_effect=fake_render)
+class TestGraphEndpoint(GraphCacheMixin, test.TestCase):
+
+    def test_graph_is_cached(self, render):
+        self.client.force_login(UserFactory())
+        url = reverse('v2:section-graph', kwargs={'pk': self.section.pk})
+        response = self.client.get(url, HTTP_ACCEPT='image/svg+xml')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b'svg:'))
+        response = self.client.get(url, HTTP_ACCEPT='image/svg+xml')
+        self.assertEqual(render.call_count, 1)
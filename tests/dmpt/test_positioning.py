@@ -1,6 +1,7 @@
 import unittest
 
 from easydmp.dmpt.positioning import Move, get_new_index, flat_reorder
+from easydmp.dmpt.positioning import batch_reorder, plan_positions
 
 
 class TestGetNewIndex(unittest.TestCase):
@@ -88,3 +89,30 @@ class TestFlatReorder(unittest.TestCase):
         new_order = flat_reorder(old_order, 'c', 9)
         self.assertIsNot(old_order, new_order)
         self.assertEqual(new_order, ['a', 'b', 'c'])
+
+
+class TestBatchReorder(unittest.TestCase):
+
+    def test_moves_are_applied_in_turn(self):
+        old_order = ['a', 'b', 'c', 'd']
+        moves = [('d', Move.TOP), ('a', Move.BOTTOM), ('b', Move.UP)]
+        new_order = batch_reorder(old_order, moves)
+        self.assertEqual(old_order, ['a', 'b', 'c', 'd'])
+        self.assertEqual(new_order, ['b', 'd', 'c', 'a'])
+
+    def test_impossible_move_raises(self):
+        with self.assertRaises(ValueError):
+            batch_reorder(['a', 'b'], [('b', Move.UP), ('b', Move.UP)])
+
+
+class TestPlanPositions(unittest.TestCase):
+
+    def test_only_changed_positions(self):
+        current = {'a': 1, 'b': 2, 'c': 3, 'd': 4}
+        result = plan_positions(current, ['a', 'c', 'b', 'd'])
+        self.assertEqual(result, {'c': 2, 'b': 3})
+
+    def test_gaps_are_closed(self):
+        current = {'a': 1, 'b': 7, 'c': 12}
+        result = plan_positions(current, ['a', 'b', 'c'])
+        self.assertEqual(result, {'b': 2, 'c': 3})
@@ -0,0 +1,184 @@
+from django import test
+from django.core.cache import cache
+from django.urls import reverse
+from jsonschema.validators import validator_for
+
+from easydmp.dmpt.models import (
+    ExplicitBranch,
+    ExternalChoiceNotListedQuestion,
+    ExternalChoiceQuestion,
+    Question,
+    Section,
+    Template,
+)
+from easydmp.dmpt.schema import get_answer_schema, get_template_schema
+from easydmp.eestore.models import EEStoreCache, EEStoreMount
+
+from tests.auth.factories import UserFactory
+from tests.dmpt.factories import (
+    TemplateFactory,
+    SectionFactory,
+    BooleanQuestionFactory,
+    ChoiceQuestionFactory,
+    ReasonQuestionFactory,
+    ShortFreetextQuestionFactory,
+)
+from tests.eestore.factories import EEStoreSourceFactory
+
+
+class TestSchema(test.TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.template = TemplateFactory()
+        self.section = SectionFactory(template=self.template, position=1)
+        self.choice = ChoiceQuestionFactory(section=self.section, position=1)
+        self.text = ShortFreetextQuestionFactory(section=self.section, position=2)
+        self.external = ExternalChoiceQuestion(section=self.section, position=3)
+        self.external.save()
+        source = EEStoreSourceFactory()
+        EEStoreMount.objects.create(question=self.external,
+                                    eestore_type=source.eestore_type)
+        EEStoreCache.objects.create(
+            eestore_pid='a:1', eestore_id=1, remote_id='a:1', name='a:1',
+            eestore_type=source.eestore_type, source=source,
+        )
+        self.template = Template.objects.get(pk=self.template.pk)
+
+    def get_question(self, question):
+        return Question.objects.select_related('section__template').get(pk=question.pk)
+
+    def test_answer_schema_is_cached(self):
+        question = self.get_question(self.choice)
+        schema = get_answer_schema(question)
+        self.assertEqual(schema['question_pk'], self.choice.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_answer_schema(question), schema)
+
+    def test_changing_template_invalidates_answer_schema(self):
+        schema = get_answer_schema(self.get_question(self.choice))
+        self.choice.canned_answers.create(choice='new', position=10)
+        new_schema = get_answer_schema(self.get_question(self.choice))
+        self.assertNotEqual(new_schema, schema)
+        choices = [key for key, _ in new_schema['choice']['input']['choices']]
+        self.assertIn('new', choices)
+
+    def test_template_schema(self):
+        schema = get_template_schema(self.template)
+        section_key = str(self.section.pk)
+        self.assertEqual(list(schema['properties']), [section_key])
+        section_schema = schema['$defs'][f'section-{self.section.pk}']
+        self.assertEqual(
+            set(section_schema['properties']),
+            {str(self.choice.pk), str(self.text.pk), str(self.external.pk)},
+        )
+        choice_schema = schema['$defs'][f'question-{self.choice.pk}']
+        keys = [ca.choice for ca in self.choice.canned_answers.order_by('position')]
+        self.assertEqual(choice_schema['properties']['choice']['enum'], keys)
+        external_schema = schema['$defs'][f'question-{self.external.pk}']
+        self.assertEqual(external_schema['properties']['choice']['enum'], ['a:1'])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_template_schema(self.template), schema)
+
+    def test_template_schema_endpoint(self):
+        self.client.force_login(UserFactory())
+        url = reverse('v2:template-schema', kwargs={'pk': self.template.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        schema = response.json()
+        self.assertTrue(schema['$id'].endswith(url))
+        self.assertIn(str(self.section.pk), schema['properties'])
+
+
+class TestSchemaAgreesWithValidation(test.TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.template = TemplateFactory()
+        self.section = SectionFactory(template=self.template, position=1)
+        self.choice = ChoiceQuestionFactory(section=self.section, position=1)
+        self.optional_choice = ChoiceQuestionFactory(section=self.section, position=2,
+                                                     optional=True)
+        self.text = ShortFreetextQuestionFactory(section=self.section, position=3)
+        self.optional_text = ShortFreetextQuestionFactory(section=self.section, position=4,
+                                                          optional=True)
+        self.not_listed = ExternalChoiceNotListedQuestion(section=self.section, position=5)
+        self.not_listed.save()
+        source = EEStoreSourceFactory()
+        EEStoreMount.objects.create(question=self.not_listed,
+                                    eestore_type=source.eestore_type)
+        EEStoreCache.objects.create(
+            eestore_pid='a:1', eestore_id=1, remote_id='a:1', name='a:1',
+            eestore_type=source.eestore_type, source=source,
+        )
+        self.branching = SectionFactory(template=self.template, position=2, branching=True)
+        self.qstart = BooleanQuestionFactory(section=self.branching, position=1)
+        self.qdetour = ReasonQuestionFactory(section=self.branching, position=2, on_trunk=False)
+        self.qend = ReasonQuestionFactory(section=self.branching, position=3)
+        ExplicitBranch.objects.create(current_question=self.qstart, condition='Yes',
+                                      category='CannedAnswer', next_question=self.qend)
+        self.template = Template.objects.get(pk=self.template.pk)
+        self.schema = get_template_schema(self.template)
+
+    def is_valid(self, instance, ref):
+        schema = {'$defs': self.schema['$defs'], '$ref': f'#/$defs/{ref}'}
+        return validator_for(self.schema)(schema).is_valid(instance)
+
+    def check_answers(self, question, answers):
+        section = Section.objects.get(pk=question.section_id)
+        for answer in answers:
+            with self.subTest(question=question.input_type_id, answer=answer):
+                _, invalids = section.find_validity_of_questions({str(question.pk): answer})
+                self.assertEqual(
+                    self.is_valid(answer, f'question-{question.pk}'),
+                    question.pk not in invalids,
+                )
+
+    def get_answers(self, *choices):
+        answers = [{}, {'notes': 'Notes'}]
+        answers.extend({'choice': choice} for choice in choices)
+        return answers
+
+    def test_choice_questions(self):
+        key = self.choice.canned_answers.first().choice
+        answers = self.get_answers(key, 'not a choice', '', None, [])
+        self.check_answers(self.choice, answers)
+        self.check_answers(self.optional_choice, answers)
+
+    def test_text_questions(self):
+        answers = self.get_answers('Some text', '', None)
+        self.check_answers(self.text, answers)
+        self.check_answers(self.optional_text, answers)
+
+    def test_not_listed_question(self):
+        answers = self.get_answers(
+            {'choices': 'a:1', 'not-listed': False},
+            {'choices': 'b:1', 'not-listed': False},
+            {'choices': 'b:1', 'not-listed': True},
+            {'choices': '', 'not-listed': True},
+            {'not-listed': True},
+            {'not-listed': False},
+            {},
+        )
+        self.check_answers(self.not_listed, answers)
+
+    def test_mandatory_questions_are_required(self):
+        key = self.choice.canned_answers.first().choice
+        answers = {
+            self.choice.pk: {'choice': key},
+            self.text.pk: {'choice': 'Some text'},
+            self.not_listed.pk: {'choice': {'choices': 'a:1', 'not-listed': False}},
+        }
+        section = Section.objects.get(pk=self.section.pk)
+        for missing in (None, *answers):
+            data = {str(pk): answer for pk, answer in answers.items() if pk != missing}
+            with self.subTest(missing=missing):
+                self.assertEqual(
+                    self.is_valid(data, f'section-{self.section.pk}'),
+                    section.validate_data(data),
+                )
+        self.assertFalse(self.is_valid({}, f'section-{self.section.pk}'))
+
+    def test_questions_on_every_path_are_required(self):
+        section = self.schema['$defs'][f'section-{self.branching.pk}']
+        self.assertEqual(section['required'], [str(self.qstart.pk), str(self.qend.pk)])
@@ -0,0 +1,103 @@
+from unittest import mock
+
+from django import test
+
+from easydmp.dmpt.models import CannedAnswer
+from easydmp.dmpt.models import ShortFreetextQuestion
+from easydmp.dmpt.models import Template
+from easydmp.dmpt.structure import get_template_structure
+from easydmp.dmpt.structure import clear_template_structure_cache
+from easydmp.dmpt.positioning import Move
+from easydmp.eventlog.models import EventLog
+from tests.dmpt.factories import TemplateFactory, SectionFactory
+
+
+class TestTemplateStructure(test.TestCase):
+
+    def setUp(self):
+        clear_template_structure_cache()
+        self.template = TemplateFactory()
+        self.s1 = SectionFactory(template=self.template, position=1)
+        self.q1 = ShortFreetextQuestion(section=self.s1, position=1)
+        self.q1.save()
+        self.q2 = ShortFreetextQuestion(section=self.s1, position=2, on_trunk=False)
+        self.q2.save()
+        self.s2 = SectionFactory(template=self.template, position=2)
+        self.s2a = SectionFactory(template=self.template, position=4,
+                                  super_section=self.s2, section_depth=2)
+        ShortFreetextQuestion(section=self.s2a, position=1).save()
+        self.s3 = SectionFactory(template=self.template, position=3)
+        self.template = Template.objects.get(pk=self.template.pk)
+
+    def test_section_order(self):
+        structure = self.template.structure
+        self.assertEqual(structure.section_pks,
+                         (self.s1.pk, self.s2.pk, self.s3.pk, self.s2a.pk))
+        self.assertEqual(structure.ordered_section_pks,
+                         (self.s1.pk, self.s2.pk, self.s2a.pk, self.s3.pk))
+        self.assertEqual(self.template.ordered_sections(),
+                         [self.s1, self.s2, self.s2a, self.s3])
+
+    def test_questions(self):
+        section = self.template.structure.get_section(self.s1.pk)
+        self.assertEqual(section.first_question_id, self.q1.pk)
+        self.assertEqual(section.last_question_id, self.q2.pk)
+        self.assertEqual(section.last_on_trunk_question_id, self.q1.pk)
+        self.assertFalse(self.template.structure.get_section(self.s2.pk).has_questions)
+
+    def test_navigation(self):
+        structure = self.template.structure
+        self.assertEqual(structure.get_next_section_pk(self.s1.pk), self.s2.pk)
+        self.assertEqual(structure.get_next_section_pk(self.s1.pk, nonempty=True), self.s2a.pk)
+        self.assertIsNone(structure.get_prev_section_pk(self.s1.pk))
+        self.assertEqual(structure.get_topmost_section_pk(self.s2a.pk), self.s2.pk)
+        self.assertEqual(self.s3.get_next_nonempty_section(), self.s2a)
+        self.assertEqual(self.s2a.get_prev_nonempty_section(), self.s1)
+        self.assertEqual(self.s2a.get_topmost_section(), self.s2)
+
+    def test_structure_is_cached(self):
+        structure = get_template_structure(self.template)
+        with self.assertNumQueries(0):
+            self.assertIs(get_template_structure(self.template), structure)
+
+    def test_changing_questions_invalidates(self):
+        old = get_template_structure(self.template)
+        q3 = ShortFreetextQuestion(section=self.s2, position=1)
+        q3.save()
+        template = Template.objects.get(pk=self.template.pk)
+        self.assertGreater(template.modified, old.version)
+        new = get_template_structure(template)
+        self.assertEqual(new.get_section(self.s2.pk).question_ids, (q3.pk,))
+
+    def test_reordering_sections_invalidates(self):
+        self.template.structure
+        self.template.set_section_order([self.s3.pk, self.s2.pk, self.s2a.pk, self.s1.pk])
+        template = Template.objects.get(pk=self.template.pk)
+        self.assertEqual(template.structure.topmost_section_pks,
+                         (self.s3.pk, self.s2.pk, self.s1.pk))
+
+    def test_reordering_canned_answers_invalidates(self):
+        ca1 = CannedAnswer.objects.create(question=self.q1, choice='a', position=1)
+        ca2 = CannedAnswer.objects.create(question=self.q1, choice='b', position=2)
+        for reorder in (
+            lambda: self.q1.set_canned_answer_order([ca2.pk, ca1.pk]),
+            lambda: self.q1.move_canned_answers([(ca1.pk, Move.TOP)]),
+        ):
+            old = get_template_structure(Template.objects.get(pk=self.template.pk))
+            reorder()
+            template = Template.objects.get(pk=self.template.pk)
+            self.assertGreater(template.modified, old.version)
+            self.assertIsNot(get_template_structure(template), old)
+
+    def test_deleting_typed_questions_invalidates(self):
+        old = get_template_structure(self.template)
+        ShortFreetextQuestion.objects.get(pk=self.q2.pk).delete()
+        template = Template.objects.get(pk=self.template.pk)
+        self.assertGreater(template.modified, old.version)
+        new = get_template_structure(template)
+        self.assertEqual(new.get_section(self.s1.pk).question_ids, (self.q1.pk,))
+
+    def test_saving_other_models_does_not_invalidate(self):
+        with mock.patch('easydmp.dmpt.signals.touch_template') as touch:
+            EventLog.objects.log_event(self.template, 'test')
+        touch.assert_not_called()
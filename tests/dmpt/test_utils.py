@@ -1,7 +1,10 @@
 from django import test
 
 from easydmp.dmpt.utils import PositionUtils
+from easydmp.dmpt.utils import get_compiled_template, render_from_string
 
+from easydmp.dmpt.models import ShortFreetextQuestion
+from easydmp.dmpt.positioning import Move
 from tests.dmpt.factories import (TemplateFactory, SectionFactory)
 
 
@@ -53,3 +56,59 @@ class TestRenumberMixinViaSection(test.TestCase):
         expected = [s1.pk, s2.pk]
         result = template.get_section_order()
         self.assertEqual(expected, result)
+
+
+class TestSetOrder(test.TestCase):
+
+    def setUp(self):
+        self.section = SectionFactory(template=TemplateFactory(), position=1)
+        self.questions = []
+        for position in range(1, 6):
+            question = ShortFreetextQuestion(section=self.section, position=position)
+            question.save()
+            self.questions.append(question.pk)
+
+    def get_positions(self):
+        return list(self.section.questions.order_by('position').values_list('pk', 'position'))
+
+    def test_unchanged_order_is_not_written(self):
+        with self.assertNumQueries(1):
+            PositionUtils.set_order(self.section.questions.all(), self.questions)
+
+    def test_swap_only_writes_changed_rows(self):
+        q1, q2, q3, q4, q5 = self.questions
+        # read, temporary positions and final positions in a transaction
+        with self.assertNumQueries(5):
+            PositionUtils.set_order(self.section.questions.all(), [q1, q2, q4, q3, q5])
+        self.assertEqual(self.get_positions(),
+                         [(q1, 1), (q2, 2), (q4, 3), (q3, 4), (q5, 5)])
+
+    def test_gaps_without_conflicts_are_closed_directly(self):
+        q1, q2, q3, q4, q5 = self.questions
+        self.section.questions.filter(pk__in=[q4, q5]).delete()
+        self.section.questions.filter(pk=q3).update(position=12)
+        with self.assertNumQueries(4):
+            PositionUtils.set_order(self.section.questions.all(), [q1, q2, q3])
+        self.assertEqual(self.get_positions(), [(q1, 1), (q2, 2), (q3, 3)])
+
+    def test_move_questions(self):
+        q1, q2, q3, q4, q5 = self.questions
+        new_order = self.section.move_questions([(q5, Move.TOP), (q1, Move.BOTTOM)])
+        self.assertEqual(new_order, [q5, q2, q3, q4, q1])
+        self.assertEqual(self.section.get_question_order(), new_order)
+
+    def test_impossible_move_changes_nothing(self):
+        q1 = self.questions[0]
+        with self.assertRaises(ValueError):
+            self.section.move_questions([(q1, Move.DOWN), (q1, Move.BOTTOM), (q1, Move.DOWN)])
+        self.assertEqual(self.section.get_question_order(), self.questions)
+
+
+class TestRenderFromString(test.SimpleTestCase):
+
+    def test_compiled_templates_are_reused(self):
+        get_compiled_template.cache_clear()
+        self.assertEqual(render_from_string('{{ a }}', {'a': 1}), '1')
+        self.assertEqual(render_from_string('{{ a }}', {'a': 2}), '2')
+        info = get_compiled_template.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
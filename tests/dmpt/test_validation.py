@@ -0,0 +1,212 @@
+from django import test
+from django.urls import reverse
+
+from easydmp.dmpt.api.v2.serializers import MAX_VALIDATED_ANSWERSETS
+from easydmp.dmpt.models import ExplicitBranch, ExternalChoiceQuestion, Section, Template
+from easydmp.dmpt.validation import SectionValidator
+from easydmp.dmpt.validation import clear_validator_cache, get_template_rules, get_template_validators
+from easydmp.eestore.models import EEStoreCache, EEStoreMount
+
+from tests.auth.factories import UserFactory
+from tests.dmpt.factories import (
+    TemplateFactory,
+    SectionFactory,
+    BooleanQuestionFactory,
+    ReasonQuestionFactory,
+    ChoiceQuestionFactory,
+    ShortFreetextQuestionFactory,
+)
+from tests.eestore.factories import EEStoreSourceFactory
+
+
+class TestSectionValidator(test.TestCase):
+
+    def setUp(self):
+        self.section = SectionFactory(template=TemplateFactory(), position=1)
+        self.choice = ChoiceQuestionFactory(section=self.section, position=1)
+        self.text = ShortFreetextQuestionFactory(section=self.section, position=2,
+                                                 optional=True)
+        self.external = ExternalChoiceQuestion(section=self.section, position=3)
+        self.external.save()
+        source = EEStoreSourceFactory()
+        EEStoreMount.objects.create(question=self.external,
+                                    eestore_type=source.eestore_type)
+        for pid in ('a:1', 'a:2'):
+            EEStoreCache.objects.create(
+                eestore_pid=pid, eestore_id=1, remote_id=pid, name=pid,
+                eestore_type=source.eestore_type, source=source,
+            )
+        self.section = Section.objects.get(pk=self.section.pk)
+
+    def get_data(self, choice, text, external):
+        return {
+            str(self.choice.pk): {'choice': choice},
+            str(self.text.pk): {'choice': text},
+            str(self.external.pk): {'choice': external},
+        }
+
+    def test_choices_keys_are_precomputed(self):
+        validator = SectionValidator(self.section)
+        choices = set(self.choice.canned_answers.values_list('choice', flat=True))
+        self.assertEqual(validator.choices_keys[self.choice.pk], choices)
+        self.assertEqual(validator.choices_keys[self.external.pk], {'a:1', 'a:2'})
+        self.assertNotIn(self.text.pk, validator.choices_keys)
+
+    def test_validate_without_queries(self):
+        validator = SectionValidator(self.section)
+        choice = self.choice.canned_answers.first().choice
+        with self.assertNumQueries(0):
+            valids, invalids = validator.validate(self.get_data(choice, '', 'a:2'))
+            self.assertEqual(valids, {self.choice.pk, self.text.pk, self.external.pk})
+            self.assertEqual(invalids, set())
+            valids, invalids = validator.validate(self.get_data('nope', 'x', 'b:1'))
+            self.assertEqual(invalids, {self.choice.pk, self.external.pk})
+
+    def test_malformed_choices_are_invalid(self):
+        validator = SectionValidator(self.section)
+        for choice in (['a'], {'a': 1}):
+            with self.subTest(choice=choice):
+                valids, invalids = validator.validate(self.get_data(choice, '', choice))
+                self.assertEqual(invalids, {self.choice.pk, self.external.pk})
+
+    def test_no_data(self):
+        valids, invalids = self.section.find_validity_of_questions({})
+        self.assertEqual(valids, {self.text.pk})
+        self.assertEqual(invalids, {self.choice.pk, self.external.pk})
+
+
+class TestValidateAnswersets(test.TestCase):
+
+    def setUp(self):
+        clear_validator_cache()
+        self.template = TemplateFactory()
+        self.section = SectionFactory(template=self.template, position=1, branching=True)
+        self.qstart = BooleanQuestionFactory(section=self.section, position=1)
+        self.qdetour = ReasonQuestionFactory(section=self.section, position=2, on_trunk=False)
+        self.qend = ReasonQuestionFactory(section=self.section, position=3)
+        ExplicitBranch.objects.create(current_question=self.qstart, condition='Yes',
+                                      category='CannedAnswer', next_question=self.qend)
+        self.optional_section = SectionFactory(template=self.template, position=2,
+                                               optional=True)
+        self.text = ShortFreetextQuestionFactory(section=self.optional_section, position=1)
+        self.template = Template.objects.get(pk=self.template.pk)
+        self.url = reverse('v2:template-validate', kwargs={'pk': self.template.pk})
+
+    def answers(self, start, *reasons):
+        data = {str(self.qstart.pk): {'choice': start}}
+        for question, reason in zip((self.qdetour, self.qend), reasons):
+            if reason is not None:
+                data[str(question.pk)] = {'choice': reason}
+        return data
+
+    def test_same_result_as_section(self):
+        validator = get_template_validators(self.template)[self.section.pk]
+        section = Section.objects.get(pk=self.section.pk)
+        for data in (
+            {},
+            self.answers('Yes', None, 'end'),
+            self.answers('No', None, 'end'),
+            self.answers('No', 'detour', 'end'),
+            self.answers('No', 'detour', None),
+        ):
+            with self.subTest(data=data):
+                valid, valids, invalids = validator.validate_section(data)
+                self.assertEqual(valid, section.validate_data(data))
+                self.assertEqual((valids, invalids), section.find_validity_of_questions(data))
+
+    def test_validate_section_without_queries(self):
+        validator = get_template_validators(self.template)[self.section.pk]
+        with self.assertNumQueries(0):
+            self.assertTrue(validator.validate_section(self.answers('Yes', None, 'end'))[0])
+            self.assertFalse(validator.validate_section(self.answers('No', None, 'end'))[0])
+
+    def test_malformed_bool_is_invalid(self):
+        section = Section.objects.get(pk=self.section.pk)
+        for choice in (['Yes'], {'Yes': True}):
+            with self.subTest(choice=choice):
+                data = self.answers(choice, None, 'end')
+                valids, invalids = section.find_validity_of_questions(data)
+                self.assertIn(self.qstart.pk, invalids)
+                self.assertFalse(section.validate_data(data))
+
+    def test_rules_are_cached(self):
+        rules = get_template_rules(self.template)
+        self.assertIs(get_template_rules(self.template), rules)
+        ReasonQuestionFactory(section=self.section, position=4)
+        template = Template.objects.get(pk=self.template.pk)
+        self.assertIsNot(get_template_rules(template), rules)
+
+    def test_validators_do_not_share_questions(self):
+        validator = get_template_validators(self.template)[self.section.pk]
+        with self.assertNumQueries(0):
+            other = get_template_validators(self.template)[self.section.pk]
+        self.assertIsNot(other, validator)
+        for question, other_question in zip(validator.questions, other.questions):
+            self.assertEqual(question, other_question)
+            self.assertIsNot(question, other_question)
+
+    def test_endpoint(self):
+        self.client.force_login(UserFactory())
+        payload = {'answersets': [
+            {'section': self.section.pk, 'data': self.answers('Yes', None, 'end')},
+            {'section': self.section.pk, 'data': self.answers('No', None, 'end')},
+            {'section': self.optional_section.pk, 'data': {}, 'skipped': True},
+        ]}
+        response = self.client.post(self.url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertFalse(result['valid'])
+        self.assertEqual([a['valid'] for a in result['answersets']], [True, False, True])
+        self.assertEqual(result['answersets'][1]['invalid_questions'], [self.qdetour.pk])
+        self.assertEqual(result['sections'][str(self.section.pk)],
+                         {'valid': False, 'answersets': 2})
+        self.assertTrue(result['sections'][str(self.optional_section.pk)]['valid'])
+
+    def test_endpoint_unknown_section(self):
+        self.client.force_login(UserFactory())
+        other = SectionFactory(template=TemplateFactory(), position=1)
+        payload = {'answersets': [{'section': other.pk, 'data': {}}]}
+        response = self.client.post(self.url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_endpoint_too_many_answersets(self):
+        self.client.force_login(UserFactory())
+        answerset = {'section': self.section.pk, 'data': {}}
+        payload = {'answersets': [answerset] * (MAX_VALIDATED_ANSWERSETS + 1)}
+        response = self.client.post(self.url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_endpoint_malformed_answers_are_invalid(self):
+        self.client.force_login(UserFactory())
+        section = SectionFactory(template=self.template, position=3)
+        choice = ChoiceQuestionFactory(section=section, position=1)
+        for answer in (
+            {'choice': ['a']},
+            {'choice': {'a': 1}},
+            ['a'],
+            'Yes',
+            5,
+            None,
+        ):
+            with self.subTest(answer=answer):
+                payload = {'answersets': [
+                    {'section': self.section.pk, 'data': {str(self.qstart.pk): answer}},
+                    {'section': section.pk, 'data': {str(choice.pk): answer}},
+                ]}
+                response = self.client.post(self.url, payload, content_type='application/json')
+                self.assertEqual(response.status_code, 200)
+                result = response.json()
+                self.assertFalse(result['valid'])
+                self.assertIn(self.qstart.pk, result['answersets'][0]['invalid_questions'])
+                self.assertIn(choice.pk, result['answersets'][1]['invalid_questions'])
+
+    def test_endpoint_reports_all_unknown_sections(self):
+        self.client.force_login(UserFactory())
+        others = [SectionFactory(template=TemplateFactory(), position=1) for _ in range(2)]
+        payload = {'answersets': [
+            {'section': self.section.pk, 'data': {}},
+        ] + [{'section': other.pk, 'data': {}} for other in others]}
+        response = self.client.post(self.url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        for other in others:
+            self.assertIn(str(other.pk), str(response.json()))
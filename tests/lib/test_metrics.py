@@ -0,0 +1,106 @@
+from django import test
+from django.db import connection
+from django.template import engines
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from easydmp.eventlog.utils import log_event
+from easydmp.lib.metrics import Histogram, MetricsRegistry, REGISTRY
+from easydmp.lib.metrics import collect_request_metrics, install_instrumentation
+
+from tests.auth.factories import UserFactory
+from tests.dmpt.factories import create_smallest_template
+from tests.plan.factories import PlanFactory
+
+
+class TestHistogram(test.SimpleTestCase):
+
+    def test_observe(self):
+        histogram = Histogram((1, 5))
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value)
+        self.assertEqual(list(histogram.samples()), [(1, 2), (5, 3), (float('inf'), 4)])
+        self.assertEqual(histogram.sum, 14.5)
+        self.assertEqual(histogram.count, 4)
+
+
+class TestCollectRequestMetrics(test.TestCase):
+
+    def setUp(self):
+        install_instrumentation()
+
+    def test_queries_templates_and_eventlog(self):
+        user = UserFactory()
+        template = engines['django'].from_string('{{ value }}')
+        with collect_request_metrics(top_sql=1) as metrics:
+            log_event(user, 'test')
+            template.render({'value': 1})
+        self.assertGreaterEqual(metrics.db_queries, 1)
+        self.assertEqual(len(metrics.get_slowest_sql()), 1)
+        self.assertEqual(metrics.eventlog_writes, 1)
+        self.assertGreater(metrics.template_duration, 0)
+        self.assertGreaterEqual(metrics.duration, metrics.db_duration)
+
+    def test_render(self):
+        registry = MetricsRegistry()
+        with collect_request_metrics() as metrics:
+            pass
+        registry.record('a "view"', 'GET', 200, metrics)
+        text = registry.render()
+        self.assertIn('easydmp_requests_total{view="a \\"view\\"",method="GET",status="200"} 1', text)
+        self.assertIn('easydmp_request_duration_seconds_bucket{view="a \\"view\\"",le="+Inf"} 1', text)
+        self.assertIn('# TYPE easydmp_request_db_queries histogram', text)
+
+
+class TestMetricsMiddleware(test.TestCase):
+
+    def setUp(self):
+        REGISTRY.clear()
+
+    @test.override_settings(EASYDMP_METRICS_ALLOWED_IPS=('127.0.0.1',))
+    def test_requests_are_recorded(self):
+        self.client.get(reverse('privacy'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        text = response.content.decode()
+        self.assertIn('easydmp_requests_total{view="privacy",method="GET",status="200"} 1', text)
+        self.assertIn('easydmp_request_template_render_seconds_count{view="privacy"} 1', text)
+
+    def test_metrics_are_closed_by_default(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 403)
+
+    @test.override_settings(EASYDMP_METRICS_ALLOWED_IPS=('127.0.0.1',))
+    def test_metrics_are_limited_to_allowed_ips(self):
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='192.0.2.1')
+        self.assertEqual(response.status_code, 403)
+
+    @test.override_settings(EASYDMP_METRICS_TOKEN='s3cret')
+    def test_metrics_token(self):
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 403)
+
+    def test_streamed_response_is_recorded_when_sent(self):
+        user = UserFactory()
+        template = create_smallest_template()
+        for _ in range(3):
+            PlanFactory(template=template, added_by=user)
+        self.client.force_login(user)
+        response = self.client.get(reverse('v2:answerset-list'), {'page_size': 0})
+        self.assertTrue(response.streaming)
+        self.assertFalse(REGISTRY.requests)
+        with CaptureQueriesContext(connection) as queries:
+            b''.join(response.streaming_content)
+        self.assertTrue(queries)
+        self.assertEqual(REGISTRY.requests[('v2:answerset-list', 'GET', 200)], 1)
+        db_queries = REGISTRY.histograms['db_queries']['v2:answerset-list']
+        self.assertGreaterEqual(db_queries.sum, len(queries))
+
+    @test.override_settings(EASYDMP_SLOW_REQUEST_SECONDS=0)
+    def test_slow_request_logging(self):
+        with self.assertLogs('easydmp.lib.metrics.slow', level='WARNING') as logs:
+            self.client.get(reverse('privacy'))
+        self.assertIn('Slow request: GET /privacy/ 200', logs.output[0])
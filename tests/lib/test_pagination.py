@@ -0,0 +1,75 @@
+import json
+
+from django import test
+from django.urls import reverse
+
+from easydmp.plan.models import Plan
+from tests.auth.factories import UserFactory
+from tests.dmpt.factories import create_smallest_template
+from tests.plan.factories import PlanFactory
+
+
+class TestCursorPaginationV2(test.TestCase):
+
+    def setUp(self):
+        self.template = create_smallest_template()
+        user = UserFactory()
+        self.plans = [PlanFactory(template=self.template, added_by=user) for _ in range(5)]
+        self.client.force_login(user)
+        self.url = reverse('v2:plan-list')
+
+    def walk(self, url, params):
+        response = self.client.get(url, params)
+        seen = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertNotIn('count', data)
+            seen.extend(row['id'] for row in data['results'])
+            if not data['next']:
+                return seen
+            response = self.client.get(data['next'])
+
+    def test_page_number_pagination_by_default(self):
+        response = self.client.get(self.url, {'page_size': 2})
+        data = response.json()
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(data['on_page'], 2)
+
+    def test_page_number_pagination_newest_first(self):
+        response = self.client.get(self.url, {'page_size': 10})
+        seen = [row['id'] for row in response.json()['results']]
+        expected = list(Plan.objects.order_by('-added', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_cursor_pagination_by_id(self):
+        seen = self.walk(self.url, {'cursor': '', 'page_size': 2})
+        self.assertEqual(seen, sorted(plan.id for plan in self.plans))
+
+    def test_cursor_pagination_by_reverse_id(self):
+        seen = self.walk(self.url, {'cursor': '', 'page_size': 2, 'cursor_ordering': '-id'})
+        self.assertEqual(seen, sorted((plan.id for plan in self.plans), reverse=True))
+
+    def test_cursor_pagination_by_modified(self):
+        # Make modification order differ from id order
+        Plan.objects.filter(id=self.plans[0].id).update(modified=self.plans[-1].modified)
+        self.plans[2].quiet_save()
+        expected = list(Plan.objects.order_by('modified', 'id').values_list('id', flat=True))
+        seen = self.walk(self.url, {'cursor': '', 'page_size': 2, 'cursor_ordering': 'modified'})
+        self.assertEqual(seen, expected)
+
+    def test_cursor_pagination_by_modified_needs_field(self):
+        url = reverse('v2:answerset-list')
+        response = self.client.get(url, {'cursor': '', 'cursor_ordering': 'modified'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_pagination_bad_ordering(self):
+        response = self.client.get(self.url, {'cursor': '', 'cursor_ordering': 'title'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_pagination_on_unpaginated_viewset(self):
+        url = reverse('v2:question-list')
+        response = self.client.get(url)
+        self.assertIsInstance(json.loads(b''.join(response.streaming_content)), list)
+        seen = self.walk(url, {'cursor': '', 'page_size': 1})
+        self.assertEqual(seen, [self.template.sections.get().questions.get().id])
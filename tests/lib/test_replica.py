@@ -0,0 +1,108 @@
+from django import test
+from django.db import connections, transaction
+from django.http import StreamingHttpResponse
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from easydmp.dmpt.models import Template
+from easydmp.lib.middleware import ReplicaMiddleware
+from easydmp.lib.replica import ReplicaRouter, STICKY_COOKIE, reading_from_replica
+
+from tests.auth.factories import UserFactory
+from tests.dmpt.factories import TemplateFactory
+
+
+class TestReplicaRouter(test.SimpleTestCase):
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_read_from_default_outside_views(self):
+        self.assertIsNone(self.router.db_for_read(Template))
+
+    def test_read_from_replica(self):
+        with reading_from_replica():
+            self.assertEqual(self.router.db_for_read(Template), 'replica')
+
+    def test_read_from_default_if_not_active(self):
+        with reading_from_replica(active=False):
+            self.assertIsNone(self.router.db_for_read(Template))
+
+    def test_read_from_default_after_write(self):
+        with reading_from_replica():
+            self.assertEqual(self.router.db_for_write(Template), 'default')
+            self.assertIsNone(self.router.db_for_read(Template))
+
+    @test.override_settings(EASYDMP_REPLICA_DATABASE='missing')
+    def test_no_replica(self):
+        with reading_from_replica():
+            self.assertIsNone(self.router.db_for_read(Template))
+
+    def test_never_migrate_replica(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'dmpt'))
+        self.assertIsNone(self.router.allow_migrate('default', 'dmpt'))
+
+
+class TestReplicaMiddlewareStreaming(test.SimpleTestCase):
+
+    def test_streamed_content_is_read_from_replica(self):
+        router = ReplicaRouter()
+
+        def content():
+            yield router.db_for_read(Template)
+
+        def get_response(request):
+            request._replica.active = True  # as if by process_view()
+            return StreamingHttpResponse(content())
+
+        response = ReplicaMiddleware(get_response)(RequestFactory().get('/'))
+        self.assertEqual(b''.join(response.streaming_content), b'replica')
+
+
+# The queries must be committed for the replica connection to see them
+@test.override_settings(DATABASE_ROUTERS=['easydmp.lib.replica.ReplicaRouter'])
+class TestReplicaMiddleware(test.TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.template = TemplateFactory()
+        self.client.force_login(UserFactory())
+
+    def count_replica_queries(self, method, url, **kwargs):
+        with CaptureQueriesContext(connections['replica']) as queries:
+            response = getattr(self.client, method)(url, **kwargs)
+        return response, len(queries)
+
+    def test_api_reads_from_replica(self):
+        response, num_queries = self.count_replica_queries(
+            'get', reverse('v2:template-detail', kwargs={'pk': self.template.pk}),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(num_queries)
+
+    def test_other_views_read_from_default(self):
+        response, num_queries = self.count_replica_queries('get', reverse('plan_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(num_queries)
+
+    def test_unsafe_methods_read_from_default_and_stick(self):
+        url = reverse('v2:template-validate', kwargs={'pk': self.template.pk})
+        response, num_queries = self.count_replica_queries(
+            'post', url, data={'answersets': []}, content_type='application/json',
+        )
+        self.assertFalse(num_queries)
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        # The client now has the cookie
+        response, num_queries = self.count_replica_queries(
+            'get', reverse('v2:template-detail', kwargs={'pk': self.template.pk}),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(num_queries)
+
+    def test_transactions_read_from_default(self):
+        with reading_from_replica():
+            with CaptureQueriesContext(connections['replica']) as queries:
+                with transaction.atomic():
+                    Template.objects.get(pk=self.template.pk)
+        self.assertFalse(queries)
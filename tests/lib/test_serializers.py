@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django import test
+from django.db import connection
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse as django_reverse
+from rest_framework.request import Request
+from rest_framework.reverse import reverse
+from rest_framework.versioning import NamespaceVersioning
+
+from easydmp.lib.api.serializers import reverse_format
+from tests.auth.factories import UserFactory
+from tests.dmpt.factories import create_smallest_template
+from tests.plan.factories import PlanFactory
+
+
+class TestReverseFormat(test.SimpleTestCase):
+
+    def setUp(self):
+        self.request = Request(RequestFactory().get('/'))
+
+    def test_same_as_reverse(self):
+        for pk in (1, 22, 333):
+            expected = reverse('v2:plan-detail', kwargs={'pk': pk}, request=self.request)
+            result = reverse_format('v2:plan-detail', self.request, pk=pk)
+            self.assertEqual(result, expected)
+
+    def test_with_format(self):
+        expected = reverse('v2:plan-export', kwargs={'pk': 5}, request=self.request, format='pdf')
+        result = reverse_format('v2:plan-export', self.request, 'pdf', pk=5)
+        self.assertEqual(result, expected)
+
+    def test_with_versioned_request(self):
+        request = self.request
+        request.version, request.versioning_scheme = 'v2', NamespaceVersioning()
+        expected = reverse('v2:plan-detail', kwargs={'pk': 5}, request=request)
+        self.assertEqual(reverse_format('v2:plan-detail', request, pk=5), expected)
+
+    def test_reverse_once(self):
+        for pk in range(10):
+            reverse_format('v2:plan-detail', self.request, pk=pk)
+        with mock.patch('easydmp.lib.urls.reverse') as mock_reverse:
+            for pk in range(10):
+                reverse_format('v2:plan-detail', self.request, pk=pk)
+        mock_reverse.assert_not_called()
+
+    def test_lookup_values_are_quoted(self):
+        for value in ('a b', 'a+b', 'a?b'):
+            result = reverse_format('v2:plan-detail', pk=value)
+            self.assertEqual(result, django_reverse('v2:plan-detail', kwargs={'pk': value}))
+
+
+class TestNestedSerializerQueries(test.TestCase):
+
+    def setUp(self):
+        template = create_smallest_template()
+        user = UserFactory()
+        self.client.force_login(user)
+        self.template = template
+        self.user = user
+
+    def count_queries(self, url, params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_answerset_list_queries_do_not_grow_with_rows(self):
+        url = reverse('v2:answerset-list')
+        PlanFactory(template=self.template, added_by=self.user)
+        few = self.count_queries(url, {'page_size': 100})
+        for _ in range(4):
+            PlanFactory(template=self.template, added_by=self.user)
+        many = self.count_queries(url, {'page_size': 100})
+        self.assertEqual(few, many)
+
+    def test_plan_detail_queries_do_not_grow_with_answersets(self):
+        plan = PlanFactory(template=self.template, added_by=self.user)
+        url = reverse('v2:plan-detail', kwargs={'pk': plan.pk})
+        few = self.count_queries(url, {})
+        answerset = plan.answersets.get()
+        answerset.section.repeatable = True
+        answerset.section.save()
+        for _ in range(3):
+            answerset.add_sibling()
+        many = self.count_queries(url, {})
+        self.assertEqual(few, many)
@@ -0,0 +1,11 @@
+import unittest
+
+from tests.benchmarks.startup import LAZY_MODULES, load_wsgi_app
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_heavy_modules_are_not_imported_on_startup(self):
+        _, modules = load_wsgi_app()
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, modules, f'{module} is imported on startup')
@@ -0,0 +1,36 @@
+from django import test
+from django.urls import reverse, NoReverseMatch
+
+from easydmp.lib.urls import get_url_format, reverse_format
+
+
+class TestReverseFormat(test.SimpleTestCase):
+
+    def test_same_as_reverse(self):
+        kwargs = {'plan': 3, 'section': 14, 'answerset': 159}
+        self.assertEqual(reverse_format('answerset_detail', **kwargs),
+                         reverse('answerset_detail', kwargs=kwargs))
+
+    def test_format(self):
+        url_format = get_url_format('answerset_detail', 'plan', 'section', 'answerset')
+        self.assertEqual(url_format.format(plan=1, section=2, answerset=3),
+                         reverse('answerset_detail', kwargs={'plan': 1, 'section': 2, 'answerset': 3}))
+
+    def test_unknown_kwargs_fall_back_to_reverse(self):
+        self.assertIsNone(get_url_format('answerset_detail', 'plan'))
+        self.assertEqual(reverse_format('plan_list'), reverse('plan_list'))
+
+    def test_other_values_are_checked_by_the_converters(self):
+        for value in ('1/2', '-1', -1, True):
+            kwargs = {'plan': value, 'section': 14, 'answerset': 159}
+            with self.subTest(value=value):
+                with self.assertRaises(NoReverseMatch):
+                    reverse_format('answerset_detail', **kwargs)
+
+    def test_strings_are_reversed(self):
+        kwargs = {'plan': 3, 'question': 14, 'answerset': 159, 'action': 'next'}
+        self.assertEqual(reverse_format('get_answer', **kwargs),
+                         reverse('get_answer', kwargs=kwargs))
+        kwargs['action'] = 'next/../../delete'
+        with self.assertRaises(NoReverseMatch):
+            reverse_format('get_answer', **kwargs)
@@ -0,0 +1,62 @@
+import json
+from unittest import mock
+
+from django import test
+from django.urls import reverse
+
+from easydmp.plan.api.v2.views import AnswerSetViewSet
+from tests.auth.factories import UserFactory
+from tests.dmpt.factories import create_smallest_template
+from tests.plan.factories import PlanFactory
+
+
+class TestStreamingListMixin(test.TestCase):
+
+    def setUp(self):
+        self.template = create_smallest_template()
+        user = UserFactory()
+        self.plans = [PlanFactory(template=self.template, added_by=user) for _ in range(3)]
+        self.client.force_login(user)
+
+    def get_content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_paginated_list_is_not_streamed(self):
+        response = self.client.get(reverse('v2:answerset-list'), {'page_size': 2})
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.json()['count'], 3)
+
+    def test_unpaginated_list_is_streamed_as_json_array(self):
+        url = reverse('v2:answerset-list')
+        response = self.client.get(url, {'page_size': 0})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        data = json.loads(self.get_content(response))
+        expected = self.client.get(url, {'page_size': 100}).json()['results']
+        self.assertEqual(data, expected)
+
+    def test_unpaginated_list_is_streamed_in_chunks(self):
+        url = reverse('v2:answerset-list')
+        with mock.patch.object(AnswerSetViewSet, 'stream_chunk_size', 2):
+            response = self.client.get(url, {'page_size': 0})
+            data = json.loads(self.get_content(response))
+        self.assertEqual(len(data), 3)
+
+    def test_empty_list_is_streamed(self):
+        url = reverse('v2:answerset-list')
+        response = self.client.get(url, {'page_size': 0, 'last_validated__lt': '2000-01-01 00:00:00'})
+        self.assertEqual(json.loads(self.get_content(response)), [])
+
+    def test_unpaginated_list_is_streamed_as_ndjson(self):
+        url = reverse('v2:plan-list')
+        response = self.client.get(url, {'page_size': 0, 'format': 'ndjson'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = self.get_content(response).splitlines()
+        ids = {json.loads(line)['id'] for line in lines}
+        self.assertEqual(ids, {plan.id for plan in self.plans})
+
+    def test_viewset_without_pagination_is_streamed(self):
+        response = self.client.get(reverse('v2:question-list'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(len(json.loads(self.get_content(response))), 1)
@@ -4,7 +4,7 @@ from django.db import IntegrityError
 from easydmp.dmpt.models import ShortFreetextQuestion
 from easydmp.dmpt.models import BooleanQuestion
 from easydmp.dmpt.models import PositiveIntegerQuestion
-from easydmp.plan.models import Plan, AnswerSet, Answer
+from easydmp.plan.models import Plan, AnswerSet, AnswerSetTree, Answer
 from tests.dmpt.factories import TemplateFactory, SectionFactory
 
 
@@ -192,3 +192,75 @@ class TestAnswersetGetIdentifier(test.TestCase):
         as1 = AnswerSet(plan=self.plan, section=section, data={})
         as1.save()
         self.assertEqual(as1.identifier, '1')
+
+
+class TestAnswerSetTree(test.TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.template = TemplateFactory()
+        s1 = SectionFactory(template=cls.template, position=1, repeatable=True)
+        ShortFreetextQuestion(section=s1, position=1).save()
+        s2 = SectionFactory(template=cls.template, position=2)
+        s2a = SectionFactory(template=cls.template, position=3, super_section=s2,
+                             repeatable=True)
+        ShortFreetextQuestion(section=s2a, position=1).save()
+        s3 = SectionFactory(template=cls.template, position=4, optional=True)
+        ShortFreetextQuestion(section=s3, position=1).save()
+        s4 = SectionFactory(template=cls.template, position=5)
+        ShortFreetextQuestion(section=s4, position=1).save()
+        cls.plan = Plan(template=cls.template, added_by_id=1, modified_by_id=1, valid=False)
+        cls.plan.save()
+        cls.plan.get_answersets_for_section(s1).get().add_sibling()
+        as2 = cls.plan.get_answersets_for_section(s2).get()
+        as2.add_children()
+        as2.answersets.get().add_sibling()
+        cls.plan.get_answersets_for_section(s3).update(skipped=True)
+        cls.sections = (s1, s2, s2a, s3, s4)
+
+    def test_traversal_does_not_query(self):
+        tree = self.plan.get_answerset_tree()
+        answerset = self.plan.answersets.order().first()
+        with self.assertNumQueries(0):
+            for method in ('get_next_answerset', 'get_prev_answerset',
+                           'get_first_child', 'get_next_sibling'):
+                getattr(tree, method)(answerset)
+
+    def test_traversal_does_not_create_answersets(self):
+        section = SectionFactory(template=self.template, position=6)
+        ShortFreetextQuestion(section=section, position=1).save()
+        tree = self.plan.get_answerset_tree()
+        last = tree.get_answersets_for_section(self.sections[-1])[0]
+        self.assertIsNone(tree.get_next_answerset(last))
+        self.assertFalse(self.plan.answersets.filter(section=section).exists())
+
+    def test_traversal_matches_answerset_methods(self):
+        tree = self.plan.get_answerset_tree()
+        for answerset in self.plan.answersets.all():
+            for method in ('get_first_child', 'get_last_child',
+                           'get_next_sibling', 'get_prev_sibling',
+                           'get_next_answerset', 'get_prev_answerset'):
+                with self.subTest(answerset=answerset, method=method):
+                    expected = getattr(answerset, method)()
+                    self.assertEqual(getattr(tree, method)(answerset), expected)
+
+    def test_walk_forward(self):
+        tree = self.plan.get_answerset_tree()
+        answerset = self.plan.answersets.order().first()
+        walk = []
+        while answerset:
+            walk.append(answerset.section)
+            answerset = tree.get_next_answerset(answerset)
+        s1, s2, s2a, s3, s4 = self.sections
+        # Sections without questions are never visited
+        self.assertEqual(walk, [s1, s1, s2a, s2a, s3, s4])
+
+    def test_sections(self):
+        tree = self.plan.get_answerset_tree()
+        s1, s2, s2a, s3, s4 = self.sections
+        self.assertEqual(tree.get_next_section(s1), s2)
+        self.assertEqual(tree.get_next_section(s1, nonempty=True), s2a)
+        self.assertEqual(tree.get_prev_section(s2a, nonempty=True), s1)
+        self.assertIsNone(tree.get_prev_section(s1))
+        self.assertIsNone(tree.get_next_section(s4))
+        self.assertEqual(len(tree.get_answersets_for_section(s2a)), 2)
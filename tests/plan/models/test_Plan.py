@@ -2,11 +2,17 @@ from collections import OrderedDict
 import logging
 
 from django import test
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
 from django.test import tag, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now as tznow
 
 from easydmp.auth.models import User
 from easydmp.dmpt.models import Template
-from easydmp.plan.models import Plan
+from easydmp.plan.models import Answer, AnswerSet, AnswerSetPayload, Plan
+from tests.auth.factories import UserFactory
+from tests.benchmarks.generator import TemplateSpec, generate_template, generate_plan
 from tests.dmpt.factories import TemplateFactory, SectionFactory
 from tests.plan.factories import PlanFactory
 
@@ -40,3 +46,201 @@ class TestPlanValidation(test.TestCase):
 #             expected = False
 #             self.assertEqual(result, expected)
 #             self.assertIn('contains nonsense data:', log.output[0])
+
+
+class TestPlanQuerySetAccess(test.TestCase):
+
+    def setUp(self):
+        self.template = TemplateFactory()
+        self.user = UserFactory()
+        self.other = UserFactory()
+        self.own = PlanFactory(template=self.template, added_by=self.user)
+        self.viewed = PlanFactory(template=self.template, added_by=self.other)
+        self.viewed.add_user_to_viewers(self.user)
+        self.public = PlanFactory(template=self.template, added_by=self.other,
+                                  published=tznow())
+        self.hidden = PlanFactory(template=self.template, added_by=self.other)
+
+    def test_editable(self):
+        result = Plan.objects.editable(self.user)
+        self.assertEqual(set(result), {self.own})
+
+    def test_editable_anonymous(self):
+        result = Plan.objects.editable(AnonymousUser())
+        self.assertFalse(result.exists())
+
+    def test_viewable(self):
+        result = Plan.objects.viewable(self.user)
+        self.assertEqual(set(result), {self.own, self.viewed, self.public})
+
+    def test_viewable_without_public(self):
+        result = Plan.objects.viewable(self.user, include_public=False)
+        self.assertEqual(set(result), {self.own, self.viewed})
+
+    def test_viewable_anonymous(self):
+        result = Plan.objects.viewable(AnonymousUser())
+        self.assertEqual(set(result), {self.public})
+        result = Plan.objects.viewable(AnonymousUser(), include_public=False)
+        self.assertFalse(result.exists())
+
+    def test_viewable_has_no_duplicates(self):
+        # Several accesses to the same plan
+        self.own.add_user_to_viewers(self.other)
+        self.public.add_user_to_viewers(self.user)
+        result = list(Plan.objects.viewable(self.user))
+        self.assertEqual(len(result), len(set(result)))
+        self.assertEqual(len(result), 3)
+
+    def test_viewable_does_not_need_distinct(self):
+        qs = Plan.objects.viewable(self.user)
+        self.assertFalse(qs.query.distinct)
+
+
+class TestPlanClone(test.TestCase):
+
+    def setUp(self):
+        self.user = UserFactory()
+
+    def make_plan(self, sections):
+        spec = TemplateSpec(sections=sections, depth=2, subsections=2, questions=3, seed=sections)
+        return generate_plan(generate_template(spec), self.user, repeats=2)
+
+    def get_answersets(self, plan):
+        def key(answerset):
+            if answerset is None:
+                return None
+            return (answerset.section_id, answerset.identifier, key(answerset.parent))
+        return {
+            key(answerset): (answerset.data, answerset.valid, answerset.skipped)
+            for answerset in plan.answersets.select_related('parent__parent')
+        }
+
+    def get_answers(self, plan):
+        return set(
+            Answer.objects
+            .filter(answerset__plan=plan)
+            .values_list('answerset__section_id', 'answerset__identifier',
+                         'answerset__parent__identifier', 'question_id', 'valid')
+        )
+
+    def test_clone_copies_answersets_and_answers(self):
+        plan = self.make_plan(sections=2)
+        new = plan.clone()
+        self.assertEqual(self.get_answersets(new), self.get_answersets(plan))
+        self.assertEqual(self.get_answers(new), self.get_answers(plan))
+        self.assertFalse(new.answersets.filter(cloned_from__isnull=True).exists())
+
+    def get_payload_ids(self, plan):
+        return list(plan.answersets.order_by('cloned_from', 'pk').values_list('payload_id', flat=True))
+
+    def test_clone_shares_payloads(self):
+        plan = self.make_plan(sections=2)
+        num_payloads = AnswerSetPayload.objects.count()
+        new = plan.clone()
+        self.assertEqual(AnswerSetPayload.objects.count(), num_payloads)
+        self.assertEqual(self.get_payload_ids(new), self.get_payload_ids(plan))
+
+    def test_only_changed_answersets_are_copied(self):
+        plan = self.make_plan(sections=2)
+        new = plan.create_new_version(self.user)
+        num_payloads = AnswerSetPayload.objects.count()
+        old_answersets = self.get_answersets(plan)
+        answerset = new.answersets.exclude(payload=None).first()
+        qid, answer = next(iter(answerset.data.items()))
+        answerset.data[qid] = dict(answer, notes='Changed')
+        answerset.save()
+        self.assertEqual(AnswerSetPayload.objects.count(), num_payloads + 1)
+        self.assertEqual(self.get_answersets(plan), old_answersets)
+        self.assertEqual(answerset.cloned_from.data[qid], answer)
+        answerset.refresh_from_db()
+        self.assertEqual(answerset.data[qid]['notes'], 'Changed')
+        shared = new.answersets.filter(payload__in=plan.answersets.values('payload'))
+        self.assertEqual(shared.count(), new.answersets.exclude(payload=None).count() - 1)
+
+    def test_changing_the_old_version_leaves_the_new_alone(self):
+        plan = self.make_plan(sections=1)
+        new = plan.clone()
+        new_answersets = self.get_answersets(new)
+        answerset = plan.answersets.exclude(payload=None).first()
+        answerset.data = {}
+        answerset.save()
+        self.assertEqual(self.get_answersets(new), new_answersets)
+
+    def test_saving_unchanged_answersets_copies_nothing(self):
+        plan = self.make_plan(sections=2)
+        new = plan.clone()
+        num_payloads = AnswerSetPayload.objects.count()
+        new.validate(self.user, recalculate=True)
+        for answerset in new.answersets.all():
+            answerset.data
+            answerset.save()
+        self.assertEqual(AnswerSetPayload.objects.count(), num_payloads)
+
+    def test_unused_payloads_are_deleted(self):
+        plan = self.make_plan(sections=1)
+        num_payloads = AnswerSetPayload.objects.count()
+        new = plan.clone()
+        new.delete(self.user)
+        self.assertEqual(AnswerSetPayload.objects.count(), num_payloads)
+        plan.delete(self.user)
+        self.assertFalse(AnswerSetPayload.objects.exists())
+
+    def test_payloads_of_deleted_answersets_are_deleted(self):
+        plan = self.make_plan(sections=1)
+        plan.clone()
+        num_payloads = AnswerSetPayload.objects.count()
+        answerset = plan.answersets.filter(parent=None).exclude(payload=None).first()
+        answerset.data = {}
+        answerset.save()  # No longer shared
+        self.assertEqual(AnswerSetPayload.objects.count(), num_payloads + 1)
+        answerset.delete()
+        self.assertEqual(AnswerSetPayload.objects.count(), num_payloads)
+        plan.answersets.all().delete()
+        self.assertEqual(AnswerSetPayload.objects.count(), num_payloads)
+        self.assertFalse(AnswerSetPayload.objects.unused().exists())
+
+    def change_answers(self, plan):
+        answersets = list(plan.answersets.exclude(payload=None).with_answers())
+        for answerset in answersets:
+            for answer in answerset.data.values():
+                answer['notes'] = 'Changed'
+        return answersets
+
+    def test_bulk_update_copies_shared_payloads(self):
+        plan = self.make_plan(sections=1)
+        old_answersets = self.get_answersets(plan)
+        new = plan.clone()
+        answersets = self.change_answers(new)
+        AnswerSet.objects.bulk_update(answersets, ['data'])
+        self.assertEqual(self.get_answersets(plan), old_answersets)
+        self.assertFalse(new.answersets.filter(payload__in=plan.answersets.values('payload')).exists())
+        for answerset in new.answersets.exclude(payload=None):
+            for answer in answerset.data.values():
+                self.assertEqual(answer['notes'], 'Changed')
+
+    def test_bulk_update_within_one_batch_copies_shared_payloads(self):
+        plan = self.make_plan(sections=1)
+        new = plan.clone()
+        answersets = self.change_answers(plan) + self.change_answers(new)
+        num_payloads = AnswerSetPayload.objects.count()
+        AnswerSet.objects.bulk_update(answersets, ['data'])
+        self.assertEqual(AnswerSetPayload.objects.count(), 2 * num_payloads)
+        self.assertFalse(AnswerSetPayload.objects.unused().exists())
+
+    def test_bulk_update_queries_do_not_depend_on_plan_size(self):
+        num_queries = []
+        for sections in (1, 4):
+            answersets = self.change_answers(self.make_plan(sections=sections))
+            with CaptureQueriesContext(connection) as queries:
+                AnswerSet.objects.bulk_update(answersets, ['data'])
+            num_queries.append(len(queries))
+        self.assertEqual(num_queries[0], num_queries[1])
+
+    def test_clone_queries_do_not_depend_on_plan_size(self):
+        num_queries = []
+        for sections in (1, 4):
+            plan = self.make_plan(sections=sections)
+            with CaptureQueriesContext(connection) as queries:
+                plan.clone()
+            num_queries.append(len(queries))
+        self.assertEqual(num_queries[0], num_queries[1])
@@ -0,0 +1,60 @@
+from django import test
+
+from easydmp.dmpt.models import ChoiceQuestion, ShortFreetextQuestion
+from easydmp.dmpt.models import StorageForecastQuestion
+from easydmp.plan.models import Plan, render_canned_text
+from tests.dmpt.factories import TemplateFactory, SectionFactory, CannedAnswerFactory
+
+
+def make_template():
+    template = TemplateFactory()
+    section = SectionFactory(template=template, position=1, repeatable=True)
+    choice = ChoiceQuestion(section=section, position=1, question='Choose')
+    choice.save()
+    CannedAnswerFactory(question=choice, choice='a', canned_text='Picked A')
+    CannedAnswerFactory(question=choice, choice='b', canned_text='Picked B')
+    freetext = ShortFreetextQuestion(section=section, position=2, question='Name',
+                                     framing_text='Named {}')
+    freetext.save()
+    forecast = StorageForecastQuestion(section=section, position=3, question='Storage')
+    forecast.save()
+    return template, (choice, freetext, forecast)
+
+
+def answer(question, choice):
+    return {str(question.pk): {'choice': choice, 'notes': ''}}
+
+
+@test.tag('JSONField')
+class TestRenderCannedText(test.TestCase):
+
+    def setUp(self):
+        self.template, (choice, freetext, forecast) = make_template()
+        self.plan = Plan(template=self.template, added_by_id=1, modified_by_id=1, valid=False)
+        self.plan.save()
+        first = self.plan.answersets.get()
+        second = first.add_sibling()
+        for answerset, letter in ((first, 'a'), (second, 'b')):
+            answerset.data = {
+                **answer(choice, letter),
+                **answer(freetext, letter.upper()),
+                **answer(forecast, [{'year': 2030, 'storage_estimate': 1, 'backup_percentage': '10%'}]),
+            }
+            answerset.save()
+
+    def test_same_as_rendering_each_answerset(self):
+        texts = render_canned_text(self.plan)
+        for answerset in self.plan.answersets.all():
+            expected = answerset.section.generate_canned_text(answerset.data)
+            self.assertEqual(texts[answerset.pk], expected)
+        first = self.plan.answersets.order_by('pk')[0]
+        rendered = [item['text'] for item in texts[first.pk]]
+        self.assertEqual(rendered[:2], ['Picked A', 'Named A'])
+        self.assertIn('2030: 1 TiB', rendered[2])
+
+    def test_number_of_queries_does_not_depend_on_answersets(self):
+        with self.assertNumQueries(3):
+            render_canned_text(self.plan)
+        self.plan.answersets.first().add_sibling()
+        with self.assertNumQueries(3):
+            render_canned_text(self.plan)
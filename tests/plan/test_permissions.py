@@ -0,0 +1,93 @@
+from django import test
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import now as utcnow
+
+from easydmp.plan.models import Plan
+from easydmp.plan.permissions import get_plan_permissions, PlanPermissions
+from tests.auth.factories import UserFactory
+from tests.dmpt.factories import create_smallest_template
+from tests.plan.factories import PlanFactory
+
+
+class PlanPermissionsTestCase(test.TestCase):
+
+    def setUp(self):
+        self.template = create_smallest_template()
+        self.user = UserFactory()
+        self.other = UserFactory()
+        self.editable = PlanFactory(template=self.template, added_by=self.user, modified_by=self.user)
+        self.viewable = PlanFactory(template=self.template, added_by=self.other, modified_by=self.other)
+        self.viewable.add_user_to_viewers(self.user)
+        self.hidden = PlanFactory(template=self.template, added_by=self.other, modified_by=self.other)
+
+    def test_same_answers_as_plan(self):
+        permissions = PlanPermissions(self.user)
+        for plan in (self.editable, self.viewable, self.hidden):
+            self.assertEqual(permissions.may_view(plan), plan.may_view(self.user))
+            self.assertEqual(permissions.may_edit(plan), plan.may_edit(self.user))
+
+    def test_accesses_are_loaded_once(self):
+        permissions = PlanPermissions(self.user)
+        with self.assertNumQueries(1):
+            for plan in (self.editable, self.viewable, self.hidden):
+                permissions.may_view(plan)
+                permissions.may_edit(plan)
+
+    def test_anonymous_user(self):
+        permissions = PlanPermissions(AnonymousUser())
+        with self.assertNumQueries(0):
+            self.assertFalse(permissions.may_view(self.editable))
+            self.assertFalse(permissions.may_edit(self.editable))
+
+    def test_prime(self):
+        permissions = PlanPermissions(self.user)
+        plans = Plan.objects.with_permissions(self.user)
+        with self.assertNumQueries(1):
+            permissions.prime(plans)
+        with self.assertNumQueries(0):
+            self.assertTrue(permissions.may_edit(self.editable))
+            self.assertTrue(permissions.may_view(self.viewable))
+            self.assertFalse(permissions.may_edit(self.viewable))
+            self.assertFalse(permissions.may_view(self.hidden))
+
+    def test_may_publish(self):
+        permissions = PlanPermissions(self.user)
+        self.assertFalse(permissions.may_publish(self.editable))
+        self.editable.valid = True
+        self.editable.locked = utcnow()
+        self.assertTrue(permissions.may_publish(self.editable))
+        self.editable.published = utcnow()
+        self.assertFalse(permissions.may_publish(self.editable))
+
+    def test_adding_access_is_seen(self):
+        permissions = get_plan_permissions(self.user)
+        self.assertFalse(permissions.may_edit(self.hidden))
+        self.hidden.add_user_to_editors(self.user)
+        self.assertTrue(get_plan_permissions(self.user).may_edit(self.hidden))
+
+
+class PlanListPermissionsTestCase(test.TestCase):
+
+    def setUp(self):
+        self.template = create_smallest_template()
+        self.user = UserFactory()
+        self.client.force_login(self.user)
+
+    def make_plans(self, num):
+        for _ in range(num):
+            PlanFactory(template=self.template, added_by=self.user, modified_by=self.user)
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('plan_list'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_number_of_queries_does_not_depend_on_plans(self):
+        self.make_plans(1)
+        few = self.count_queries()
+        self.make_plans(5)
+        self.assertEqual(self.count_queries(), few)
@@ -0,0 +1,93 @@
+from io import StringIO
+
+from django import test
+from django.core.management import call_command
+
+from easydmp.dmpt.models import ShortFreetextQuestion
+from easydmp.plan.models import Plan, AnswerSet, Answer, AnswerSetRepair
+from easydmp.plan.models import fix_all_answersets
+from tests.dmpt.factories import TemplateFactory, SectionFactory
+
+
+class TestAnswerSetRepair(test.TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.template = TemplateFactory()
+        cls.required = SectionFactory(template=cls.template, position=1)
+        ShortFreetextQuestion(section=cls.required, position=1).save()
+        cls.optional = SectionFactory(template=cls.template, position=2, optional=True)
+        ShortFreetextQuestion(section=cls.optional, position=1).save()
+        cls.repeatable = SectionFactory(template=cls.template, position=3, repeatable=True)
+        cls.subsection = SectionFactory(template=cls.template, position=4,
+                                        super_section=cls.repeatable)
+        ShortFreetextQuestion(section=cls.subsection, position=1).save()
+
+    def setUp(self):
+        self.plan = Plan(template=self.template, added_by_id=1, modified_by_id=1, valid=False)
+        self.plan.save()
+
+    def get_answersets(self, section):
+        return self.plan.answersets.filter(section=section)
+
+    def test_new_plan_gets_all_answersets(self):
+        self.assertEqual(self.plan.answersets.count(), 4)
+        self.assertTrue(self.get_answersets(self.optional).get().skipped)
+        self.assertIsNone(self.get_answersets(self.required).get().skipped)
+        child = self.get_answersets(self.subsection).get()
+        self.assertEqual(child.parent, self.get_answersets(self.repeatable).get())
+        self.assertEqual(child.identifier, '1')
+        self.assertEqual(Answer.objects.filter(answerset=child).count(), 1)
+
+    def test_consistent_plan_is_cheap(self):
+        with self.assertNumQueries(2):
+            changed = fix_all_answersets(self.plan)
+        self.assertFalse(changed)
+
+    def test_missing_answersets_are_created(self):
+        self.get_answersets(self.repeatable).delete()
+        self.assertTrue(fix_all_answersets(self.plan))
+        parent = self.get_answersets(self.repeatable).get()
+        self.assertEqual(parent.answersets.get().section, self.subsection)
+
+    def test_children_of_siblings_are_created(self):
+        sibling = AnswerSet.objects.create(plan=self.plan, section=self.repeatable)
+        fix_all_answersets(self.plan)
+        self.assertEqual(sibling.answersets.get().section, self.subsection)
+
+    def test_required_section_is_unskipped(self):
+        self.get_answersets(self.required).update(skipped=True)
+        fix_all_answersets(self.plan)
+        self.assertIsNone(self.get_answersets(self.required).get().skipped)
+
+    def test_skipped_answerset_is_removed_when_answered(self):
+        answered = AnswerSet.objects.create(plan=self.plan, section=self.optional)
+        fix_all_answersets(self.plan)
+        self.assertEqual(list(self.get_answersets(self.optional)), [answered])
+
+    def test_extraneous_empty_answerset_is_removed(self):
+        answerset = self.get_answersets(self.required).get()
+        answerset.data = {'1': {'choice': 'yes', 'notes': ''}}
+        answerset.save()
+        AnswerSet.objects.create(plan=self.plan, section=self.required)
+        fix_all_answersets(self.plan)
+        self.assertEqual(list(self.get_answersets(self.required)), [answerset])
+
+    def test_without_purge_only_creates(self):
+        self.get_answersets(self.required).update(skipped=True)
+        self.get_answersets(self.subsection).delete()
+        AnswerSetRepair(self.plan, purge=False).run()
+        self.assertTrue(self.get_answersets(self.required).get().skipped)
+        self.assertTrue(self.get_answersets(self.subsection).exists())
+
+    def test_dry_run_changes_nothing(self):
+        self.get_answersets(self.subsection).delete()
+        self.assertTrue(AnswerSetRepair(self.plan).run(dry_run=True))
+        self.assertFalse(self.get_answersets(self.subsection).exists())
+
+    def test_command(self):
+        self.get_answersets(self.subsection).delete()
+        out = StringIO()
+        call_command('repair_answersets', '--batch-size', '1', stdout=out)
+        self.assertIn('1 of 1 plans repaired', out.getvalue())
+        self.assertTrue(self.get_answersets(self.subsection).exists())
@@ -0,0 +1,129 @@
+from django import test
+from django.test import tag
+from django.urls import reverse
+
+from easydmp.plan.models import AnswerSet, AnswerSetPayload, Plan
+from tests.dmpt.factories import create_smallest_template
+from tests.plan.factories import PlanFactory
+from tests.auth.factories import UserFactory
+
+
+def answer_plan(plan, text):
+    answerset = plan.answersets.get()
+    question = answerset.section.questions.get()
+    answerset.data = {str(question.pk): {'choice': text, 'notes': ''}}
+    answerset.save()
+    plan.save()
+    return plan
+
+
+@tag('JSONField')
+class TestPlanSearchData(test.TestCase):
+
+    def setUp(self):
+        self.template = create_smallest_template()
+
+    def test_answerset_save_updates_search_data(self):
+        plan = PlanFactory(template=self.template)
+        answer_plan(plan, 'Oceanographic measurements')
+        answerset = plan.answersets.get()
+        self.assertIn('Oceanographic measurements', answerset.payload.search_data)
+        self.assertIn('Oceanographic measurements', plan.search_data)
+
+    def test_answerset_save_with_update_fields_updates_search_data(self):
+        plan = PlanFactory(template=self.template)
+        answerset = plan.answersets.get()
+        answerset.data = {'1': {'choice': 'Glaciology', 'notes': ''}}
+        answerset.save(update_fields=['data'])
+        answerset.refresh_from_db()
+        self.assertIn('Glaciology', answerset.payload.search_data)
+
+    def test_plan_search_data_is_built_from_answersets(self):
+        plan = PlanFactory(template=self.template)
+        answer_plan(plan, 'Seismic data')
+        # Stale JSON does not matter, only the stored text is used
+        AnswerSetPayload.objects.filter(answersets__plan=plan).update(data={})
+        plan.save()
+        self.assertIn('Seismic data', plan.search_data)
+
+    def test_search_data_is_joined_by_the_database(self):
+        plan = answer_plan(PlanFactory(template=self.template), 'Seismic data')
+        answerset = plan.answersets.get()
+        for identifier, search_data in (('2', 'Tide gauges'), ('3', '')):
+            AnswerSet.objects.create(
+                plan=plan, section=answerset.section, identifier=identifier,
+                payload=AnswerSetPayload.objects.create(search_data=search_data),
+            )
+        with self.assertNumQueries(1):
+            search_data = plan.get_search_data()
+        self.assertIn('Seismic data', search_data)
+        self.assertIn('Tide gauges', search_data)
+        self.assertFalse(search_data.endswith(' '))
+
+
+@tag('JSONField')
+class TestPlanSearch(test.TestCase):
+
+    def setUp(self):
+        self.template = create_smallest_template()
+        self.salmon = answer_plan(PlanFactory(template=self.template), 'Atlantic salmon tagging')
+        self.trout = answer_plan(PlanFactory(template=self.template), 'Brown trout tagging')
+
+    def test_search_single_word(self):
+        result = set(Plan.objects.search('salmon'))
+        self.assertEqual(result, {self.salmon})
+
+    def test_search_all_words_must_match(self):
+        result = set(Plan.objects.search('tagging'))
+        self.assertEqual(result, {self.salmon, self.trout})
+        result = set(Plan.objects.search('trout tagging'))
+        self.assertEqual(result, {self.trout})
+        self.assertFalse(Plan.objects.search('salmon trout').exists())
+
+    def test_search_is_case_insensitive(self):
+        result = set(Plan.objects.search('ATLANTIC'))
+        self.assertEqual(result, {self.salmon})
+
+    def test_search_ignores_query_syntax(self):
+        self.assertFalse(Plan.objects.search('"salmon OR trout').exists())
+
+    def test_empty_search_does_not_filter(self):
+        self.assertEqual(Plan.objects.search('  ').count(), 2)
+
+    def test_search_is_updated_on_change(self):
+        answer_plan(self.salmon, 'Arctic char')
+        self.assertFalse(Plan.objects.search('salmon').exists())
+        result = set(Plan.objects.search('char'))
+        self.assertEqual(result, {self.salmon})
+
+    def test_search_after_delete(self):
+        self.salmon.delete(self.salmon.added_by)
+        self.assertFalse(Plan.objects.search('salmon').exists())
+
+
+@tag('JSONField')
+class TestPlanSearchViews(test.TestCase):
+
+    def setUp(self):
+        self.template = create_smallest_template()
+        self.user = UserFactory()
+        self.salmon = answer_plan(
+            PlanFactory(template=self.template, added_by=self.user),
+            'Atlantic salmon tagging'
+        )
+        self.trout = answer_plan(
+            PlanFactory(template=self.template, added_by=self.user),
+            'Brown trout tagging'
+        )
+        self.client.force_login(self.user)
+
+    def test_plan_list_search(self):
+        response = self.client.get(reverse('plan_list'), {'q': 'trout'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['object_list']), [self.trout])
+
+    def test_api_fulltext_filter(self):
+        response = self.client.get(reverse('v2:plan-list'), {'fulltext': 'salmon'})
+        self.assertEqual(response.status_code, 200)
+        ids = [plan['id'] for plan in response.json()['results']]
+        self.assertEqual(ids, [self.salmon.pk])
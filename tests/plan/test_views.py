@@ -1,11 +1,15 @@
 from unittest import mock
 
 from django import test
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.test import tag, skipUnlessDBFeature
 from django.urls import reverse
 from django.utils.timezone import now as utcnow
 
+from easydmp.plan.views import get_section_progress
 from tests.dmpt.factories import create_smallest_template
+from tests.dmpt.factories import QuestionFactory, SectionFactory
 from tests.plan.factories import PlanFactory
 from tests.auth.factories import UserFactory
 
@@ -44,3 +48,115 @@ class GeneratedViewTestCase(test.TestCase):
         kwargs = {'plan': plan.pk}
         response = c.get(reverse(self.urlname, kwargs=kwargs))
         self.assertEqual(response.status_code, 404, '{} should be hidden'.format(self.urlname))
+
+
+class PlanListViewTestCase(test.TestCase):
+
+    def setUp(self):
+        self.template = create_smallest_template()
+        self.user = UserFactory()
+        self.plans = [
+            PlanFactory(template=self.template, added_by=self.user, modified_by=self.user)
+            for _ in range(5)
+        ]
+        self.client.force_login(self.user)
+
+    def get_all_pages(self, url):
+        seen = []
+        params = {}
+        with mock.patch('easydmp.plan.views.PlanListView.paginate_by', 2):
+            while True:
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+                seen.append(list(response.context['object_list']))
+                cursor = response.context['next_cursor']
+                if not cursor:
+                    return seen
+                params = {response.context['cursor_param']: cursor}
+
+    def test_keyset_pagination_visits_every_plan_once(self):
+        pages = self.get_all_pages(reverse('plan_list'))
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        plans = [plan for page in pages for plan in page]
+        expected = sorted(self.plans, key=lambda p: (p.added, p.id), reverse=True)
+        self.assertEqual(plans, expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('plan_list'), {'after': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+
+class GetAnswerSetViewTestCase(test.TestCase):
+
+    def setUp(self):
+        self.template = create_smallest_template()
+        self.user = UserFactory()
+        self.plan = PlanFactory(template=self.template, added_by=self.user, modified_by=self.user)
+        self.answerset = self.plan.answersets.get()
+        self.client.force_login(self.user)
+
+    def get(self, action):
+        kwargs = {
+            'plan': self.plan.pk,
+            'section': self.answerset.section_id,
+            'answerset': self.answerset.pk,
+            'action': action,
+        }
+        return self.client.get(reverse('get_answerset', kwargs=kwargs))
+
+    def test_current(self):
+        response = self.get('current')
+        kwargs = {
+            'plan': self.plan.pk,
+            'section': self.answerset.section_id,
+            'answerset': self.answerset.pk,
+        }
+        self.assertRedirects(response, reverse('answer_linear_section', kwargs=kwargs),
+                             fetch_redirect_response=False)
+
+    def test_next_from_last_section_is_summary(self):
+        response = self.get('next')
+        self.assertRedirects(response, reverse('plan_detail', kwargs={'plan': self.plan.pk}),
+                             fetch_redirect_response=False)
+
+
+class SectionProgressTestCase(test.TestCase):
+
+    def setUp(self):
+        self.template = create_smallest_template()
+        self.input_type = self.template.questions.get().input_type
+        self.user = UserFactory()
+
+    def add_sections(self, count):
+        for _ in range(count):
+            section = SectionFactory(template=self.template)
+            QuestionFactory(section=section, input_type=self.input_type)
+
+    def get_num_queries(self, plan):
+        section = plan.template.sections.order_by('position').first()
+        plan.template.structure  # warm the cache
+        with CaptureQueriesContext(connection) as queries:
+            progress = get_section_progress(plan, section)
+        return len(queries), progress
+
+    def test_progress(self):
+        self.add_sections(2)
+        plan = PlanFactory(template=self.template, added_by=self.user, modified_by=self.user)
+        first = plan.template.sections.order_by('position').first()
+        plan.visited_sections.add(first)
+        _, progress = self.get_num_queries(plan)
+        self.assertEqual(len(progress), 3)
+        self.assertEqual(progress[0]['status'], 'active')
+        self.assertEqual([item['status'] for item in progress[1:]], ['new', 'new'])
+        answerset = plan.answersets.get(section=first)
+        kwargs = {'plan': plan.pk, 'section': first.pk, 'answerset': answerset.pk}
+        self.assertEqual(progress[0]['link'], reverse('answerset_detail', kwargs=kwargs))
+
+    def test_number_of_queries_does_not_depend_on_sections(self):
+        plan = PlanFactory(template=self.template, added_by=self.user, modified_by=self.user)
+        few, _ = self.get_num_queries(plan)
+        self.add_sections(5)
+        plan = PlanFactory(template=self.template, added_by=self.user, modified_by=self.user)
+        many, progress = self.get_num_queries(plan)
+        self.assertEqual(len(progress), 6)
+        self.assertEqual(few, many)
@@ -1,6 +1,12 @@
-from datetime import timedelta
+from datetime import datetime, timedelta
+from io import StringIO
+import json
+from unittest import mock
 
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase, tag, skipUnlessDBFeature
+from django.urls import reverse
 from django.utils.timezone import now as tznow
 
 from guardian.utils import get_anonymous_user
@@ -8,7 +14,7 @@ from guardian.utils import get_anonymous_user
 from easydmp.auth.models import User
 from easydmp.dmpt.models import Template
 from easydmp.plan.models import Plan
-from easydmp.lib.stats import stats
+from easydmp.lib.stats import get_stats, series, stats
 
 
 
@@ -67,3 +73,84 @@ class StatsTestCase(TestCase):
             },
         }
         self.assertDictEqual(result, expected)
+
+    def test_domains_are_distinct(self):
+        User.objects.create(username='testuser1', email='a@b.com')
+        User.objects.create(username='testuser2', email='b@b.com')
+        User.objects.create(username='testuser3', email='nodomain')
+        self.assertEqual(stats()['domains']['all'], 1)
+
+
+class SeriesTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.template = Template.objects.create(title='testtemplate')
+        self.u1 = User.objects.create(username='testuser1', email='a@b.com')
+        self.u2 = User.objects.create(username='testuser2', email='b@c.com')
+        self.p1 = Plan.objects.create(title='testplan1', added_by=self.u1,
+                                      modified_by=self.u1, template=self.template)
+        self.p2 = Plan.objects.create(title='testplan2', added_by=self.u2,
+                                      modified_by=self.u1, template=self.template,
+                                      published=tznow())
+
+    def test_series(self):
+        result = series()
+        month = tznow().strftime('%Y-%m')
+        self.assertEqual(result['plans_per_month'], [{'month': month, 'count': 2}])
+        self.assertEqual(result['active_editors_per_month'], [{'month': month, 'count': 1}])
+        self.assertEqual(result['published_plans_per_template'],
+                         [{'template': self.template.pk, 'count': 1}])
+
+    def add_plan_in_month(self, year, month, day=1):
+        plan = Plan.objects.create(title=f'testplan {year}-{month}-{day}',
+                                   added_by=self.u1, modified_by=self.u1,
+                                   template=self.template)
+        added = datetime(year, month, day)
+        Plan.objects.filter(pk=plan.pk).update(added=added, modified=added)
+
+    @mock.patch('easydmp.lib.stats.tznow',
+                return_value=datetime(2026, 3, 1, 12))
+    def test_series_has_one_bucket_per_month(self, _):
+        Plan.objects.all().delete()
+        for months_ago in range(14):
+            year, month = divmod(2026 * 12 + 2 - months_ago, 12)
+            self.add_plan_in_month(year, month + 1)
+        result = series(12)
+        months = [row['month'] for row in result['plans_per_month']]
+        self.assertEqual(len(months), 12)
+        self.assertEqual(months[0], '2025-04')
+        self.assertEqual(months[-1], '2026-03')
+        self.assertEqual(len(result['active_editors_per_month']), 12)
+
+    @mock.patch('easydmp.lib.stats.tznow',
+                return_value=datetime(2026, 3, 1, 12))
+    def test_series_over_many_years(self, _):
+        Plan.objects.all().delete()
+        self.add_plan_in_month(2016, 3, 31)
+        self.add_plan_in_month(2016, 4)
+        self.add_plan_in_month(2026, 3)
+        result = series(120)
+        months = [row['month'] for row in result['plans_per_month']]
+        self.assertEqual(months, ['2016-04', '2026-03'])
+
+    def test_get_stats_is_cached(self):
+        result = get_stats()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_stats(), result)
+
+    def test_api(self):
+        response = self.client.get(reverse('v2:stats'))
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual(result['plans']['all'], 2)
+        self.assertEqual(len(result['series']['plans_per_month']), 1)
+        response = self.client.get(reverse('v2:stats'), {'months': 'many'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('stats', '--series', '--no-cache', stdout=out)
+        result = json.loads(out.getvalue())
+        self.assertEqual(result['plans']['all'], 2)
+        self.assertIn('plans_per_month', result['series'])
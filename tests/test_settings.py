@@ -22,6 +22,8 @@ DATABASES = {
     'default': dj_database_url.parse(DATABASE_URL)
 }
 del DATABASE_URL
+# The same database, for the tests of easydmp.lib.replica
+DATABASES['replica'] = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
 
 DEFAULT_AUTO_FIELD = base_settings.DEFAULT_AUTO_FIELD
 
@@ -35,6 +37,14 @@ STATIC_URL = '/static/'
 
 # 3rd party
 
+REST_FRAMEWORK = base_settings.REST_FRAMEWORK
+
+# Production sets PAGE_SIZE without a DEFAULT_PAGINATION_CLASS on purpose,
+# views opt in to pagination with a class of their own
+SILENCED_SYSTEM_CHECKS = ['rest_framework.W001']
+
 AUTHENTICATION_BACKENDS = ('django.contrib.auth.backends.ModelBackend', 'guardian.backends.ObjectPermissionBackend')
 
+EASYDMP_GRAPH_CACHE_DIR = base_settings.EASYDMP_GRAPH_CACHE_DIR
+
 EASYDMP_INVITATION_FROM_ADDRESS = getattr(base_settings, 'EASYDMP_INVITATION_FROM_ADDRESS', 'foo@example.com')